@@ -6,7 +6,7 @@ from telegram.ext import ApplicationBuilder
 # Token is provided at runtime via BOT_TOKEN environment variable.
 import config
 import db
-from handlers import register_handlers, set_persistent_commands
+from handlers import on_shutdown, on_startup, on_stop, register_handlers
 from helpers import repair_tinder_profiles
 
 logging.basicConfig(
@@ -27,7 +27,9 @@ def main() -> None:
     builder = (
         ApplicationBuilder()
         .token(token)
-        .post_init(set_persistent_commands)
+        .post_init(on_startup)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
     )
     if config.API_BASE_URL:
         builder = builder.base_url(config.API_BASE_URL)
@@ -1,15 +1,95 @@
 import json
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 import config
+import game
 from translations import LANGUAGE_OPTIONS
 
 
 CandidateRow = Tuple[int, str, int, str, Optional[str], str, int]
 
+_ACTIVE_TX: ContextVar[Optional[sqlite3.Connection]] = ContextVar("db_active_tx", default=None)
+
+
+class _TxConnection:
+    """Connection handle used inside transaction(); commit/close wait for the block to exit."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _PooledConnection(_TxConnection):
+    """Per-thread connection handle; close() hands it back instead of closing it."""
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+
+_POOL = threading.local()
+
+
+def _open_connection() -> sqlite3.Connection:
+    # Pooled connections live for the whole process, so sqlite3's per-connection
+    # statement cache keeps the hot queries parsed; size it above the default 128.
+    conn = sqlite3.connect(config.DB_PATH, timeout=5.0, cached_statements=256)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _connect():
+    active = _ACTIVE_TX.get()
+    if active is not None:
+        return _TxConnection(active)
+    conn = getattr(_POOL, "conn", None)
+    if conn is None or _POOL.path != config.DB_PATH:
+        conn = _POOL.conn = _open_connection()
+        _POOL.path = config.DB_PATH
+    elif conn.in_transaction:
+        # A previous helper raised before commit/close.
+        conn.rollback()
+    return _PooledConnection(conn)
+
+
+@contextmanager
+def transaction():
+    """Run the db helpers called inside the block on one connection with a single commit."""
+    if _ACTIVE_TX.get() is not None:
+        yield
+        return
+    conn = _open_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    token = _ACTIVE_TX.set(conn)
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+    finally:
+        _ACTIVE_TX.reset(token)
+        conn.close()
+
 
 def init_db() -> None:
     db_path = Path(config.DB_PATH)
@@ -95,6 +175,36 @@ def init_db() -> None:
         )
         """
     )
+    # Per-candidate vote totals, kept in step with the votes table by triggers
+    # so the results ranking doesn't have to aggregate every vote.
+    try:
+        cur.execute("ALTER TABLE candidates ADD COLUMN votes_count INTEGER DEFAULT 0")
+        cur.execute("ALTER TABLE candidates ADD COLUMN rating_sum INTEGER DEFAULT 0")
+        cur.execute(
+            """
+            UPDATE candidates SET
+                votes_count = (SELECT COUNT(*) FROM votes WHERE candidate_id = candidates.id),
+                rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM votes WHERE candidate_id = candidates.id)
+            """
+        )
+    except sqlite3.OperationalError:
+        pass
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_votes_insert AFTER INSERT ON votes BEGIN
+            UPDATE candidates SET votes_count = votes_count + 1, rating_sum = rating_sum + NEW.rating
+            WHERE id = NEW.candidate_id;
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_votes_delete AFTER DELETE ON votes BEGIN
+            UPDATE candidates SET votes_count = votes_count - 1, rating_sum = rating_sum - OLD.rating
+            WHERE id = OLD.candidate_id;
+        END
+        """
+    )
 
     cur.execute(
         """
@@ -148,6 +258,11 @@ def init_db() -> None:
         )
         """
     )
+    for col in ["blackjack_wins", "blackjack_losses", "blackjack_pushes", "shop_spent", "commands_used", "checkins"]:
+        try:
+            cur.execute(f"ALTER TABLE user_stats ADD COLUMN {col} INTEGER DEFAULT 0")
+        except sqlite3.OperationalError:
+            pass
 
     cur.execute(
         """
@@ -274,6 +389,21 @@ def init_db() -> None:
         """
     )
 
+    # Reverse-geocode results keyed by coordinates rounded to 4 decimals, so
+    # Nominatim is asked about a spot once rather than once per process.
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            lat_key REAL,
+            lon_key REAL,
+            label TEXT NOT NULL,
+            normalized TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (lat_key, lon_key)
+        )
+        """
+    )
+
     cur.execute(
         """
         CREATE TABLE IF NOT EXISTS shop_items (
@@ -380,6 +510,10 @@ def init_db() -> None:
         )
         """
     )
+    try:
+        cur.execute("ALTER TABLE blackjack_sessions ADD COLUMN boost REAL DEFAULT 0")
+    except sqlite3.OperationalError:
+        pass
 
     cur.execute(
         """
@@ -395,13 +529,21 @@ def init_db() -> None:
     try:
         cur.execute("CREATE INDEX IF NOT EXISTS idx_votes_user_candidate ON votes(user_id, candidate_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_approved_gender ON candidates(approved, gender)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_candidates_approved_id ON candidates(approved, id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tinder_swipes_user ON tinder_swipes(user_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tinder_matches_usera ON tinder_matches(user_a)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tinder_matches_userb ON tinder_matches(user_b)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_tinder_profiles_city ON tinder_profiles(normalized_city)")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tinder_profiles_match ON tinder_profiles(active, normalized_city, gender, updated_at)"
+        )
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_tinder_swipes_user_target ON tinder_swipes(user_id, target_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_purchases_notified ON purchases(notified)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_purchases_status_created ON purchases(status, created_at)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_purchases_recipient ON purchases(recipient_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_purchases_recipient_username ON purchases(recipient_username)")
+        # Matches find_user_by_username's LOWER(username) = LOWER(?) lookup.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(LOWER(username))")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_user_profiles_user ON user_profiles(user_id)")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_referrals_referrer ON referrals(referrer_id)")
     except Exception:
@@ -443,7 +585,7 @@ def init_db() -> None:
 
 def ensure_user_local_ids() -> None:
     """Ensure users table has local_id column populated and indexed."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("PRAGMA table_info(users)")
     columns = [row[1] for row in cur.fetchall()]
@@ -470,81 +612,140 @@ def ensure_user_local_ids() -> None:
     conn.close()
 
 
-def get_mode() -> str:
-    conn = sqlite3.connect(config.DB_PATH)
+# Settings change only through the setters below (admin actions), so reads
+# are served from a short-lived in-process cache.
+_SETTINGS_TTL = 5.0
+_SETTINGS_CACHE: Dict[str, Tuple[Optional[str], float]] = {}
+
+
+def _get_setting(key: str) -> Optional[str]:
+    now = time.monotonic()
+    hit = _SETTINGS_CACHE.get(key)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    conn = _connect()
     cur = conn.cursor()
-    cur.execute("SELECT value FROM settings WHERE key = 'mode'")
+    cur.execute("SELECT value FROM settings WHERE key = ?", (key,))
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else "collect"
+    value = row[0] if row else None
+    _SETTINGS_CACHE[key] = (value, now + _SETTINGS_TTL)
+    return value
 
 
-def set_mode(mode: str) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+def _set_setting(key: str, value: str) -> None:
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        "INSERT INTO settings (key, value) VALUES ('mode', ?) "
+        "INSERT INTO settings (key, value) VALUES (?, ?) "
         "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
-        (mode,),
+        (key, value),
     )
     conn.commit()
     conn.close()
+    _SETTINGS_CACHE.pop(key, None)
+
+
+def get_feature_flags(names, default: bool = True) -> Dict[str, bool]:
+    """Resolve several feature flags, reading all cache misses in one query."""
+    now = time.monotonic()
+    values: Dict[str, Optional[str]] = {}
+    missing = []
+    for name in names:
+        hit = _SETTINGS_CACHE.get(f"feature:{name}")
+        if hit is not None and hit[1] > now:
+            values[name] = hit[0]
+        else:
+            missing.append(name)
+    if missing:
+        keys = [f"feature:{name}" for name in missing]
+        conn = _connect()
+        cur = conn.cursor()
+        cur.execute(
+            f"SELECT key, value FROM settings WHERE key IN ({','.join('?' * len(keys))})",
+            keys,
+        )
+        found = dict(cur.fetchall())
+        conn.close()
+        expires = now + _SETTINGS_TTL
+        for name, key in zip(missing, keys):
+            value = found.get(key)
+            _SETTINGS_CACHE[key] = (value, expires)
+            values[name] = value
+    # Build the result in the caller's order (values holds cache hits before misses).
+    return {name: (values[name] == "on" if values[name] is not None else default) for name in names}
+
+
+def clear_settings_cache() -> None:
+    _SETTINGS_CACHE.clear()
+
+
+def get_mode() -> str:
+    return _get_setting("mode") or "collect"
+
+
+def set_mode(mode: str) -> None:
+    _set_setting("mode", mode)
 
 
 def set_feature_enabled(name: str, enabled: bool) -> None:
     """Store a feature flag in settings as feature:<name> = on/off."""
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO settings (key, value) VALUES (?, ?) "
-        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
-        (f"feature:{name}", "on" if enabled else "off"),
-    )
-    conn.commit()
-    conn.close()
+    _set_setting(f"feature:{name}", "on" if enabled else "off")
 
 
 def is_feature_enabled(name: str, default: bool = True) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT value FROM settings WHERE key = ?", (f"feature:{name}",))
-    row = cur.fetchone()
-    conn.close()
-    if row:
-        return row[0] == "on"
+    value = _get_setting(f"feature:{name}")
+    if value is not None:
+        return value == "on"
     return default
 
 
 # ---------- Admin users ----------
 
 
+_ADMIN_IDS: Optional[frozenset] = None
+
+
+def _admin_ids() -> frozenset:
+    """All admin_users ids, loaded once and kept in step by add/remove_admin_user."""
+    global _ADMIN_IDS
+    if _ADMIN_IDS is None:
+        _ADMIN_IDS = frozenset(list_admin_users())
+    return _ADMIN_IDS
+
+
+def load_admin_users() -> None:
+    """Read admin_users into memory ahead of the first admin check."""
+    global _ADMIN_IDS
+    _ADMIN_IDS = frozenset(list_admin_users())
+
+
 def is_admin_user(user_id: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM admin_users WHERE user_id = ?", (user_id,))
-    row = cur.fetchone()
-    conn.close()
-    return bool(row)
+    return user_id in _admin_ids()
 
 
 def add_admin_user(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    global _ADMIN_IDS
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO admin_users (user_id) VALUES (?)", (user_id,))
     conn.commit()
     conn.close()
+    _ADMIN_IDS = _admin_ids() | {user_id}
 
 
 def remove_admin_user(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    global _ADMIN_IDS
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM admin_users WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+    _ADMIN_IDS = _admin_ids() - {user_id}
 
 
 def list_admin_users() -> list[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT user_id FROM admin_users ORDER BY user_id")
     rows = cur.fetchall()
@@ -552,8 +753,21 @@ def list_admin_users() -> list[int]:
     return [r[0] for r in rows]
 
 
+# Bumped by every secret_santa write so callers can key caches on it.
+_SANTA_VERSION = 0
+
+
+def santa_version() -> int:
+    return _SANTA_VERSION
+
+
+def _bump_santa_version() -> None:
+    global _SANTA_VERSION
+    _SANTA_VERSION += 1
+
+
 def get_santa_number_for_user(user_id: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gift_number FROM secret_santa WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -566,13 +780,14 @@ def assign_secret_santa_number(user_id: int) -> Optional[int]:
     existing = get_santa_number_for_user(user_id)
     if existing:
         return existing
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "INSERT INTO secret_santa (user_id) VALUES (?)",
         (user_id,),
     )
     conn.commit()
+    _bump_santa_version()
     cur.execute("SELECT gift_number FROM secret_santa WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
     conn.close()
@@ -580,7 +795,7 @@ def assign_secret_santa_number(user_id: int) -> Optional[int]:
 
 
 def update_secret_santa_details(user_id: int, name: str, gift_photo_id: Optional[str]) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO secret_santa (user_id) VALUES (?)", (user_id,))
     cur.execute(
@@ -593,10 +808,11 @@ def update_secret_santa_details(user_id: int, name: str, gift_photo_id: Optional
     )
     conn.commit()
     conn.close()
+    _bump_santa_version()
 
 
 def get_santa_details_for_user(user_id: int) -> Optional[Tuple[int, Optional[str], Optional[str]]]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gift_number, name, gift_photo_id FROM secret_santa WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -605,16 +821,17 @@ def get_santa_details_for_user(user_id: int) -> Optional[Tuple[int, Optional[str
 
 
 def set_santa_gift_photo(user_id: int, file_id: str) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO secret_santa (user_id) VALUES (?)", (user_id,))
     cur.execute("UPDATE secret_santa SET gift_photo_id = ? WHERE user_id = ?", (file_id, user_id))
     conn.commit()
     conn.close()
+    _bump_santa_version()
 
 
 def get_first_santa_number() -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gift_number FROM secret_santa ORDER BY gift_number LIMIT 1")
     row = cur.fetchone()
@@ -623,7 +840,7 @@ def get_first_santa_number() -> Optional[int]:
 
 
 def get_next_santa_number(current: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gift_number FROM secret_santa WHERE gift_number > ? ORDER BY gift_number LIMIT 1", (current,))
     row = cur.fetchone()
@@ -632,7 +849,7 @@ def get_next_santa_number(current: int) -> Optional[int]:
 
 
 def get_prev_santa_number(current: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gift_number FROM secret_santa WHERE gift_number < ? ORDER BY gift_number DESC LIMIT 1", (current,))
     row = cur.fetchone()
@@ -642,7 +859,7 @@ def get_prev_santa_number(current: int) -> Optional[int]:
 
 def get_santa_by_number(gift_number: int) -> Optional[Tuple[int, int, str, str, str, str, str]]:
     """Return (gift_number, user_id, username, first_name, last_name, name, gift_photo_id)."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -682,15 +899,9 @@ STAT_COLUMNS = {
 
 
 def ensure_user_stats(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("INSERT OR IGNORE INTO user_stats (user_id) VALUES (?)", (user_id,))
-    # ensure new columns exist with defaults
-    for col in ["blackjack_wins", "blackjack_losses", "blackjack_pushes", "shop_spent", "commands_used", "checkins"]:
-        try:
-            cur.execute(f"ALTER TABLE user_stats ADD COLUMN {col} INTEGER DEFAULT 0")
-        except sqlite3.OperationalError:
-            pass
     conn.commit()
     conn.close()
 
@@ -700,7 +911,7 @@ def increment_stat(user_id: int, field: str, delta: int = 1) -> None:
     if not column or delta == 0:
         return
     ensure_user_stats(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         f"UPDATE user_stats SET {column} = {column} + ? WHERE user_id = ?",
@@ -708,11 +919,12 @@ def increment_stat(user_id: int, field: str, delta: int = 1) -> None:
     )
     conn.commit()
     conn.close()
+    _STATS_CACHE.pop(user_id, None)
 
 
 def get_blackjack_totals() -> Tuple[int, int, int]:
     """Return total wins, losses, pushes across all users."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT COALESCE(SUM(blackjack_wins),0), COALESCE(SUM(blackjack_losses),0), COALESCE(SUM(blackjack_pushes),0) FROM user_stats"
@@ -722,22 +934,27 @@ def get_blackjack_totals() -> Tuple[int, int, int]:
     return row if row else (0, 0, 0)
 
 
+# Wallet statements run several times per blackjack round; keeping the SQL text
+# identical lets every call hit the connection's statement cache.
+STARTING_BALANCE = 20
+_SQL_ENSURE_WALLET = f"INSERT OR IGNORE INTO user_wallets (user_id, balance) VALUES (?, {STARTING_BALANCE})"
+_SQL_GET_BALANCE = "SELECT balance FROM user_wallets WHERE user_id = ?"
+_SQL_ADJUST_BALANCE = "UPDATE user_wallets SET balance = balance + ? WHERE user_id = ? RETURNING balance"
+
+
 def ensure_wallet(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
-    cur.execute(
-        "INSERT OR IGNORE INTO user_wallets (user_id, balance) VALUES (?, 20)",
-        (user_id,),
-    )
+    cur.execute(_SQL_ENSURE_WALLET, (user_id,))
     conn.commit()
     conn.close()
 
 
 def get_balance(user_id: int) -> int:
     ensure_wallet(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
-    cur.execute("SELECT balance FROM user_wallets WHERE user_id = ?", (user_id,))
+    cur.execute(_SQL_GET_BALANCE, (user_id,))
     row = cur.fetchone()
     conn.close()
     return row[0] if row else 0
@@ -745,22 +962,18 @@ def get_balance(user_id: int) -> int:
 
 def adjust_balance(user_id: int, delta: int) -> int:
     ensure_wallet(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
-    cur.execute(
-        "UPDATE user_wallets SET balance = balance + ? WHERE user_id = ?",
-        (delta, user_id),
-    )
-    conn.commit()
-    cur.execute("SELECT balance FROM user_wallets WHERE user_id = ?", (user_id,))
+    cur.execute(_SQL_ADJUST_BALANCE, (delta, user_id))
     row = cur.fetchone()
+    conn.commit()
     conn.close()
     return row[0] if row else 0
 
 
 def get_last_checkin(user_id: int) -> Optional[str]:
     ensure_wallet(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT last_checkin FROM user_wallets WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -772,7 +985,7 @@ def record_checkin(user_id: int) -> int:
     today = date.today().isoformat()
     ensure_wallet(user_id)
     ensure_user_stats(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "UPDATE user_wallets SET balance = balance + 5, last_checkin = ? WHERE user_id = ?",
@@ -790,86 +1003,150 @@ def record_checkin(user_id: int) -> int:
     return row[0] if row else 0
 
 
+# user_id -> chosen language / gender (or None); handlers ask for these on every
+# update, and they only change through set_user_language / set_user_gender or
+# when user_profiles rows are deleted (see _forget_profile).
+_LANG_CACHE: Dict[int, Optional[str]] = {}
+_GENDER_CACHE: Dict[int, Optional[str]] = {}
+_LANG_CACHE_MAX = 10_000
+_LANGUAGE_CODES = frozenset(LANGUAGE_OPTIONS)
+
+
+def _forget_profile(user_id: int) -> None:
+    _LANG_CACHE.pop(user_id, None)
+    _GENDER_CACHE.pop(user_id, None)
+
+
 def get_user_gender(user_id: int) -> Optional[str]:
-    conn = sqlite3.connect(config.DB_PATH)
+    try:
+        return _GENDER_CACHE[user_id]
+    except KeyError:
+        pass
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT gender FROM user_profiles WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else None
+    gender = row[0] if row else None
+    if len(_GENDER_CACHE) >= _LANG_CACHE_MAX:
+        _GENDER_CACHE.clear()
+    _GENDER_CACHE[user_id] = gender
+    return gender
 
 
 def get_user_language(user_id: int) -> Optional[str]:
-    conn = sqlite3.connect(config.DB_PATH)
+    try:
+        return _LANG_CACHE[user_id]
+    except KeyError:
+        pass
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT language FROM user_profiles WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
     conn.close()
-    if row and row[0] in LANGUAGE_OPTIONS:
-        return row[0]
-    return None
+    language = row[0] if row and row[0] in _LANGUAGE_CODES else None
+    if len(_LANG_CACHE) >= _LANG_CACHE_MAX:
+        _LANG_CACHE.clear()
+    _LANG_CACHE[user_id] = language
+    return language
+
+
+# user_id -> (stats dict, expiry). Counters move through increment_stat and the
+# vote/candidate deletes, which drop the entry; the TTL bounds anything else.
+_STATS_TTL = 10.0
+_STATS_CACHE: Dict[int, Tuple[Dict[str, int], float]] = {}
+
+
+# get_user_stats keys, in the order of _SQL_STATS_COLUMNS (which expects the
+# user_stats row as `s` and the user as `u`).
+_STAT_FIELDS = (
+    "referrals",
+    "referral_rewards",
+    "boosts_credited",
+    "profiles_created",
+    "profiles_updated",
+    "votes_cast",
+    "likes",
+    "swipes",
+    "matches",
+    "purchases",
+    "gifts_sent",
+    "gifts_received",
+    "games_played",
+    "candidates_submitted",
+)
+_SQL_STATS_COLUMNS = """
+    s.referrals, s.referral_rewards, s.boosts_credited, s.profiles_created, s.profiles_updated, s.votes_cast,
+    s.likes_given, s.swipes, s.matches, s.purchases, s.gifts_sent, s.gifts_received,
+    s.games_played, s.candidates_submitted,
+    (SELECT COUNT(*) FROM votes WHERE user_id = u.user_id),
+    (SELECT COUNT(*) FROM candidates WHERE user_id = u.user_id)
+"""
+
+
+def _cache_stats(user_id: int, values, now: float) -> Dict[str, int]:
+    """Build the stats dict from _SQL_STATS_COLUMNS values (None when there is no user_stats row) and cache it."""
+    stats = {name: value or 0 for name, value in zip(_STAT_FIELDS, values)}
+    votes, candidates = values[-2:]
+    stats["votes"] = votes
+    stats["candidates"] = candidates
+    stats["votes_cast"] = max(stats["votes_cast"], votes)
+    stats["candidates_submitted"] = max(stats["candidates_submitted"], candidates)
+    if len(_STATS_CACHE) >= _LANG_CACHE_MAX:
+        _STATS_CACHE.clear()
+    _STATS_CACHE[user_id] = (stats, now + _STATS_TTL)
+    return dict(stats)
 
 
 def get_user_stats(user_id: int):
-    defaults = {
-        "referrals": 0,
-        "referral_rewards": 0,
-        "boosts_credited": 0,
-        "profiles_created": 0,
-        "profiles_updated": 0,
-        "votes_cast": 0,
-        "likes": 0,
-        "swipes": 0,
-        "matches": 0,
-        "purchases": 0,
-        "gifts_sent": 0,
-        "gifts_received": 0,
-        "games_played": 0,
-        "candidates_submitted": 0,
-    }
-    conn = sqlite3.connect(config.DB_PATH)
+    now = time.monotonic()
+    hit = _STATS_CACHE.get(user_id)
+    if hit is not None and hit[1] > now:
+        return dict(hit[0])
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        """
-        SELECT referrals, referral_rewards, boosts_credited, profiles_created, profiles_updated, votes_cast,
-               likes_given, swipes, matches, purchases, gifts_sent, gifts_received,
-               games_played, candidates_submitted
-        FROM user_stats WHERE user_id = ?
+        f"""
+        SELECT {_SQL_STATS_COLUMNS}
+        FROM (SELECT ? AS user_id) u LEFT JOIN user_stats s ON s.user_id = u.user_id
         """,
         (user_id,),
     )
     row = cur.fetchone()
-    stats = defaults.copy()
-    if row:
-        (
-            stats["referrals"],
-            stats["referral_rewards"],
-            stats["boosts_credited"],
-            stats["profiles_created"],
-            stats["profiles_updated"],
-            stats["votes_cast"],
-            stats["likes"],
-            stats["swipes"],
-            stats["matches"],
-            stats["purchases"],
-            stats["gifts_sent"],
-            stats["gifts_received"],
-            stats["games_played"],
-            stats["candidates_submitted"],
-        ) = row
-    cur.execute("SELECT COUNT(*) FROM votes WHERE user_id = ?", (user_id,))
-    votes = cur.fetchone()[0]
-    cur.execute("SELECT COUNT(*) FROM candidates WHERE user_id = ?", (user_id,))
-    candidates = cur.fetchone()[0]
     conn.close()
-    stats["votes"] = votes
-    stats["candidates"] = candidates
-    stats["votes_cast"] = max(stats["votes_cast"], votes)
-    stats["candidates_submitted"] = max(stats["candidates_submitted"], candidates)
-    return stats
+    return _cache_stats(user_id, row, now)
+
+
+def get_user_snapshot(user_id: int):
+    """Everything the admin user card shows, in one query.
+
+    Returns (user row as get_user, balance, gender, stats as get_user_stats) or
+    None for an unknown user. Reading it does not create a wallet.
+    """
+    now = time.monotonic()
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT u.user_id, u.local_id, u.username, u.first_name, u.last_name, u.language_code,
+               u.created_at, u.last_seen, COALESCE(w.balance, {STARTING_BALANCE}), p.gender,
+               {_SQL_STATS_COLUMNS}
+        FROM users u
+        LEFT JOIN user_wallets w ON w.user_id = u.user_id
+        LEFT JOIN user_profiles p ON p.user_id = u.user_id
+        LEFT JOIN user_stats s ON s.user_id = u.user_id
+        WHERE u.user_id = ?
+        """,
+        (user_id,),
+    )
+    row = cur.fetchone()
+    conn.close()
+    if not row:
+        return None
+    return row[:8], row[8], row[9], _cache_stats(user_id, row[10:], now)
 
 def get_user_basic(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT username, first_name, last_name FROM users WHERE user_id = ?",
@@ -881,7 +1158,7 @@ def get_user_basic(user_id: int):
 
 
 def user_exists(user_id: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT 1 FROM users WHERE user_id = ? LIMIT 1", (user_id,))
     exists = cur.fetchone() is not None
@@ -893,7 +1170,7 @@ def find_user_by_username(username: str) -> Optional[int]:
     if not username:
         return None
     uname = username.lstrip("@")
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT user_id FROM users WHERE LOWER(username) = LOWER(?) LIMIT 1",
@@ -905,7 +1182,7 @@ def find_user_by_username(username: str) -> Optional[int]:
 
 
 def reset_swipes_for_user(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM tinder_swipes WHERE user_id = ?", (user_id,))
     cur.execute(
@@ -917,7 +1194,7 @@ def reset_swipes_for_user(user_id: int):
 
 
 def reset_swipes_all():
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM tinder_swipes")
     cur.execute("DELETE FROM tinder_matches")
@@ -927,7 +1204,7 @@ def reset_swipes_all():
 
 def wipe_tinder_profiles():
     """Remove all Tinder-style profiles, media, swipes, and matches."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM tinder_media")
     cur.execute("DELETE FROM tinder_swipes")
@@ -935,10 +1212,65 @@ def wipe_tinder_profiles():
     cur.execute("DELETE FROM tinder_profiles")
     conn.commit()
     conn.close()
+    _profiles_changed()
 
 
 # ---------- Tinder-style helpers ----------
 
+# Bumped by every tinder_profiles / tinder_media write, so callers holding
+# prefetched profile rows can tell whether they went stale.
+_PROFILES_VERSION = 0
+
+
+def _profiles_changed() -> None:
+    global _PROFILES_VERSION
+    _PROFILES_VERSION += 1
+
+
+def profiles_version() -> int:
+    return _PROFILES_VERSION
+
+
+def get_cached_geocode(lat_key: float, lon_key: float) -> Optional[Tuple[str, str]]:
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT label, normalized FROM geocode_cache WHERE lat_key = ? AND lon_key = ?",
+        (lat_key, lon_key),
+    )
+    row = cur.fetchone()
+    conn.close()
+    return (row[0], row[1]) if row else None
+
+
+def put_cached_geocode(lat_key: float, lon_key: float, label: str, normalized: str) -> None:
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        "INSERT OR REPLACE INTO geocode_cache (lat_key, lon_key, label, normalized) VALUES (?, ?, ?, ?)",
+        (lat_key, lon_key, label, normalized),
+    )
+    conn.commit()
+    conn.close()
+
+
+_SQL_UPSERT_PROFILE = """
+    INSERT INTO tinder_profiles (user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio, active)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+    ON CONFLICT(user_id) DO UPDATE SET
+        age = excluded.age,
+        gender = excluded.gender,
+        interest = excluded.interest,
+        city = excluded.city,
+        normalized_city = excluded.normalized_city,
+        lat = excluded.lat,
+        lon = excluded.lon,
+        name = excluded.name,
+        bio = excluded.bio,
+        active = 1,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
 
 def upsert_profile(
     user_id: int,
@@ -952,33 +1284,35 @@ def upsert_profile(
     bio: str,
     normalized_city: str,
 ):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        """
-        INSERT INTO tinder_profiles (user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio, active)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-        ON CONFLICT(user_id) DO UPDATE SET
-            age = excluded.age,
-            gender = excluded.gender,
-            interest = excluded.interest,
-            city = excluded.city,
-            normalized_city = excluded.normalized_city,
-            lat = excluded.lat,
-            lon = excluded.lon,
-            name = excluded.name,
-            bio = excluded.bio,
-            active = 1,
-            updated_at = CURRENT_TIMESTAMP
-        """,
+        _SQL_UPSERT_PROFILE,
         (user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio),
     )
     conn.commit()
     conn.close()
+    _profiles_changed()
+
+
+def upsert_profiles_many(rows) -> None:
+    """upsert_profile for many rows (each in upsert_profile's argument order) in one transaction."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.executemany(
+        _SQL_UPSERT_PROFILE,
+        (
+            (user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio)
+            for user_id, age, gender, interest, city, lat, lon, name, bio, normalized_city in rows
+        ),
+    )
+    conn.commit()
+    conn.close()
+    _profiles_changed()
 
 
 def get_profile(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -993,15 +1327,16 @@ def get_profile(user_id: int):
 
 
 def clear_profile_media(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM tinder_media WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+    _profiles_changed()
 
 
 def add_profile_media(user_id: int, file_id: str, kind: str, position: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "INSERT INTO tinder_media (user_id, file_id, kind, position) VALUES (?, ?, ?, ?)",
@@ -1009,10 +1344,38 @@ def add_profile_media(user_id: int, file_id: str, kind: str, position: int):
     )
     conn.commit()
     conn.close()
+    _profiles_changed()
+
+
+def add_profile_media_bulk(user_id: int, items: List[Tuple[str, str]]):
+    """Insert (file_id, kind) items in order, positions starting at 0."""
+    if not items:
+        return
+    conn = _connect()
+    conn.executemany(
+        "INSERT INTO tinder_media (user_id, file_id, kind, position) VALUES (?, ?, ?, ?)",
+        [(user_id, file_id, kind, idx) for idx, (file_id, kind) in enumerate(items)],
+    )
+    conn.commit()
+    conn.close()
+    _profiles_changed()
+
+
+def replace_profile_media(user_id: int, items: List[Tuple[str, str]]):
+    """Swap a user's media for (file_id, kind) items in one transaction."""
+    with transaction():
+        conn = _connect()
+        conn.execute("DELETE FROM tinder_media WHERE user_id = ?", (user_id,))
+        conn.executemany(
+            "INSERT INTO tinder_media (user_id, file_id, kind, position) VALUES (?, ?, ?, ?)",
+            [(user_id, file_id, kind, idx) for idx, (file_id, kind) in enumerate(items)],
+        )
+        conn.close()
+    _profiles_changed()
 
 
 def list_tinder_profiles(offset: int = 0, limit: int = 20):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1029,7 +1392,7 @@ def list_tinder_profiles(offset: int = 0, limit: int = 20):
 
 
 def set_profile_active(user_id: int, active: bool):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "UPDATE tinder_profiles SET active = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
@@ -1037,34 +1400,50 @@ def set_profile_active(user_id: int, active: bool):
     )
     conn.commit()
     conn.close()
+    _profiles_changed()
 
 
-def get_next_profile_id(current_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+def toggle_profile_active(user_id: int):
+    """Flip a profile's active flag and return the updated row (as get_profile), or None."""
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        "SELECT user_id FROM tinder_profiles WHERE user_id > ? ORDER BY user_id LIMIT 1",
-        (current_id,),
+        """
+        UPDATE tinder_profiles SET active = NOT active, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?
+        RETURNING user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio, active, created_at, updated_at
+        """,
+        (user_id,),
     )
     row = cur.fetchone()
+    conn.commit()
     conn.close()
-    return row[0] if row else None
+    _profiles_changed()
+    return row
+
 
+# direction -> (comparison, sort order) for the admin carousels' neighbour lookups.
+_ADJACENT_SQL = {"next": (">", "ASC"), "prev": ("<", "DESC")}
 
-def get_prev_profile_id(current_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+
+def get_adjacent_profile(current_id: int, direction: str):
+    """Full profile row (as get_profile) just after/before current_id, or None."""
+    op, order = _ADJACENT_SQL[direction]
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        "SELECT user_id FROM tinder_profiles WHERE user_id < ? ORDER BY user_id DESC LIMIT 1",
+        f"""
+        SELECT user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio, active, created_at, updated_at
+        FROM tinder_profiles WHERE user_id {op} ? ORDER BY user_id {order} LIMIT 1
+        """,
         (current_id,),
     )
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else None
+    return row
 
 
 def list_profile_media(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT file_id, kind FROM tinder_media WHERE user_id = ? ORDER BY position",
@@ -1075,26 +1454,53 @@ def list_profile_media(user_id: int):
     return rows
 
 
-def mark_swipe(user_id: int, target_id: int, status: str):
-    conn = sqlite3.connect(config.DB_PATH)
+_FIRST_MEDIA_JOIN = """
+    LEFT JOIN tinder_media m ON m.rowid = (
+        SELECT rowid FROM tinder_media WHERE user_id = p.user_id ORDER BY position LIMIT 1
+    )
+"""
+
+
+def get_profile_with_first_media(user_id: int):
+    """Return (profile_row, (file_id, kind) or None) in one query; profile_row matches get_profile."""
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        """
-        INSERT INTO tinder_swipes (user_id, target_id, status)
-        VALUES (?, ?, ?)
-        """
-        ,
-        (user_id, target_id, status),
+        f"""
+        SELECT p.user_id, p.age, p.gender, p.interest, p.city, p.normalized_city, p.lat, p.lon,
+               p.name, p.bio, p.active, p.created_at, p.updated_at, m.file_id, m.kind
+        FROM tinder_profiles p
+        {_FIRST_MEDIA_JOIN}
+        WHERE p.user_id = ?
+        """,
+        (user_id,),
     )
-    conn.commit()
+    row = cur.fetchone()
     conn.close()
-    increment_stat(user_id, "swipes")
-    if status == "like":
-        increment_stat(user_id, "likes_given")
+    if not row:
+        return None, None
+    return row[:13], (row[13], row[14]) if row[13] else None
+
+
+def mark_swipe(user_id: int, target_id: int, status: str):
+    with transaction():
+        conn = _connect()
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO tinder_swipes (user_id, target_id, status)
+            VALUES (?, ?, ?)
+            """
+            ,
+            (user_id, target_id, status),
+        )
+        increment_stat(user_id, "swipes")
+        if status == "like":
+            increment_stat(user_id, "likes_given")
 
 
 def has_swiped(user_id: int, target_id: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT 1 FROM tinder_swipes WHERE user_id = ? AND target_id = ?",
@@ -1106,7 +1512,7 @@ def has_swiped(user_id: int, target_id: int) -> bool:
 
 
 def check_mutual_like(user_id: int, target_id: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1142,8 +1548,8 @@ def mark_like_and_check(user_id: int, target_id: int) -> bool:
     return check_mutual_like(user_id, target_id)
 
 
-def users_who_liked_me(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+def users_who_liked_me(user_id: int, limit: int = 20):
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1156,8 +1562,9 @@ def users_who_liked_me(user_id: int):
               WHERE s2.user_id = ? AND s2.target_id = s.user_id
           )
         ORDER BY s.created_at DESC
+        LIMIT ?
         """,
-        (user_id, user_id),
+        (user_id, user_id, limit),
     )
     rows = cur.fetchall()
     conn.close()
@@ -1165,18 +1572,21 @@ def users_who_liked_me(user_id: int):
 
 
 def get_next_candidate(user_id: int, user_gender: str, user_interest: str, normalized_city: str = ""):
-    conn = sqlite3.connect(config.DB_PATH)
+    """Return (user_id, age, gender, interest, city, name, bio, first_file_id, first_kind) or None."""
+    conn = _connect()
     cur = conn.cursor()
     def run_query(city_filter: bool):
-        params = [user_id, user_id]
+        # Params follow placeholder order: self-exclusion, swipe anti-join, gender/interest match, city.
+        params = [user_id, user_id, user_interest, user_interest, user_gender]
         city_clause = ""
         if city_filter and normalized_city:
             city_clause = " AND p.normalized_city = ? "
             params.append(normalized_city)
         cur.execute(
             f"""
-            SELECT p.user_id, p.age, p.gender, p.interest, p.city, p.name, p.bio
+            SELECT p.user_id, p.age, p.gender, p.interest, p.city, p.name, p.bio, m.file_id, m.kind
             FROM tinder_profiles p
+            {_FIRST_MEDIA_JOIN}
             WHERE p.active = 1
               AND p.user_id != ?
               AND NOT EXISTS (
@@ -1193,7 +1603,7 @@ def get_next_candidate(user_id: int, user_gender: str, user_interest: str, norma
             ORDER BY p.updated_at DESC
             LIMIT 1
             """,
-            params + [user_interest, user_interest, user_gender],
+            params,
         )
         return cur.fetchone()
 
@@ -1205,11 +1615,9 @@ def get_next_candidate(user_id: int, user_gender: str, user_interest: str, norma
 
 
 def set_user_language(user_id: int, language: str) -> None:
-    from translations import LANGUAGE_OPTIONS as LANGS  # lazy import to avoid cycles
-
-    if language not in LANGS:
+    if language not in _LANGUAGE_CODES:
         language = "en"
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1221,10 +1629,11 @@ def set_user_language(user_id: int, language: str) -> None:
     )
     conn.commit()
     conn.close()
+    _LANG_CACHE.pop(user_id, None)
 
 
 def set_user_gender(user_id: int, gender: str) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1236,25 +1645,42 @@ def set_user_gender(user_id: int, gender: str) -> None:
     )
     conn.commit()
     conn.close()
+    _GENDER_CACHE.pop(user_id, None)
 
 
 def delete_user_profile(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+    _forget_profile(user_id)
     conn.commit()
     conn.close()
 
 
+# Keeps a valid chosen language, otherwise stores the Telegram one.
+_SQL_SEED_LANGUAGE = f"""
+    INSERT INTO user_profiles (user_id, language)
+    VALUES (?, ?)
+    ON CONFLICT(user_id) DO UPDATE SET language = CASE
+        WHEN user_profiles.language IN ({", ".join(f"'{code}'" for code in LANGUAGE_OPTIONS)})
+        THEN user_profiles.language
+        ELSE excluded.language
+    END
+"""
+
+
 def upsert_user_basic(
     user_id: int,
     username: Optional[str],
     first_name: Optional[str],
     last_name: Optional[str],
     language_code: Optional[str],
+    seed_language: bool = False,
 ) -> None:
+    """Upsert the users row; with seed_language, also adopt a supported
+    Telegram language_code when no language has been chosen yet."""
     ensure_user_local_ids()
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT local_id FROM users WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -1278,12 +1704,39 @@ def upsert_user_basic(
         """,
         (user_id, local_id, username, first_name, last_name, language_code),
     )
+    seed = seed_language and language_code in _LANGUAGE_CODES and _LANG_CACHE.get(user_id) is None
+    if seed:
+        cur.execute(_SQL_SEED_LANGUAGE, (user_id, language_code))
+    conn.commit()
+    conn.close()
+    if seed:
+        _LANG_CACHE.pop(user_id, None)
+
+
+def touch_users_basic(
+    rows: List[Tuple[int, Optional[str], Optional[str], Optional[str], Optional[str]]]
+) -> None:
+    """Refresh identity fields and last_seen for known users in one batch.
+
+    Each row is (user_id, username, first_name, last_name, language_code).
+    """
+    if not rows:
+        return
+    conn = _connect()
+    conn.executemany(
+        """
+        UPDATE users
+        SET username = ?, first_name = ?, last_name = ?, language_code = ?, last_seen = CURRENT_TIMESTAMP
+        WHERE user_id = ?
+        """,
+        [(username, first, last, code, uid) for uid, username, first, last, code in rows],
+    )
     conn.commit()
     conn.close()
 
 
 def get_local_user_id(user_id: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT local_id FROM users WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -1292,15 +1745,16 @@ def get_local_user_id(user_id: int) -> Optional[int]:
 
 
 def delete_candidates_for_user(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM candidates WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+    _STATS_CACHE.pop(user_id, None)
 
 
 def get_all_user_ids() -> List[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT user_id FROM user_profiles")
     rows = cur.fetchall()
@@ -1309,7 +1763,7 @@ def get_all_user_ids() -> List[int]:
 
 
 def list_users(limit: int = 50):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1326,7 +1780,7 @@ def list_users(limit: int = 50):
 
 
 def get_user(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1341,7 +1795,7 @@ def get_user(user_id: int):
 
 
 def get_next_user_id(current_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT user_id FROM users WHERE user_id > ? ORDER BY user_id LIMIT 1",
@@ -1353,7 +1807,7 @@ def get_next_user_id(current_id: int):
 
 
 def get_prev_user_id(current_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT user_id FROM users WHERE user_id < ? ORDER BY user_id DESC LIMIT 1",
@@ -1365,16 +1819,18 @@ def get_prev_user_id(current_id: int):
 
 
 def reset_votes_for_user(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM votes WHERE user_id = ?", (user_id,))
     cur.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+    _forget_profile(user_id)
     conn.commit()
     conn.close()
+    _STATS_CACHE.pop(user_id, None)
 
 
 def approve_candidate(candidate_id: int, value: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "UPDATE candidates SET approved = ? WHERE id = ?",
@@ -1384,8 +1840,51 @@ def approve_candidate(candidate_id: int, value: int) -> None:
     conn.close()
 
 
+_CANDIDATE_EDITABLE_FIELDS = frozenset({"name", "age", "gender", "instagram"})
+
+
+def update_candidate_field(candidate_id: int, field: str, value) -> None:
+    if field not in _CANDIDATE_EDITABLE_FIELDS:
+        raise ValueError(f"Unknown candidate field: {field}")
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(f"UPDATE candidates SET {field} = ? WHERE id = ?", (value, candidate_id))
+    conn.commit()
+    conn.close()
+
+
+def list_candidates() -> List[Tuple[int, str, int]]:
+    """Return (id, name, approved) for every candidate."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute("SELECT id, name, approved FROM candidates ORDER BY id")
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
+def top_candidates(limit: int = 10) -> List[Tuple[int, str, int, Optional[float]]]:
+    """Return (id, name, votes, avg_rating) for approved candidates, best rated first."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, name, votes_count,
+               rating_sum * 1.0 / NULLIF(votes_count, 0) AS avg_rating
+        FROM candidates
+        WHERE approved = 1
+        ORDER BY (avg_rating IS NULL), avg_rating DESC, votes_count DESC
+        LIMIT ?
+        """,
+        (limit,),
+    )
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+
 def get_candidate_by_id(candidate_id: int) -> Optional[CandidateRow]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT id, name, age, gender, instagram, photo_file_id, approved "
@@ -1398,7 +1897,7 @@ def get_candidate_by_id(candidate_id: int) -> Optional[CandidateRow]:
 
 
 def get_first_candidate() -> Optional[CandidateRow]:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "SELECT id, name, age, gender, instagram, photo_file_id, approved "
@@ -1409,32 +1908,23 @@ def get_first_candidate() -> Optional[CandidateRow]:
     return row  # type: ignore
 
 
-def get_next_candidate_id(current_id: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
+def get_adjacent_candidate(current_id: int, direction: str) -> Optional[CandidateRow]:
+    """Candidate row (as get_candidate_by_id) just after/before current_id, or None."""
+    op, order = _ADJACENT_SQL[direction]
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        "SELECT id FROM candidates WHERE id > ? ORDER BY id LIMIT 1",
-        (current_id,),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return row[0] if row else None
-
-
-def get_prev_candidate_id(current_id: int) -> Optional[int]:
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id FROM candidates WHERE id < ? ORDER BY id DESC LIMIT 1",
+        "SELECT id, name, age, gender, instagram, photo_file_id, approved "
+        f"FROM candidates WHERE id {op} ? ORDER BY id {order} LIMIT 1",
         (current_id,),
     )
     row = cur.fetchone()
     conn.close()
-    return row[0] if row else None
+    return row  # type: ignore
 
 
 def has_candidate_for_user(user_id: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT 1 FROM candidates WHERE user_id = ?", (user_id,))
     exists = cur.fetchone()
@@ -1443,7 +1933,7 @@ def has_candidate_for_user(user_id: int) -> bool:
 
 
 def get_next_unrated_candidate(user_id: int, target_gender: Optional[str]):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     params = []
     gender_clause = ""
@@ -1472,7 +1962,7 @@ def get_next_unrated_candidate(user_id: int, target_gender: Optional[str]):
 
 
 def get_approved_count(target_gender: Optional[str] = None) -> int:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     if target_gender:
         cur.execute(
@@ -1487,23 +1977,20 @@ def get_approved_count(target_gender: Optional[str] = None) -> int:
 
 
 def add_vote(user_id: int, candidate_id: int, rating: int) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT 1 FROM votes WHERE user_id = ? AND candidate_id = ?",
-        (user_id, candidate_id),
-    )
-    already = cur.fetchone()
-    if already:
-        conn.close()
-        return False
-    cur.execute(
-        "INSERT INTO votes (user_id, candidate_id, rating) VALUES (?, ?, ?)",
-        (user_id, candidate_id, rating),
-    )
-    conn.commit()
-    conn.close()
-    increment_stat(user_id, "votes_cast")
+    with transaction():
+        conn = _connect()
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT 1 FROM votes WHERE user_id = ? AND candidate_id = ?",
+            (user_id, candidate_id),
+        )
+        if cur.fetchone():
+            return False
+        cur.execute(
+            "INSERT INTO votes (user_id, candidate_id, rating) VALUES (?, ?, ?)",
+            (user_id, candidate_id, rating),
+        )
+        increment_stat(user_id, "votes_cast")
     return True
 
 
@@ -1515,7 +2002,7 @@ def add_candidate(
     instagram: Optional[str],
     file_id: str,
 ) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1530,16 +2017,17 @@ def add_candidate(
 
 
 def delete_candidate_for_user(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM candidates WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+    _STATS_CACHE.pop(user_id, None)
 
 
 def upsert_candidate_from_profile(user_id: int, name: str, age: int, gender: str, file_id: str, instagram: Optional[str] = None):
     """Create or refresh candidate from profile data; resets approval to pending."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT id FROM candidates WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -1571,7 +2059,7 @@ def upsert_candidate_from_profile(user_id: int, name: str, age: int, gender: str
 
 def delete_full_profile(user_id: int):
     """Delete all finder/profile data for a user (profile, media, swipes, matches, candidates, votes)."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM tinder_media WHERE user_id = ?", (user_id,))
     cur.execute("DELETE FROM tinder_swipes WHERE user_id = ? OR target_id = ?", (user_id, user_id))
@@ -1581,17 +2069,21 @@ def delete_full_profile(user_id: int):
     cur.execute("DELETE FROM votes WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+    _profiles_changed()
+    _STATS_CACHE.pop(user_id, None)
 
 
 def delete_user_completely(user_id: int):
     """Delete all user data including user row, wallets, contacts, purchases."""
     delete_full_profile(user_id)
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM user_wallets WHERE user_id = ?", (user_id,))
     cur.execute("DELETE FROM user_profiles WHERE user_id = ?", (user_id,))
+    _forget_profile(user_id)
     cur.execute("DELETE FROM user_contacts WHERE user_id = ?", (user_id,))
     cur.execute("DELETE FROM user_stats WHERE user_id = ?", (user_id,))
+    _STATS_CACHE.pop(user_id, None)
     cur.execute("DELETE FROM purchases WHERE user_id = ? OR recipient_id = ?", (user_id, user_id))
     cur.execute("DELETE FROM blackjack_sessions WHERE user_id = ?", (user_id,))
     cur.execute("DELETE FROM phantom_users WHERE user_id = ?", (user_id,))
@@ -1602,7 +2094,7 @@ def delete_user_completely(user_id: int):
 
 
 def add_phantom_user(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "INSERT OR IGNORE INTO phantom_users (user_id) VALUES (?)",
@@ -1613,7 +2105,7 @@ def add_phantom_user(user_id: int):
 
 
 def boost_exists(boost_id: str) -> bool:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT 1 FROM chat_boosts WHERE boost_id = ? LIMIT 1", (boost_id,))
     exists = cur.fetchone() is not None
@@ -1622,7 +2114,7 @@ def boost_exists(boost_id: str) -> bool:
 
 
 def add_boost(boost_id: str, user_id: Optional[int]):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1635,8 +2127,41 @@ def add_boost(boost_id: str, user_id: Optional[int]):
     conn.close()
 
 
+_SQL_PARAM_CHUNK = 900  # stay under SQLite's default 999 host parameters
+
+
+def existing_boost_ids(boost_ids: List[str]) -> set:
+    """Return the subset of `boost_ids` already recorded in chat_boosts."""
+    found = set()
+    conn = _connect()
+    cur = conn.cursor()
+    for start in range(0, len(boost_ids), _SQL_PARAM_CHUNK):
+        chunk = boost_ids[start:start + _SQL_PARAM_CHUNK]
+        cur.execute(
+            f"SELECT boost_id FROM chat_boosts WHERE boost_id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        )
+        found.update(row[0] for row in cur.fetchall())
+    conn.close()
+    return found
+
+
+def credit_boosts(boosts: List[Tuple[str, Optional[int]]], bonus: int) -> None:
+    """Record new (boost_id, user_id) pairs and pay `bonus` for each one with a user, in one commit."""
+    with transaction():
+        conn = _connect()
+        conn.executemany(
+            "INSERT OR IGNORE INTO chat_boosts (boost_id, user_id, credited) VALUES (?, ?, ?)",
+            [(boost_id, user_id, 1 if user_id else 0) for boost_id, user_id in boosts],
+        )
+        conn.close()
+        for _, user_id in boosts:
+            if user_id:
+                adjust_balance(user_id, bonus)
+
+
 def mark_boost_credited(boost_id: str):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("UPDATE chat_boosts SET credited = 1 WHERE boost_id = ?", (boost_id,))
     conn.commit()
@@ -1647,7 +2172,7 @@ def set_referrer(user_id: int, referrer_id: int):
     """Store referrer for a user if not already set and not self-referral."""
     if user_id == referrer_id:
         return
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1662,7 +2187,7 @@ def set_referrer(user_id: int, referrer_id: int):
 
 
 def get_referrer(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT referrer_id, credited FROM referrals WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -1671,16 +2196,19 @@ def get_referrer(user_id: int):
 
 
 def mark_referral_credited(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("UPDATE referrals SET credited = 1 WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
 
 
-def delete_phantom_users():
-    """Remove all phantom guest users and their data (tracked ids + usernames ending with _ph)."""
-    conn = sqlite3.connect(config.DB_PATH)
+def delete_phantom_users() -> Set[int]:
+    """Remove all phantom guest users and their data (tracked ids + usernames ending with _ph).
+
+    Returns the deleted user ids.
+    """
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT user_id FROM phantom_users")
     phantom_ids = {row[0] for row in cur.fetchall()}
@@ -1690,31 +2218,42 @@ def delete_phantom_users():
     conn.close()
     for uid in phantom_ids:
         delete_full_profile(uid)
-        conn = sqlite3.connect(config.DB_PATH)
+        conn = _connect()
         cur = conn.cursor()
         cur.execute("DELETE FROM user_wallets WHERE user_id = ?", (uid,))
         cur.execute("DELETE FROM user_profiles WHERE user_id = ?", (uid,))
+        _forget_profile(uid)
         cur.execute("DELETE FROM user_contacts WHERE user_id = ?", (uid,))
         cur.execute("DELETE FROM user_stats WHERE user_id = ?", (uid,))
+        _STATS_CACHE.pop(uid, None)
         cur.execute("DELETE FROM purchases WHERE user_id = ? OR recipient_id = ?", (uid, uid))
         cur.execute("DELETE FROM blackjack_sessions WHERE user_id = ?", (uid,))
         cur.execute("DELETE FROM phantom_users WHERE user_id = ?", (uid,))
         cur.execute("DELETE FROM users WHERE user_id = ?", (uid,))
         conn.commit()
         conn.close()
+    return phantom_ids
 
 
-def list_shop_items() -> List[Tuple[int, str, int]]:
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, price, code, kind FROM shop_items ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+# The catalog only changes through ensure_shop_item (and init_db seeding), so it
+# is kept in memory between writes.
+_SHOP_ITEMS_CACHE: Optional[Tuple[Tuple[int, str, int, str, str], ...]] = None
+
+
+def list_shop_items() -> Tuple[Tuple[int, str, int, str, str], ...]:
+    """(id, name, price, code, kind) rows ordered by id; an immutable cached snapshot."""
+    global _SHOP_ITEMS_CACHE
+    if _SHOP_ITEMS_CACHE is None:
+        conn = _connect()
+        cur = conn.cursor()
+        cur.execute("SELECT id, name, price, code, kind FROM shop_items ORDER BY id")
+        _SHOP_ITEMS_CACHE = tuple(cur.fetchall())
+        conn.close()
+    return _SHOP_ITEMS_CACHE
 
 
 def get_shop_item(item_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT id, code, name, kind, price FROM shop_items WHERE id = ?", (item_id,))
     row = cur.fetchone()
@@ -1723,7 +2262,8 @@ def get_shop_item(item_id: int):
 
 
 def ensure_shop_item(code: str, name: str, kind: str, price: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    global _SHOP_ITEMS_CACHE
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT id FROM shop_items WHERE code = ?", (code,))
     row = cur.fetchone()
@@ -1739,6 +2279,7 @@ def ensure_shop_item(code: str, name: str, kind: str, price: int):
         )
     conn.commit()
     conn.close()
+    _SHOP_ITEMS_CACHE = None
 
 
 def create_purchase(
@@ -1749,7 +2290,7 @@ def create_purchase(
     data: str,
     status: str = "pending",
 ) -> int:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1769,7 +2310,7 @@ def create_purchase(
 
 
 def set_purchase_recipient(purchase_id: int, recipient_id: int, username: Optional[str] = None):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "UPDATE purchases SET recipient_id = ?, recipient_username = COALESCE(recipient_username, ?), notified = 0 WHERE id = ?",
@@ -1780,15 +2321,27 @@ def set_purchase_recipient(purchase_id: int, recipient_id: int, username: Option
 
 
 def mark_purchase_notified(purchase_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
-    cur.execute("UPDATE purchases SET notified = 1 WHERE id = ?", (purchase_id,))
+    cur.execute("UPDATE purchases SET notified = 1 WHERE id = ? AND notified = 0", (purchase_id,))
+    conn.commit()
+    conn.close()
+
+
+def mark_gift_delivered(purchase_id: int, recipient_id: int, username: Optional[str] = None):
+    """set_purchase_recipient + mark_purchase_notified as a single UPDATE."""
+    conn = _connect()
+    cur = conn.cursor()
+    cur.execute(
+        "UPDATE purchases SET recipient_id = ?, recipient_username = COALESCE(recipient_username, ?), notified = 1 WHERE id = ?",
+        (recipient_id, username, purchase_id),
+    )
     conn.commit()
     conn.close()
 
 
 def update_purchase_status(purchase_id: int, status: str):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         "UPDATE purchases SET status = ?, created_at = created_at WHERE id = ?",
@@ -1799,7 +2352,7 @@ def update_purchase_status(purchase_id: int, status: str):
 
 
 def list_pending_purchases(limit: int = 20):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1821,7 +2374,7 @@ def list_pending_purchases(limit: int = 20):
 def pending_gifts_for_user(user_id: int, username: Optional[str]):
     """Return purchases where this user is the intended recipient and not yet notified."""
     uname = (username or "").lstrip("@")
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1843,7 +2396,7 @@ def pending_gifts_for_user(user_id: int, username: Optional[str]):
 
 
 def get_purchase(purchase_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1861,7 +2414,7 @@ def get_purchase(purchase_id: int):
 
 
 def update_purchase_data(purchase_id: int, data: str):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("UPDATE purchases SET data = ? WHERE id = ?", (data, purchase_id))
     conn.commit()
@@ -1871,7 +2424,7 @@ def update_purchase_data(purchase_id: int, data: str):
 def pending_gifts_for_user(user_id: int, username: Optional[str]):
     """Return purchases where this user is the intended recipient and not yet notified."""
     uname = (username or "").lstrip("@")
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1893,7 +2446,7 @@ def pending_gifts_for_user(user_id: int, username: Optional[str]):
 
 
 def upsert_contact(user_id: int, full_name: Optional[str], email: Optional[str], address: Optional[str] = None, size: Optional[str] = None):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1923,7 +2476,7 @@ def upsert_contact(user_id: int, full_name: Optional[str], email: Optional[str],
 
 
 def get_contact(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1947,6 +2500,22 @@ def get_contact(user_id: int):
     return row
 
 
+def _encode_cards(cards) -> bytes:
+    """Cards packed one byte each (see game.pack_cards)."""
+    return game.pack_cards(cards)
+
+
+def _decode_cards(blob) -> list:
+    if not blob:
+        return []
+    if isinstance(blob, bytes):
+        return game.unpack_cards(blob)
+    # Sessions written before the byte encoding: JSON or space-separated text.
+    if blob.startswith("["):
+        return json.loads(blob)
+    return blob.split(" ")
+
+
 def save_blackjack_session(
     user_id: int,
     deck,
@@ -1954,27 +2523,30 @@ def save_blackjack_session(
     dealer_hand,
     bet: int,
     status: str = "active",
+    boost: float = 0.0,
 ) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
-        INSERT INTO blackjack_sessions (user_id, deck, player_hand, dealer_hand, bet, status)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO blackjack_sessions (user_id, deck, player_hand, dealer_hand, bet, status, boost)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         ON CONFLICT(user_id) DO UPDATE SET
             deck = excluded.deck,
             player_hand = excluded.player_hand,
             dealer_hand = excluded.dealer_hand,
             bet = excluded.bet,
-            status = excluded.status
+            status = excluded.status,
+            boost = excluded.boost
         """,
         (
             user_id,
-            json.dumps(deck),
-            json.dumps(player_hand),
-            json.dumps(dealer_hand),
+            _encode_cards(deck),
+            _encode_cards(player_hand),
+            _encode_cards(dealer_hand),
             bet,
             status,
+            boost,
         ),
     )
     conn.commit()
@@ -1983,7 +2555,7 @@ def save_blackjack_session(
 
 def set_blackjack_boost(user_id: int, boost: float):
     """Boost is a fraction, e.g., 0.2 for +20% win bias."""
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
         """
@@ -1998,7 +2570,7 @@ def set_blackjack_boost(user_id: int, boost: float):
 
 
 def get_blackjack_boost(user_id: int) -> float:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("SELECT boost FROM blackjack_boosts WHERE user_id = ?", (user_id,))
     row = cur.fetchone()
@@ -2009,29 +2581,93 @@ def get_blackjack_boost(user_id: int) -> float:
 
 
 def load_blackjack_session(user_id: int):
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute(
-        "SELECT deck, player_hand, dealer_hand, bet, status FROM blackjack_sessions WHERE user_id = ?",
+        "SELECT deck, player_hand, dealer_hand, bet, status, boost FROM blackjack_sessions WHERE user_id = ?",
         (user_id,),
     )
     row = cur.fetchone()
     conn.close()
     if not row:
         return None
-    deck, player_hand, dealer_hand, bet, status = row
+    deck, player_hand, dealer_hand, bet, status, boost = row
     return {
-        "deck": json.loads(deck),
-        "player_hand": json.loads(player_hand),
-        "dealer_hand": json.loads(dealer_hand),
+        "deck": _decode_cards(deck),
+        "player_hand": _decode_cards(player_hand),
+        "dealer_hand": _decode_cards(dealer_hand),
         "bet": bet,
         "status": status,
+        "boost": float(boost or 0.0),
     }
 
 
 def clear_blackjack_session(user_id: int) -> None:
-    conn = sqlite3.connect(config.DB_PATH)
+    conn = _connect()
     cur = conn.cursor()
     cur.execute("DELETE FROM blackjack_sessions WHERE user_id = ?", (user_id,))
     conn.commit()
     conn.close()
+
+
+def start_blackjack_round(user_id: int, bet: int, deck, player_hand, dealer_hand) -> int:
+    """Take the stake, count the game and store the session in one commit; returns the new balance.
+
+    The user's blackjack boost is snapshotted into the session so settling the hand needs no extra read.
+    """
+    boost = get_blackjack_boost(user_id)
+    with transaction():
+        increment_stat(user_id, "games_played")
+        balance = adjust_balance(user_id, -bet)
+        save_blackjack_session(user_id, deck, player_hand, dealer_hand, bet, boost=boost)
+    return balance
+
+
+def finalize_purchase(
+    buyer_id: int,
+    price: int,
+    item_id: int,
+    recipient_id: Optional[int],
+    recipient_username: Optional[str],
+    data: str,
+    contact: Optional[Tuple[Optional[str], ...]] = None,
+) -> Optional[Tuple[int, int]]:
+    """Charge the buyer, save their contact and create the purchase in one commit.
+
+    Returns (purchase_id, new_balance), or None (nothing written) if the balance doesn't cover `price`.
+    """
+    with transaction():
+        balance = charge_purchase(buyer_id, price)
+        if balance is None:
+            return None
+        if contact:
+            upsert_contact(buyer_id, *contact)
+        purchase_id = create_purchase(buyer_id, item_id, recipient_id, recipient_username, data)
+    return purchase_id, balance
+
+
+def charge_purchase(user_id: int, price: int) -> Optional[int]:
+    """Take `price` and count the purchase in one commit; returns the new balance, or None if it doesn't cover it."""
+    ensure_wallet(user_id)
+    with transaction():
+        conn = _connect()
+        row = conn.execute(
+            "UPDATE user_wallets SET balance = balance - ? WHERE user_id = ? AND balance >= ? RETURNING balance",
+            (price, user_id, price),
+        ).fetchone()
+        conn.close()
+        if row is None:
+            return None
+        increment_stat(user_id, "purchases")
+        increment_stat(user_id, "shop_spent", price)
+    return row[0]
+
+
+def finish_blackjack_round(user_id: int, delta: int = 0, stat: Optional[str] = None) -> int:
+    """Apply the round's balance change and stat, and drop the session; returns the new balance."""
+    with transaction():
+        balance = adjust_balance(user_id, delta) if delta else get_balance(user_id)
+        if stat:
+            increment_stat(user_id, stat)
+        clear_blackjack_session(user_id)
+    return balance
@@ -5,10 +5,28 @@ Card = str
 Hand = List[Card]
 
 
+_RANKS = ("A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K")
+_SUITS = ("H", "D", "C", "S")
+_DECK_TEMPLATE: Tuple[Card, ...] = tuple(f"{r}{s}" for r in _RANKS for s in _SUITS)
+
+
+_CARD_INDEX = {card: idx for idx, card in enumerate(_DECK_TEMPLATE)}
+
+_SUIT_ICONS = {"H": "♥", "D": "♦", "C": "♣", "S": "♠"}
+_CARD_LABELS = {card: f"{card[:-1]}{_SUIT_ICONS[card[-1]]}" for card in _DECK_TEMPLATE}
+
+
+def pack_cards(cards: List[Card]) -> bytes:
+    """One byte per card (its index in the template deck), for storage."""
+    return bytes(_CARD_INDEX[card] for card in cards)
+
+
+def unpack_cards(blob: bytes) -> List[Card]:
+    return [_DECK_TEMPLATE[idx] for idx in blob]
+
+
 def build_deck() -> List[Card]:
-    ranks = ["A", "2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K"]
-    suits = ["H", "D", "C", "S"]
-    deck = [f"{r}{s}" for r in ranks for s in suits]
+    deck = list(_DECK_TEMPLATE)
     random.shuffle(deck)
     return deck
 
@@ -19,9 +37,10 @@ def draw_card(deck: List[Card]) -> Card:
 
 def format_card(card: Card) -> str:
     """Return human-friendly card label, e.g., J♦️, 4♥️."""
-    rank, suit = card[:-1], card[-1]
-    suit_icon = {"H": "♥", "D": "♦", "C": "♣", "S": "♠"}.get(suit, "?")
-    return f"{rank}{suit_icon}"
+    label = _CARD_LABELS.get(card)
+    if label is None:
+        label = f"{card[:-1]}{_SUIT_ICONS.get(card[-1], '?')}"
+    return label
 
 
 def hand_value(hand: Hand) -> Tuple[int, bool]:
@@ -60,4 +79,4 @@ def dealer_play(hand: Hand, deck: List[Card]) -> Hand:
 
 
 def format_hand(hand: Hand) -> str:
-    return ", ".join(format_card(c) for c in hand)
+    return ", ".join(map(format_card, hand))
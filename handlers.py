@@ -1,12 +1,16 @@
+import asyncio
 import logging
-import sqlite3
 import json
+from dataclasses import dataclass
 from datetime import date, datetime, timezone, timedelta
+from functools import lru_cache
 import random
-from typing import Optional
+import re
+from typing import NamedTuple, Optional
 import time
 
 from telegram import (
+    InaccessibleMessage,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     InputMediaPhoto,
@@ -25,17 +29,23 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from telegram.error import RetryAfter, TelegramError
 
 import config
 import db
 import game
 from helpers import is_admin, lang_for_user, record_user, split_name, target_gender_for_voter
-from helpers import normalize_city, reverse_geocode_city, looks_like_coord, parse_lat_lon
+from helpers import cached_reverse_geocode, normalize_city
 from keyboards import game_promo_keyboard, language_keyboard, paused_keyboard, start_voting_keyboard
-from translations import LANGUAGE_OPTIONS, t
+from notifier import notifier
+from translations import LANGUAGE_OPTIONS, formatter, t, template
 
 logger = logging.getLogger(__name__)
 
+# Toggleable features, in the order /feature list prints them.
+FEATURE_ORDER = ("finder", "shop", "blackjack", "earn", "referral", "boost", "santa", "fun", "voting")
+FEATURE_NAMES = frozenset(FEATURE_ORDER)
+
 
 def _fmt_santa_number(number: int) -> str:
     """Format Secret Santa numbers as three digits (e.g., 001)."""
@@ -56,34 +66,53 @@ async def send_language_prompt(update_or_query):
     await update_or_query.message.reply_text(prompt, reply_markup=language_keyboard())
 
 
-async def _remove_reply_keyboard(user_id: int, bot) -> None:
-    """Send a blank message with ReplyKeyboardRemove to clear custom keyboards."""
+# Reply keyboard most recently pushed to each chat by _set_reply_keyboard, with
+# the time it was sent. Lets repeated pushes of the same keyboard be skipped.
+# Other code paths also send reply keyboards, so entries expire after a short
+# TTL and are dropped whenever the user sends a message.
+_REPLY_KB_STATE: dict = {}
+_REPLY_KB_TTL = 120.0
+_REMOVE_KB = ReplyKeyboardRemove()
+
+
+async def _set_reply_keyboard(bot, chat_id: int, markup) -> None:
+    """Push a reply keyboard with a blank message unless it is already showing."""
+    now = time.monotonic()
+    last = _REPLY_KB_STATE.get(chat_id)
+    if last is not None and last[0] is markup and now - last[1] < _REPLY_KB_TTL:
+        return
     try:
-        await bot.send_message(
-            chat_id=user_id,
-            text=" ",
-            reply_markup=ReplyKeyboardRemove(),
-            disable_notification=True,
-        )
+        await bot.send_message(chat_id=chat_id, text=" ", reply_markup=markup, disable_notification=True)
     except Exception:
-        pass
+        _REPLY_KB_STATE.pop(chat_id, None)
+        return
+    if len(_REPLY_KB_STATE) > 10_000:
+        _REPLY_KB_STATE.clear()
+    _REPLY_KB_STATE[chat_id] = (markup, now)
+
+
+async def _forget_reply_keyboard(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    if update.effective_chat:
+        _REPLY_KB_STATE.pop(update.effective_chat.id, None)
+
+
+async def _remove_reply_keyboard(user_id: int, bot) -> None:
+    """Send a blank message with ReplyKeyboardRemove to clear custom keyboards."""
+    await _set_reply_keyboard(bot, user_id, _REMOVE_KB)
+
+
+@lru_cache(maxsize=None)
+def _help_reply_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        [[t(lang, "quick_help_btn"), t(lang, "quick_menu_btn")]],
+        resize_keyboard=True,
+        one_time_keyboard=False,
+    )
 
 
 async def _send_help_keyboard(user_id: int, lang: str, bot) -> None:
     """Show quick-help and menu buttons below the input field."""
-    try:
-        await bot.send_message(
-            chat_id=user_id,
-            text=" ",
-            reply_markup=ReplyKeyboardMarkup(
-                [[t(lang, "quick_help_btn"), t(lang, "quick_menu_btn")]],
-                resize_keyboard=True,
-                one_time_keyboard=False,
-            ),
-            disable_notification=True,
-        )
-    except Exception:
-        pass
+    await _set_reply_keyboard(bot, user_id, _help_reply_keyboard(lang))
 
 
 async def send_start_message(update_or_query, lang: str, user_id: int):
@@ -95,7 +124,8 @@ async def send_start_message(update_or_query, lang: str, user_id: int):
         await _remove_reply_keyboard(user_id, bot)
         await _send_help_keyboard(user_id, lang, bot)
     mode = db.get_mode()
-    voting_on = db.is_feature_enabled("voting")
+    flags = db.get_feature_flags(("voting", "santa", "finder", "fun"))
+    voting_on = flags["voting"]
     if mode == "collect":
         text = t(lang, "start_collect")
         rows = [
@@ -106,11 +136,11 @@ async def send_start_message(update_or_query, lang: str, user_id: int):
                 )
             ],
         ]
-        if db.is_feature_enabled("santa"):
+        if flags["santa"]:
             rows.append([InlineKeyboardButton(t(lang, "santa_menu_button"), callback_data="santa:start")])
-        if db.is_feature_enabled("finder"):
+        if flags["finder"]:
             rows.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:start")])
-        if db.is_feature_enabled("fun"):
+        if flags["fun"]:
             rows.append([InlineKeyboardButton(t(lang, "play_game_button"), callback_data="game:menu")])
         if config.TELEGRAM_PROMO_URL:
             rows.append([InlineKeyboardButton(t(lang, "promo_button"), url=config.TELEGRAM_PROMO_URL)])
@@ -121,11 +151,11 @@ async def send_start_message(update_or_query, lang: str, user_id: int):
     elif mode == "disabled":
         text = t(lang, "start_disabled")
         rows = []
-        if db.is_feature_enabled("santa"):
+        if flags["santa"]:
             rows.append([InlineKeyboardButton(t(lang, "santa_menu_button"), callback_data="santa:start")])
-        if db.is_feature_enabled("finder"):
+        if flags["finder"]:
             rows.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:start")])
-        if db.is_feature_enabled("fun"):
+        if flags["fun"]:
             rows.append([InlineKeyboardButton(t(lang, "play_game_button"), callback_data="game:menu")])
         if config.TELEGRAM_PROMO_URL:
             rows.append([InlineKeyboardButton(t(lang, "promo_button"), url=config.TELEGRAM_PROMO_URL)])
@@ -139,18 +169,63 @@ async def send_start_message(update_or_query, lang: str, user_id: int):
 
 
 def clear_santa_state(context) -> None:
-    context.user_data.pop("santa_active", None)
-    context.user_data.pop("santa_name", None)
-    context.user_data.pop("santa_insta", None)
-    context.user_data.pop("santa_existing_number", None)
-    context.user_data.pop("support_waiting", None)
+    _state(context).clear_santa()
+
+
+class ShopContact(NamedTuple):
+    """Contact details collected during a shop/gift flow."""
+
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    address: Optional[str] = None
+    size: Optional[str] = None
+
+
+@dataclass(slots=True)
+class UserState:
+    """Per-user blackjack/shop/Santa flow state, kept as one object in user_data["_state"]."""
+
+    bj_pending: bool = False
+    shop_item: Optional[tuple] = None
+    shop_data: Optional[dict] = None
+    shop_contact: ShopContact = ShopContact()
+    shop_recipient_id: Optional[int] = None
+    shop_recipient_username: Optional[str] = None
+    shop_skip_details: bool = False
+    shop_purchase_id: Optional[int] = None
+    santa_active: bool = False
+    santa_name: Optional[str] = None
+    santa_existing_number: Optional[int] = None
+    support_waiting: bool = False
+
+    def clear_santa(self) -> None:
+        self.santa_active = False
+        self.santa_name = None
+        self.santa_existing_number = None
+        self.support_waiting = False
+
+    def clear_shop(self) -> None:
+        self.shop_item = None
+        self.shop_data = None
+        self.shop_contact = ShopContact()
+        self.shop_recipient_id = None
+        self.shop_recipient_username = None
+        self.shop_skip_details = False
+        self.shop_purchase_id = None
+
+
+def _state(context) -> UserState:
+    state = context.user_data.get("_state")
+    if state is None:
+        state = context.user_data["_state"] = UserState()
+    return state
 
 
 def clear_transient_state(context) -> None:
     if context is None:
         return
     # Clear any pending blackjack bet prompt or Santa flow flags
-    context.user_data.pop("bj_pending", None)
+    _state(context).bj_pending = False
     clear_santa_state(context)
 
 
@@ -503,6 +578,7 @@ async def wipe_profile_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(t(lang, "user_id_must_be_number"))
             return
     db.delete_user_completely(target_id)
+    _forget_seen_user(target_id)
     await update.message.reply_text(t(lang, "profile_wiped", user_id=target_id))
 
 
@@ -594,11 +670,7 @@ async def list_candidates(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     lang = lang_for_user(update.effective_user.id)
 
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id, name, approved FROM candidates ORDER BY id")
-    rows = cur.fetchall()
-    conn.close()
+    rows = db.list_candidates()
 
     if not rows:
         await update.message.reply_text(t(lang, "no_candidates"))
@@ -649,13 +721,12 @@ def user_action_keyboard(uid: int, lang: str) -> InlineKeyboardMarkup:
 
 
 def render_user_profile(uid: int, lang: str):
-    user_row = db.get_user(uid)
-    if not user_row:
+    snapshot = db.get_user_snapshot(uid)
+    if not snapshot:
         return t(lang, "user_not_found", uid=uid), None
+    user_row, balance, gender, stats = snapshot
     user_id, local_id, username, first_name, last_name, lang_code, created, last_seen = user_row
-    stats = db.get_user_stats(uid)
-    balance = db.get_balance(uid)
-    gender = db.get_user_gender(uid) or "—"
+    gender = gender or "—"
     name = " ".join([p for p in [first_name, last_name] if p]) or "—"
     username_display = username if username else "—"
     lines = [
@@ -930,15 +1001,17 @@ async def wipe_phantom_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not context.args or context.args[0].upper() != "CONFIRM":
         await update.message.reply_text(t(lang, "wipe_phantom_confirm"))
         return
-    db.delete_phantom_users()
+    for uid in db.delete_phantom_users():
+        _forget_seen_user(uid)
     config.GUEST_PHANTOM_ID = None
     config.ADMIN_GUEST_MODE = False
     await update.message.reply_text(t(lang, "profile_wiped", user_id="phantom"))
 
 
-def game_menu_markup(lang: str, user_id: int) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=None)
+def _game_menu_keyboard(lang: str, with_checkin: bool) -> InlineKeyboardMarkup:
     buttons = []
-    if db.get_last_checkin(user_id) != date.today().isoformat():
+    if with_checkin:
         buttons.append([InlineKeyboardButton(t(lang, "checkin_button"), callback_data="game:checkin")])
     buttons.append([InlineKeyboardButton(t(lang, "earn_button"), callback_data="game:earn")])
     buttons.append([InlineKeyboardButton(t(lang, "shop_button"), callback_data="game:shop")])
@@ -947,6 +1020,25 @@ def game_menu_markup(lang: str, user_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+_TODAY_CACHE: tuple[str, float] = ("", 0.0)
+
+
+def _today_iso() -> str:
+    """date.today().isoformat(), recomputed only once the local day rolls over."""
+    global _TODAY_CACHE
+    today, expires_at = _TODAY_CACHE
+    if time.time() >= expires_at:
+        current = date.today()
+        tomorrow = datetime.combine(current + timedelta(days=1), datetime.min.time())
+        today = current.isoformat()
+        _TODAY_CACHE = (today, tomorrow.timestamp())
+    return today
+
+
+def game_menu_markup(lang: str, user_id: int) -> InlineKeyboardMarkup:
+    return _game_menu_keyboard(lang, db.get_last_checkin(user_id) != _today_iso())
+
+
 async def send_game_menu(update_or_query) -> None:
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
@@ -964,7 +1056,7 @@ async def send_game_menu(update_or_query) -> None:
 
 async def fun_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not db.is_feature_enabled("fun"):
-        await _respond(update, t(lang_for_user(update.effective_user.id), "feature_disabled"))
+        await _respond_update(update, t(lang_for_user(update.effective_user.id), "feature_disabled"))
         return
     clear_transient_state(context)
     await send_game_menu(update)
@@ -973,40 +1065,86 @@ async def fun_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def support_start(update_or_query, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
-    context.user_data["support_waiting"] = True
+    _state(context).support_waiting = True
     kb = ReplyKeyboardMarkup([[t(lang, "support_cancel")]], resize_keyboard=True, one_time_keyboard=True)
     await _respond(update_or_query, t(lang, "support_prompt"), reply_markup=kb)
 
 
-async def _respond(update_or_query, text: str, reply_markup=None):
+_BACKGROUND_TASKS: set = set()
+
+
+def _spawn(coro) -> asyncio.Task:
+    """Run a coroutine in the background, keeping a reference until it finishes."""
+    task = asyncio.create_task(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+    return task
+
+
+async def _notify_user(bot, chat_id: int, text: str) -> None:
+    """Message another user through the paced outbound queue (direct send if it isn't running)."""
+    if notifier.enqueue(chat_id, text):
+        return
+    try:
+        await bot.send_message(chat_id=chat_id, text=text)
+    except Exception as e:
+        logger.warning("Failed to notify %s: %s", chat_id, e)
+
+
+async def _answer_quietly(query) -> None:
+    try:
+        await query.answer()
+    except Exception:
+        pass
+
+
+async def _respond_update(update: Update, text: str, reply_markup=None, bot=None):
+    """Reply to an Update, preferring a new message over editing."""
+    q = update.callback_query
+    if q:
+        return await _respond_query(q, text, reply_markup=reply_markup, bot=bot)
+    if update.effective_chat and isinstance(reply_markup, (ReplyKeyboardMarkup, ReplyKeyboardRemove)):
+        _REPLY_KB_STATE.pop(update.effective_chat.id, None)
+    if update.message:
+        return await update.message.reply_text(text, reply_markup=reply_markup)
+    if update.effective_user:
+        return await (bot or update.get_bot()).send_message(
+            chat_id=update.effective_user.id, text=text, reply_markup=reply_markup
+        )
+
+
+async def _respond_query(query, text: str, reply_markup=None, bot=None):
+    """Answer a CallbackQuery and reply under its message (or in private chat)."""
+    # The answer only clears the button spinner; don't hold the reply behind it.
+    _spawn(_answer_quietly(query))
+    if query.from_user and isinstance(reply_markup, (ReplyKeyboardMarkup, ReplyKeyboardRemove)):
+        _REPLY_KB_STATE.pop(query.from_user.id, None)
+    if query.message:
+        return await query.message.reply_text(text, reply_markup=reply_markup)
+    if query.from_user:
+        return await (bot or query.get_bot()).send_message(
+            chat_id=query.from_user.id, text=text, reply_markup=reply_markup
+        )
+
+
+async def _respond(update_or_query, text: str, reply_markup=None, bot=None):
     """Reply helper that works for messages or callback queries; prefers sending a new message."""
     if isinstance(update_or_query, Update):
-        if update_or_query.callback_query:
-            q = update_or_query.callback_query
-            try:
-                await q.answer()
-            except Exception:
-                pass
-            if q.message:
-                return await q.message.reply_text(text, reply_markup=reply_markup)
-        if update_or_query.message:
-            return await update_or_query.message.reply_text(text, reply_markup=reply_markup)
-        if update_or_query.effective_user:
-            return await update_or_query.get_bot().send_message(
-                chat_id=update_or_query.effective_user.id, text=text, reply_markup=reply_markup
-            )
-    else:
-        # CallbackQuery passed directly
-        try:
-            await update_or_query.answer()
-        except Exception:
-            pass
-        if update_or_query.message:
-            return await update_or_query.message.reply_text(text, reply_markup=reply_markup)
-        if update_or_query.from_user:
-            return await update_or_query.get_bot().send_message(
-                chat_id=update_or_query.from_user.id, text=text, reply_markup=reply_markup
-            )
+        return await _respond_update(update_or_query, text, reply_markup=reply_markup, bot=bot)
+    return await _respond_query(update_or_query, text, reply_markup=reply_markup, bot=bot)
+
+
+def _editable_text_query(update_or_query):
+    """Return the callback query whose message can take edit_message_text, else None.
+
+    Lets callers pick between editing and sending up front instead of
+    discovering an uneditable message through a failed API call.
+    """
+    query = update_or_query.callback_query if isinstance(update_or_query, Update) else update_or_query
+    msg = getattr(query, "message", None)
+    if msg is None or isinstance(msg, InaccessibleMessage) or msg.text is None:
+        return None
+    return query
 
 
 def ensure_user_context(update_or_query) -> int:
@@ -1014,59 +1152,162 @@ def ensure_user_context(update_or_query) -> int:
     user = update_or_query.effective_user if isinstance(update_or_query, Update) else update_or_query.from_user
     if not user:
         return 0
+    identity = (user.username, user.first_name, user.last_name, user.language_code)
+    if user.id == config.ADMIN_ID and not config.ADMIN_GUEST_MODE and user.id in _seen_users:
+        # Admin identity is stable; skip the upsert bookkeeping but keep last_seen and activity counted.
+        if _upsert_event is not None:
+            _queue_user_touch(user.id, identity)
+        db.increment_stat(user.id, "commands_used")
+        return user.id
     mapped_id = user.id
     if user.id == config.ADMIN_ID and config.ADMIN_GUEST_MODE and config.GUEST_PHANTOM_ID:
         mapped_id = config.GUEST_PHANTOM_ID
-    db.upsert_user_basic(
-        user_id=mapped_id,
-        username=user.username,
-        first_name=user.first_name,
-        last_name=user.last_name,
-        language_code=user.language_code,
-    )
-    if not db.get_user_language(mapped_id) and user.language_code in LANGUAGE_OPTIONS:
-        db.set_user_language(mapped_id, user.language_code)
+    if mapped_id in _seen_users and _upsert_event is not None:
+        # Known user: coalesce the identity/last_seen refresh into the background writer.
+        _queue_user_touch(mapped_id, identity)
+    else:
+        db.upsert_user_basic(
+            user_id=mapped_id,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            language_code=user.language_code,
+            seed_language=True,
+        )
+        _seen_users[mapped_id] = (identity, time.monotonic())
     db.increment_stat(mapped_id, "commands_used")
     return mapped_id
 
 
+# ---------- Write-behind user upserts ----------
+
+# user_id -> (last identity tuple written or queued, monotonic time of that write).
+_seen_users: dict = {}
+# Unchanged identities still refresh users.last_seen, at most this often (seconds).
+_LAST_SEEN_TOUCH_INTERVAL = 300.0
+_pending_upserts: dict = {}
+_upsert_event: Optional[asyncio.Event] = None
+_upsert_task: Optional[asyncio.Task] = None
+
+
+def _queue_user_touch(user_id: int, identity: tuple) -> None:
+    """Queue a write-behind refresh when the identity changed or last_seen is due."""
+    now = time.monotonic()
+    last_identity, touched_at = _seen_users[user_id]
+    if last_identity == identity and now - touched_at < _LAST_SEEN_TOUCH_INTERVAL:
+        return
+    _seen_users[user_id] = (identity, now)
+    _pending_upserts[user_id] = identity
+    _upsert_event.set()
+
+
+def _forget_seen_user(user_id: int) -> None:
+    """Drop a deleted user so their next update re-creates the users row."""
+    _seen_users.pop(user_id, None)
+    _pending_upserts.pop(user_id, None)
+
+
+def _flush_pending_upserts() -> None:
+    if not _pending_upserts:
+        return
+    rows = [(uid, *identity) for uid, identity in _pending_upserts.items()]
+    _pending_upserts.clear()
+    try:
+        db.touch_users_basic(rows)
+    except Exception as e:
+        logger.warning("Failed to flush %s user upserts: %s", len(rows), e)
+
+
+async def _user_upsert_writer() -> None:
+    while True:
+        await _upsert_event.wait()
+        await asyncio.sleep(0.5)
+        _upsert_event.clear()
+        _flush_pending_upserts()
+
+
+# The bot's own @username, read once at startup for invite/referral links.
+_BOT_USERNAME: Optional[str] = None
+
+
+async def on_startup(application: Application) -> None:
+    global _upsert_event, _upsert_task, _BOT_USERNAME
+    _BOT_USERNAME = application.bot.username
+    await set_persistent_commands(application)
+    if db.user_exists(config.ADMIN_ID):
+        _seen_users[config.ADMIN_ID] = (None, 0.0)
+    db.load_admin_users()
+    _upsert_event = asyncio.Event()
+    _upsert_task = asyncio.create_task(_user_upsert_writer())
+    notifier.start(application.bot)
+
+
+async def on_stop(application: Application) -> None:
+    # Drain queued notices while the bot's HTTP client is still open;
+    # post_shutdown runs after Application.shutdown() has closed it.
+    await notifier.stop()
+
+
+async def on_shutdown(application: Application) -> None:
+    global _upsert_event
+    _upsert_event = None
+    if _upsert_task:
+        _upsert_task.cancel()
+    _flush_pending_upserts()
+
+
 # ---------- Tinder-style profiles ----------
 
 
+_INTEREST_LABEL_KEYS = {"Male": "tinder_interest_male", "Female": "tinder_interest_female"}
+# Matched against the first word of the lowercased reply (emoji prefixes skipped);
+# covers the keyboard labels in every language.
+_FEMALE_TEXT_RE = re.compile(r"[\W_]*(?:ж|f|wom|girl)")
+_MALE_TEXT_RE = re.compile(r"[\W_]*(?:м|ч|m|boy)")
+
+
+def classify_gender_text(text: str) -> Optional[str]:
+    """Map a free-text gender reply to "Male"/"Female", or None if unrecognised."""
+    low = text.lower()
+    if _FEMALE_TEXT_RE.match(low):
+        return "Female"
+    if _MALE_TEXT_RE.match(low):
+        return "Male"
+    return None
+
+
+@lru_cache(maxsize=64)
 def interest_label(value: str, lang: str) -> str:
-    if value == "Male":
-        return t(lang, "tinder_interest_male")
-    if value == "Female":
-        return t(lang, "tinder_interest_female")
-    return t(lang, "tinder_interest_any")
+    return t(lang, _INTEREST_LABEL_KEYS.get(value, "tinder_interest_any"))
+
+
+_COORD_RE = re.compile(r"^\s*(?:geo:.*|-?\d{1,3}(?:\.\d+)?\s*[,;: ]\s*-?\d{1,3}(?:\.\d+)?)\s*$", re.IGNORECASE)
+_HAS_ALPHA_RE = re.compile(r"[^\W\d_]")
+_GEO_RE = re.compile(r"^\s*(geo:)?\s*(-?\d+(?:\.\d+)?)\s*[,;: ]\s*(-?\d+(?:\.\d+)?)\s*$", re.IGNORECASE)
 
 
 def render_profile_text(profile_row, lang: str, show_interest: bool = False) -> str:
     user_id, age, gender, interest, city, normalized_city, lat, lon, name, bio, active, *_ = profile_row
 
     def city_label(city_val, lat_val, lon_val):
-        if city_val and any(ch.isalpha() for ch in city_val):
+        city_text = city_val if isinstance(city_val, str) else str(city_val or "")
+        m = _GEO_RE.match(city_text)
+        if m:
+            # "geo:" strings override stored coords; bare pairs only fill gaps.
+            if m.group(1) or lat_val is None or lon_val is None:
+                lat_val, lon_val = float(m.group(2)), float(m.group(3))
+        elif city_text and _HAS_ALPHA_RE.search(city_text):
             return city_val
-        if city_val and isinstance(city_val, str) and city_val.startswith("geo:"):
-            parts = city_val.split(":")
-            if len(parts) >= 3:
-                try:
-                    lat_val = float(parts[1])
-                    lon_val = float(parts[2])
-                except Exception:
-                    pass
-        if (lat_val is None or lon_val is None) and city_val and looks_like_coord(str(city_val)):
-            parsed_lat, parsed_lon = parse_lat_lon(str(city_val))
-            if parsed_lat is not None and parsed_lon is not None:
-                lat_val, lon_val = parsed_lat, parsed_lon
         if lat_val is not None and lon_val is not None:
-            label, _ = reverse_geocode_city(lat_val, lon_val)
+            # Runs on the event loop: never wait on the Nominatim rate limit here.
+            label, _ = cached_reverse_geocode(lat_val, lon_val, block=False)
             if label:
                 return label
         return city_val or "—"
 
+    orig_name, orig_bio = name, bio
     # Fix name for legacy records that stored coords/empty
-    if not name or looks_like_coord(str(name)):
+    if not name or _COORD_RE.match(str(name)):
         basic = db.get_user_basic(user_id)
         if basic:
             username, first_name, last_name = basic
@@ -1077,35 +1318,30 @@ def render_profile_text(profile_row, lang: str, show_interest: bool = False) ->
             else:
                 name = "—"
     # Hide bad bio coords
-    if bio and looks_like_coord(str(bio)):
+    if bio and _COORD_RE.match(str(bio)):
         bio = "—"
 
     city_display = city_label(city, lat, lon)
+    city_changed = city_display != (city or "—")
 
     # Persist repairs if something changed
-    repaired = False
-    if city_display != (city or "—"):
-        city = city_display
-        normalized_city = normalize_city(city_display)
-        repaired = True
-    if not name or looks_like_coord(str(name)):
-        repaired = True
-    if bio and looks_like_coord(str(bio)):
-        repaired = True
-    if repaired:
+    if city_changed or name != orig_name or bio != orig_bio:
+        if city_changed or not normalized_city:
+            normalized_city = normalize_city(city_display)
         db.upsert_profile(
             user_id,
             age,
             gender,
             interest,
-            city,
+            city_display if city_changed else city,
             lat,
             lon,
             name,
             bio,
-            normalized_city or normalize_city(city_display),
+            normalized_city,
         )
 
+    interest_text = interest_label(interest, lang)
     base = t(
         lang,
         "tinder_profile_line",
@@ -1113,11 +1349,11 @@ def render_profile_text(profile_row, lang: str, show_interest: bool = False) ->
         age=age,
         gender=gender,
         city=city_display,
-        interest=interest_label(interest, lang),
+        interest=interest_text,
         bio=bio or "—",
     )
     if show_interest:
-        base += "\n" + t(lang, "tinder_interest_label", interest=interest_label(interest, lang))
+        base += "\n" + t(lang, "tinder_interest_label", interest=interest_text)
     return base
 
 
@@ -1127,10 +1363,48 @@ def format_username(username, fallback_id):
     return username if username.startswith("@") else f"@{username}"
 
 
+_USERNAME_TTL = 3600.0
+_USERNAME_CACHE: dict = {}
+
+
+async def resolve_username(bot, user_id: int) -> str:
+    """@username (or the id) for a user, via cache, the users table, then get_chat."""
+    now = time.monotonic()
+    hit = _USERNAME_CACHE.get(user_id)
+    if hit is not None and hit[1] > now:
+        return hit[0]
+    basic = db.get_user_basic(user_id)
+    username = basic[0] if basic else None
+    if not username:
+        try:
+            chat = await bot.get_chat(user_id)
+            username = chat.username
+        except Exception:
+            username = None
+    label = format_username(username, user_id)
+    if len(_USERNAME_CACHE) > 10_000:
+        _USERNAME_CACHE.clear()
+    _USERNAME_CACHE[user_id] = (label, now + _USERNAME_TTL)
+    return label
+
+
+async def _announce_match(bot, message, lang: str, user_id: int, my_username: Optional[str], target_id: int) -> None:
+    """Tell both sides about a mutual like; the partner's notice and the username lookup run together."""
+    target_lang = lang_for_user(target_id)
+    me_username = format_username(my_username, user_id)
+    username, _ = await asyncio.gather(
+        resolve_username(bot, target_id),
+        _notify_user(bot, target_id, t(target_lang, "tinder_match", username=me_username)),
+    )
+    await message.reply_text(t(lang, "tinder_match", username=username))
+
+
 # ----- Time helpers -----
 MT_TZ = timezone(timedelta(hours=-7))
+_MT_FMT = "%Y-%m-%d %H:%M MT"
 
 
+@lru_cache(maxsize=4096)
 def format_mt(ts: str) -> str:
     """Format ISO timestamp string into Mountain Time readable label."""
     if not ts:
@@ -1139,49 +1413,109 @@ def format_mt(ts: str) -> str:
         dt = datetime.fromisoformat(ts)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(MT_TZ).strftime("%Y-%m-%d %H:%M MT")
+        return dt.astimezone(MT_TZ).strftime(_MT_FMT)
     except Exception:
         return ts
 
 
-async def send_own_profile(update_or_query, user_id: int, lang: str):
-    profile = db.get_profile(user_id)
+@lru_cache(maxsize=None)
+def _own_profile_keyboard(lang: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [InlineKeyboardButton(t(lang, "btn_browse"), callback_data="tinder:browse")],
+            [InlineKeyboardButton(t(lang, "btn_edit"), callback_data="tinder:edit")],
+            [InlineKeyboardButton(t(lang, "back_main_menu"), callback_data="game:home")],
+        ]
+    )
+
+
+async def send_own_profile(update_or_query, user_id: int, lang: str, profile=None):
+    if profile is None:
+        profile = db.get_profile(user_id)
     if not profile:
         await _respond(update_or_query, t(lang, "tinder_profile_needed"))
         return False
     media = db.list_profile_media(user_id)
     text = render_profile_text(profile, lang, show_interest=True)
-    buttons = [
-        [InlineKeyboardButton(t(lang, "btn_browse"), callback_data="tinder:browse")],
-        [InlineKeyboardButton(t(lang, "btn_edit"), callback_data="tinder:edit")],
-        [InlineKeyboardButton(t(lang, "back_main_menu"), callback_data="game:home")],
-    ]
+    kb = _own_profile_keyboard(lang)
     if media:
         fid, kind = media[0]
         try:
             if isinstance(update_or_query, Update) and update_or_query.message:
                 if kind == "video":
-                    await update_or_query.message.reply_video(video=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+                    await update_or_query.message.reply_video(video=fid, caption=text, reply_markup=kb)
                 else:
-                    await update_or_query.message.reply_photo(photo=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+                    await update_or_query.message.reply_photo(photo=fid, caption=text, reply_markup=kb)
             else:
                 bot = update_or_query.get_bot()
                 if kind == "video":
-                    await bot.send_video(chat_id=user_id, video=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+                    await bot.send_video(chat_id=user_id, video=fid, caption=text, reply_markup=kb)
                 else:
-                    await bot.send_photo(chat_id=user_id, photo=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+                    await bot.send_photo(chat_id=user_id, photo=fid, caption=text, reply_markup=kb)
         except Exception:
-            await _respond(update_or_query, text, reply_markup=InlineKeyboardMarkup(buttons))
+            await _respond(update_or_query, text, reply_markup=kb)
     else:
-        await _respond(update_or_query, text, reply_markup=InlineKeyboardMarkup(buttons))
+        await _respond(update_or_query, text, reply_markup=kb)
     return True
 
 
-async def send_admin_profile(update_or_query, profile_row, lang: str):
+@lru_cache(maxsize=256)
+def _admin_profile_keyboard(uid: int, active: bool) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton("⬅️", callback_data=f"tadmin:{uid}:prev"),
+                InlineKeyboardButton("✏️", callback_data=f"tadmineditmenu:{uid}"),
+                InlineKeyboardButton("🙈" if active else "👁️", callback_data=f"tadmin:{uid}:toggle"),
+                InlineKeyboardButton("➡️", callback_data=f"tadmin:{uid}:next"),
+            ]
+        ]
+    )
+
+
+# Admin review carousel: the profile after `current_uid` is loaded while the
+# current card is being sent, so the next "➡️" tap skips the DB round-trips.
+# current profile id -> (db.profiles_version() at load time, (next row, media)).
+# Served only while no profile or media write has happened since.
+_ADMIN_NEXT_PREFETCH: dict[int, tuple] = {}
+
+
+def _load_admin_next(current_uid: int):
+    row = db.get_adjacent_profile(current_uid, "next")
+    if not row:
+        return None
+    return row, db.list_profile_media(row[0])
+
+
+async def _prefetch_admin_next(current_uid: int) -> None:
+    version = db.profiles_version()
+    try:
+        loaded = await asyncio.to_thread(_load_admin_next, current_uid)
+    except Exception:
+        return
+    if len(_ADMIN_NEXT_PREFETCH) > 64:
+        _ADMIN_NEXT_PREFETCH.clear()
+    if loaded:
+        _ADMIN_NEXT_PREFETCH[current_uid] = (version, loaded)
+
+
+async def show_admin_profile(update_or_query, profile_row, lang: str, media=None):
+    """Send an admin profile card and prefetch the one after it concurrently."""
+    if not profile_row:
+        return
+    await asyncio.gather(
+        send_admin_profile(update_or_query, profile_row, lang, media),
+        _prefetch_admin_next(profile_row[0]),
+    )
+
+
+async def send_admin_profile(update_or_query, profile_row, lang: str, media=None):
     if not profile_row:
         return
     uid, age, gender, interest, city, norm_city, lat, lon, name, bio, active, *_ = profile_row
-    media = db.list_profile_media(uid)
+    if media is None:
+        media = db.list_profile_media(uid)
+    bot = update_or_query.get_bot()
     status = "✅ Visible" if active else "🙈 Hidden"
     caption = t(
         lang,
@@ -1195,16 +1529,7 @@ async def send_admin_profile(update_or_query, profile_row, lang: str):
         bio=bio or "—",
     )
     caption = f"{caption}\n{status}"
-    kb = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("⬅️", callback_data=f"tadmin:{uid}:prev"),
-                InlineKeyboardButton("✏️", callback_data=f"tadmineditmenu:{uid}"),
-                InlineKeyboardButton("🙈" if active else "👁️", callback_data=f"tadmin:{uid}:toggle"),
-                InlineKeyboardButton("➡️", callback_data=f"tadmin:{uid}:next"),
-            ]
-        ]
-    )
+    kb = _admin_profile_keyboard(uid, bool(active))
     chat_id = (
         update_or_query.effective_chat.id
         if isinstance(update_or_query, Update)
@@ -1227,41 +1552,40 @@ async def send_admin_profile(update_or_query, profile_row, lang: str):
                 return
         except Exception:
             pass
-        bot = update_or_query.get_bot() if not isinstance(update_or_query, Update) else update_or_query.get_bot()
         if kind == "video":
             await bot.send_video(chat_id=chat_id, video=fid, caption=caption, reply_markup=kb)
         else:
             await bot.send_photo(chat_id=chat_id, photo=fid, caption=caption, reply_markup=kb)
     else:
-        # No media; try to edit caption if message exists, else send text
-        try:
-            if hasattr(update_or_query, "edit_message_caption"):
+        # No media; edit the caption if the card is already a media message, else send text
+        msg = getattr(update_or_query, "message", None)
+        if msg and (getattr(msg, "photo", None) or getattr(msg, "video", None)):
+            try:
                 await update_or_query.edit_message_caption(caption=caption, reply_markup=kb)
                 return
-        except Exception:
-            pass
-        await _respond(update_or_query, caption, reply_markup=kb)
+            except Exception:
+                pass
+        await _respond(update_or_query, caption, reply_markup=kb, bot=bot)
+
+
+_ADMIN_EDIT_LAYOUT = (
+    (("🎂", "age"), ("🚻", "gender"), ("🧭", "interest")),
+    (("📍", "city"), ("📝", "name"), ("✨", "bio")),
+)
+
+
+@lru_cache(maxsize=256)
+def _admin_edit_keyboard(target_id: int) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(label, callback_data=f"tadminedit:{target_id}:{field}") for label, field in row]
+        for row in _ADMIN_EDIT_LAYOUT
+    ]
+    rows.append([InlineKeyboardButton("⬅️", callback_data=f"tadmin:{target_id}:show")])
+    return InlineKeyboardMarkup(rows)
 
 
 async def admin_edit_menu(update_or_query, target_id: int, lang: str):
-    kb = InlineKeyboardMarkup(
-        [
-            [
-                InlineKeyboardButton("🎂", callback_data=f"tadminedit:{target_id}:age"),
-                InlineKeyboardButton("🚻", callback_data=f"tadminedit:{target_id}:gender"),
-                InlineKeyboardButton("🧭", callback_data=f"tadminedit:{target_id}:interest"),
-            ],
-            [
-                InlineKeyboardButton("📍", callback_data=f"tadminedit:{target_id}:city"),
-                InlineKeyboardButton("📝", callback_data=f"tadminedit:{target_id}:name"),
-                InlineKeyboardButton("✨", callback_data=f"tadminedit:{target_id}:bio"),
-            ],
-            [
-                InlineKeyboardButton("⬅️", callback_data=f"tadmin:{target_id}:show"),
-            ],
-        ]
-    )
-    await _respond(update_or_query, t(lang, "tinder_edit_prompt"), reply_markup=kb)
+    await _respond(update_or_query, t(lang, "tinder_edit_prompt"), reply_markup=_admin_edit_keyboard(target_id))
 
 
 async def tinder_admin_review(update_or_query, context: ContextTypes.DEFAULT_TYPE):
@@ -1275,7 +1599,7 @@ async def tinder_admin_review(update_or_query, context: ContextTypes.DEFAULT_TYP
         return
     uid, age, gender, interest, city, lat, lon, norm_city, name, bio, active = rows[0]
     row = db.get_profile(uid)
-    await send_admin_profile(update_or_query, row, lang)
+    await show_admin_profile(update_or_query, row, lang)
 
 
 async def admin_edit_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1293,7 +1617,7 @@ async def admin_edit_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not profile:
         await update.message.reply_text(t(lang, "tinder_admin_no_profiles"))
         return ConversationHandler.END
-    _, age, gender, interest, city, norm_city, lat, lon, name, bio, active, *_ = profile
+    _, age, gender, interest, city, norm_city, lat, lon, name, bio, active, *timestamps = profile
 
     try:
         if field == "age":
@@ -1322,11 +1646,12 @@ async def admin_edit_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass
 
-    db.upsert_profile(target_id, age, gender, interest, city, lat, lon, name, bio, norm_city or normalize_city(city or ""))
+    norm_city = norm_city or normalize_city(city or "")
+    db.upsert_profile(target_id, age, gender, interest, city, lat, lon, name, bio, norm_city)
     await update.message.reply_text(t(lang, "tinder_saved"))
     context.user_data.pop("admin_edit_target", None)
     context.user_data.pop("admin_edit_field", None)
-    updated = db.get_profile(target_id)
+    updated = (target_id, age, gender, interest, city, norm_city, lat, lon, name, bio, active, *timestamps)
     await send_admin_profile(update, updated, lang)
     return ConversationHandler.END
 
@@ -1337,11 +1662,27 @@ async def tinder_start_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     lang = lang_for_user(user_id)
     profile = db.get_profile(user_id)
     if profile:
-        await send_own_profile(update, user_id, lang)
+        await send_own_profile(update, user_id, lang, profile)
         return ConversationHandler.END
     return await start_tinder_flow(update, context)
 
 
+class Profile(NamedTuple):
+    """Leading columns of a tinder_profiles row as returned by db.get_profile."""
+
+    user_id: int
+    age: Optional[int]
+    gender: Optional[str]
+    interest: Optional[str]
+    city: Optional[str]
+    norm_city: Optional[str]
+    lat: Optional[float]
+    lon: Optional[float]
+    name: Optional[str]
+    bio: Optional[str]
+    active: int = 1
+
+
 def load_profile_into_context(user_id: int, context: ContextTypes.DEFAULT_TYPE):
     profile = None
     if context.user_data.get("edit_for_submit") and context.user_data.get("contest_profile"):
@@ -1350,16 +1691,18 @@ def load_profile_into_context(user_id: int, context: ContextTypes.DEFAULT_TYPE):
         profile = db.get_profile(user_id)
     if not profile:
         return
-    _, age, gender, interest, city, normalized_city, lat, lon, name, bio, *_ = profile
-    context.user_data["tinder_age"] = age
-    context.user_data["tinder_gender"] = gender
-    context.user_data["tinder_interest"] = interest
-    context.user_data["tinder_city"] = city
-    context.user_data["tinder_normalized_city"] = normalized_city
-    context.user_data["tinder_lat"] = lat
-    context.user_data["tinder_lon"] = lon
-    context.user_data["tinder_name"] = name
-    context.user_data["tinder_bio"] = bio
+    p = Profile(*profile[:11])
+    context.user_data.update(
+        tinder_age=p.age,
+        tinder_gender=p.gender,
+        tinder_interest=p.interest,
+        tinder_city=p.city,
+        tinder_normalized_city=p.norm_city,
+        tinder_lat=p.lat,
+        tinder_lon=p.lon,
+        tinder_name=p.name,
+        tinder_bio=p.bio,
+    )
 
 
 def save_profile_from_context(user_id: int, context: ContextTypes.DEFAULT_TYPE):
@@ -1368,43 +1711,29 @@ def save_profile_from_context(user_id: int, context: ContextTypes.DEFAULT_TYPE):
         profile = context.user_data.get("contest_profile")
     else:
         profile = db.get_profile(user_id)
-    existing = {
-        "age": profile[1] if profile else None,
-        "gender": profile[2] if profile else None,
-        "interest": profile[3] if profile else None,
-        "city": profile[4] if profile else None,
-        "norm_city": profile[5] if profile else None,
-        "lat": profile[6] if profile else None,
-        "lon": profile[7] if profile else None,
-        "name": profile[8] if profile else None,
-        "bio": profile[9] if profile else None,
-    }
-    age = context.user_data.get("tinder_age") or existing.get("age")
-    gender = context.user_data.get("tinder_gender") or existing.get("gender")
-    interest = context.user_data.get("tinder_interest") or existing.get("interest")
-    city = context.user_data.get("tinder_city") or existing.get("city")
-    norm_city = context.user_data.get("tinder_normalized_city") or existing.get("norm_city") or normalize_city(city or "")
-    lat = context.user_data.get("tinder_lat") if context.user_data.get("tinder_lat") is not None else existing.get("lat")
-    lon = context.user_data.get("tinder_lon") if context.user_data.get("tinder_lon") is not None else existing.get("lon")
-    name = context.user_data.get("tinder_name") or existing.get("name")
-    bio = context.user_data.get("tinder_bio") or existing.get("bio")
+    current = Profile(*profile[:11]) if profile else Profile(user_id, *[None] * 9)
+    data = context.user_data
+    lat = data.get("tinder_lat")
+    lon = data.get("tinder_lon")
+    p = current._replace(
+        age=data.get("tinder_age") or current.age,
+        gender=data.get("tinder_gender") or current.gender,
+        interest=data.get("tinder_interest") or current.interest,
+        city=data.get("tinder_city") or current.city,
+        lat=current.lat if lat is None else lat,
+        lon=current.lon if lon is None else lon,
+        name=data.get("tinder_name") or current.name,
+        bio=data.get("tinder_bio") or current.bio,
+        active=1,  # upsert_profile always re-activates, so a hidden profile never compares equal
+    )
+    p = p._replace(norm_city=data.get("tinder_normalized_city") or p.norm_city or normalize_city(p.city or ""))
     # If editing for submit, store in contest_profile draft only
-    if context.user_data.get("edit_for_submit"):
-        context.user_data["contest_profile"] = (
-            user_id,
-            age,
-            gender,
-            interest,
-            city,
-            norm_city,
-            lat,
-            lon,
-            name,
-            bio,
-            1,
-        )
+    if data.get("edit_for_submit"):
+        data["contest_profile"] = p._replace(user_id=user_id)
         return
-    db.upsert_profile(user_id, age, gender, interest, city, lat, lon, name, bio, norm_city)
+    if profile and p == current:
+        return
+    db.upsert_profile(user_id, p.age, p.gender, p.interest, p.city, p.lat, p.lon, p.name, p.bio, p.norm_city)
 
 
 async def myprofile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1414,7 +1743,7 @@ async def myprofile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not profile:
         return await start_tinder_flow(update, context)
     # Reuse the standard sender so photo/video is included
-    await send_own_profile(update, user_id, lang)
+    await send_own_profile(update, user_id, lang, profile)
 
 
 async def start_tinder_flow(update_or_query, context: ContextTypes.DEFAULT_TYPE):
@@ -1439,15 +1768,43 @@ async def tinder_age(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(t(lang, "age_invalid"))
         return config.TINDER_AGE
     context.user_data["tinder_age"] = age
-    keyboard = ReplyKeyboardMarkup(
+    await update.message.reply_text(t(lang, "tinder_gender_prompt"), reply_markup=_gender_reply_keyboard(lang))
+    return config.TINDER_GENDER
+
+
+@lru_cache(maxsize=None)
+def _gender_reply_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        [[f"👦 {t(lang, 'gender_male')}", f"👧 {t(lang, 'gender_female')}"]],
+        resize_keyboard=True,
+        one_time_keyboard=True,
+    )
+
+
+@lru_cache(maxsize=None)
+def _interest_reply_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
         [
-            [f"👦 {t(lang, 'gender_male')}", f"👧 {t(lang, 'gender_female')}"],
+            [t(lang, "tinder_interest_male"), t(lang, "tinder_interest_female")],
+            [t(lang, "tinder_interest_any")],
         ],
         resize_keyboard=True,
         one_time_keyboard=True,
     )
-    await update.message.reply_text(t(lang, "tinder_gender_prompt"), reply_markup=keyboard)
-    return config.TINDER_GENDER
+
+
+@lru_cache(maxsize=None)
+def _done_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup([[t(lang, "tinder_done_button")]], resize_keyboard=True, one_time_keyboard=True)
+
+
+async def _maybe_commit_edit(update_or_query, context: ContextTypes.DEFAULT_TYPE, user_id: int, lang: str) -> Optional[int]:
+    """In single-field edit mode, save the profile and return to the edit menu; else None."""
+    if not context.user_data.pop("tinder_edit_mode", False):
+        return None
+    save_profile_from_context(user_id, context)
+    await update_or_query.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
+    return await tinder_edit_menu(update_or_query, context)
 
 
 async def tinder_gender_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -1457,20 +1814,11 @@ async def tinder_gender_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     lang = lang_for_user(user_id)
     _, gender_value = query.data.split(":")
     context.user_data["tinder_gender"] = gender_value
-    keyboard = ReplyKeyboardMarkup(
-        [
-            [t(lang, "tinder_interest_male"), t(lang, "tinder_interest_female")],
-            [t(lang, "tinder_interest_any")],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True,
-    )
+    next_state = await _maybe_commit_edit(query, context, user_id, lang)
+    if next_state is not None:
+        return next_state
+    keyboard = _interest_reply_keyboard(lang)
     await query.message.reply_text(t(lang, "tinder_interest_prompt"), reply_markup=keyboard)
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await query.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(query, context)
     return config.TINDER_INTEREST
 
 
@@ -1484,11 +1832,9 @@ async def tinder_interest_cb(update: Update, context: ContextTypes.DEFAULT_TYPE)
     existing_profile = db.get_profile(user_id)
     last_city = context.user_data.get("tinder_city") or (existing_profile[4] if existing_profile else None)
     context.user_data["tinder_last_city_option"] = last_city
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await query.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(query, context)
+    next_state = await _maybe_commit_edit(query, context, user_id, lang)
+    if next_state is not None:
+        return next_state
     buttons = []
     if last_city:
         buttons.append([t(lang, "tinder_city_button_last", city=last_city)])
@@ -1501,56 +1847,30 @@ async def tinder_interest_cb(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def tinder_gender_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    text = update.message.text.lower()
-    if "м" in text or "male" in text or "man" in text or "ч" in text:
-        gender_value = "Male"
-    elif "f" in text or "жен" in text or "female" in text or "girl" in text or "ж" in text:
-        gender_value = "Female"
-    else:
+    gender_value = classify_gender_text(update.message.text)
+    if not gender_value:
         await update.message.reply_text(t(lang, "gender_invalid_choice"))
         return config.TINDER_GENDER
     context.user_data["tinder_gender"] = gender_value
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
-    keyboard = ReplyKeyboardMarkup(
-        [
-            [t(lang, "tinder_interest_male"), t(lang, "tinder_interest_female")],
-            [t(lang, "tinder_interest_any")],
-        ],
-        resize_keyboard=True,
-        one_time_keyboard=True,
-    )
+    next_state = await _maybe_commit_edit(update, context, user_id, lang)
+    if next_state is not None:
+        return next_state
+    keyboard = _interest_reply_keyboard(lang)
     await update.message.reply_text(t(lang, "tinder_interest_prompt"), reply_markup=keyboard)
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
     return config.TINDER_INTEREST
 
 
 async def tinder_interest_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    text = update.message.text.lower()
-    if "муж" in text or "man" in text or "мужчины" in text:
-        interest_value = "Male"
-    elif "жен" in text or "girl" in text or "women" in text or "female" in text:
-        interest_value = "Female"
-    else:
-        interest_value = "Any"
+    interest_value = classify_gender_text(update.message.text) or "Any"
     context.user_data["tinder_interest"] = interest_value
     existing_profile = db.get_profile(user_id)
     last_city = context.user_data.get("tinder_city") or (existing_profile[4] if existing_profile else None)
     context.user_data["tinder_last_city_option"] = last_city
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
+    next_state = await _maybe_commit_edit(update, context, user_id, lang)
+    if next_state is not None:
+        return next_state
     buttons = []
     if last_city:
         buttons.append([t(lang, "tinder_city_button_last", city=last_city)])
@@ -1568,7 +1888,7 @@ async def tinder_city(update: Update, context: ContextTypes.DEFAULT_TYPE):
         lon = update.message.location.longitude
         context.user_data["tinder_lat"] = lat
         context.user_data["tinder_lon"] = lon
-        city_label, norm_label = reverse_geocode_city(lat, lon)
+        city_label, norm_label = await asyncio.to_thread(cached_reverse_geocode, lat, lon)
         context.user_data["tinder_city"] = city_label
         context.user_data["tinder_normalized_city"] = norm_label
     else:
@@ -1582,11 +1902,9 @@ async def tinder_city(update: Update, context: ContextTypes.DEFAULT_TYPE):
             context.user_data["tinder_normalized_city"] = normalize_city(text)
         context.user_data["tinder_lat"] = None
         context.user_data["tinder_lon"] = None
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
+    next_state = await _maybe_commit_edit(update, context, user_id, lang)
+    if next_state is not None:
+        return next_state
     await update.message.reply_text(t(lang, "tinder_name_prompt"), reply_markup=ReplyKeyboardRemove())
     return config.TINDER_NAME
 
@@ -1595,11 +1913,9 @@ async def tinder_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     context.user_data["tinder_name"] = update.message.text.strip()
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
+    next_state = await _maybe_commit_edit(update, context, user_id, lang)
+    if next_state is not None:
+        return next_state
     await update.message.reply_text(t(lang, "tinder_bio_prompt"))
     return config.TINDER_BIO
 
@@ -1608,24 +1924,29 @@ async def tinder_bio(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     context.user_data["tinder_bio"] = update.message.text.strip()
-    if context.user_data.get("tinder_edit_mode"):
-        save_profile_from_context(user_id, context)
-        context.user_data["tinder_edit_mode"] = False
-        await update.message.reply_text(t(lang, "tinder_saved"), reply_markup=ReplyKeyboardRemove())
-        return await tinder_edit_menu(update, context)
+    next_state = await _maybe_commit_edit(update, context, user_id, lang)
+    if next_state is not None:
+        return next_state
     await update.message.reply_text(t(lang, "tinder_media_prompt"))
     return config.TINDER_MEDIA
 
 
 def _store_media(context, file_id: str, kind: str):
-    media = context.user_data.get("tinder_media", [])
+    media = context.user_data.setdefault("tinder_media", [])
     if len(media) >= 3:
         return False
     media.append((file_id, kind))
-    context.user_data["tinder_media"] = media
     return True
 
 
+_DONE_SET = frozenset(("done", "готово", "готово✅", "готово ✅"))
+
+
+@lru_cache(maxsize=None)
+def _done_label(lang: str) -> str:
+    return t(lang, "tinder_done_button").strip().casefold()
+
+
 async def tinder_media(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
@@ -1643,21 +1964,15 @@ async def tinder_media(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return await tinder_confirm(update, context)
     if len(context.user_data["tinder_media"]) >= 3:
         return await tinder_confirm(update, context)
-    kb = ReplyKeyboardMarkup(
-        [[t(lang, "tinder_done_button")]],
-        resize_keyboard=True,
-        one_time_keyboard=True,
-    )
-    await update.message.reply_text(t(lang, "tinder_media_more"), reply_markup=kb)
+    await update.message.reply_text(t(lang, "tinder_media_more"), reply_markup=_done_keyboard(lang))
     return config.TINDER_MEDIA
 
 
 async def tinder_media_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    text = update.message.text.strip().lower()
-    done_label = t(lang, "tinder_done_button").lower()
-    if done_label.lower() in text or text in ["done", "готово", "готово✅", "готово ✅", "готово✅ "]:
+    text = update.message.text.strip().casefold()
+    if text in _DONE_SET or _done_label(lang) in text:
         media = context.user_data.get("tinder_media", [])
         if not media:
             await update.message.reply_text(t(lang, "tinder_media_prompt"))
@@ -1665,15 +1980,20 @@ async def tinder_media_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("👍", reply_markup=ReplyKeyboardRemove())
         return await tinder_confirm(update, context)
     # Any other text: remind to send media or tap Done
-    kb = ReplyKeyboardMarkup(
-        [[t(lang, "tinder_done_button")]],
-        resize_keyboard=True,
-        one_time_keyboard=True,
-    )
-    await update.message.reply_text(t(lang, "tinder_media_more"), reply_markup=kb)
+    await update.message.reply_text(t(lang, "tinder_media_more"), reply_markup=_done_keyboard(lang))
     return config.TINDER_MEDIA
 
 
+@lru_cache(maxsize=None)
+def _confirm_keyboard(lang: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [InlineKeyboardButton(t(lang, "btn_save"), callback_data="tinder:save")],
+            [InlineKeyboardButton(t(lang, "btn_edit"), callback_data="tinder:edit")],
+        ]
+    )
+
+
 async def tinder_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
@@ -1688,18 +2008,15 @@ async def tinder_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         interest=interest_label(context.user_data.get("tinder_interest"), lang),
         bio=context.user_data.get("tinder_bio"),
     )
-    buttons = [
-        [InlineKeyboardButton(t(lang, "btn_save"), callback_data="tinder:save")],
-        [InlineKeyboardButton(t(lang, "btn_edit"), callback_data="tinder:edit")],
-    ]
+    markup = _confirm_keyboard(lang)
     if media:
         fid, kind = media[0]
         if kind == "video":
-            await update.message.reply_video(video=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+            await update.message.reply_video(video=fid, caption=text, reply_markup=markup)
         else:
-            await update.message.reply_photo(photo=fid, caption=text, reply_markup=InlineKeyboardMarkup(buttons))
+            await update.message.reply_photo(photo=fid, caption=text, reply_markup=markup)
     else:
-        await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(buttons))
+        await update.message.reply_text(text, reply_markup=markup)
     return config.TINDER_CONFIRM
 
 
@@ -1710,15 +2027,25 @@ async def tinder_save_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     lang = lang_for_user(user_id)
     existing = db.get_profile(user_id)
     is_new_profile = existing is None
-    age = context.user_data.get("tinder_age") or (existing[1] if existing else None)
-    gender = context.user_data.get("tinder_gender") or (existing[2] if existing else None)
-    interest = context.user_data.get("tinder_interest") or (existing[3] if existing else None)
-    city = context.user_data.get("tinder_city") or (existing[4] if existing else None)
-    norm_city = context.user_data.get("tinder_normalized_city") or (existing[5] if existing else normalize_city(city or ""))
-    lat = context.user_data.get("tinder_lat") if context.user_data.get("tinder_lat") is not None else (existing[6] if existing else None)
-    lon = context.user_data.get("tinder_lon") if context.user_data.get("tinder_lon") is not None else (existing[7] if existing else None)
-    name = context.user_data.get("tinder_name") or (existing[8] if existing else query.from_user.full_name)
-    bio = context.user_data.get("tinder_bio") or (existing[9] if existing else None)
+    if existing:
+        _, e_age, e_gender, e_interest, e_city, e_norm, e_lat, e_lon, e_name, e_bio, *_ = existing
+    else:
+        e_age = e_gender = e_interest = e_city = e_lat = e_lon = e_bio = None
+        e_norm = e_name = None
+    ud = context.user_data
+    age = ud.get("tinder_age") or e_age
+    gender = ud.get("tinder_gender") or e_gender
+    interest = ud.get("tinder_interest") or e_interest
+    city = ud.get("tinder_city") or e_city
+    norm_city = ud.get("tinder_normalized_city") or (e_norm if existing else normalize_city(city or ""))
+    lat = ud.get("tinder_lat")
+    if lat is None:
+        lat = e_lat
+    lon = ud.get("tinder_lon")
+    if lon is None:
+        lon = e_lon
+    name = ud.get("tinder_name") or (e_name if existing else query.from_user.full_name)
+    bio = ud.get("tinder_bio") or e_bio
     if context.user_data.get("edit_for_submit"):
         # Update draft only, do not overwrite main profile
         context.user_data["contest_profile"] = (
@@ -1741,36 +2068,33 @@ async def tinder_save_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.message.reply_text(t(lang, "tinder_saved"))
         return await tinder_edit_menu(query, context)
 
-    db.upsert_profile(user_id, age, gender, interest, city, lat, lon, name, bio, norm_city)
-    if context.user_data.get("tinder_media"):
-        db.clear_profile_media(user_id)
-        for idx, (fid, kind) in enumerate(context.user_data.get("tinder_media", [])):
-            db.add_profile_media(user_id, fid, kind, idx)
-    context.user_data.pop("tinder_media", None)
-    if is_new_profile:
-        db.increment_stat(user_id, "profiles_created")
-    else:
-        db.increment_stat(user_id, "profiles_updated")
-    # Referral credit on first profile creation
-    if is_new_profile:
-        referrer_id, credited = db.get_referrer(user_id)
-        if referrer_id and credited == 0:
-            db.adjust_balance(user_id, config.REFERRAL_BONUS)
-            db.adjust_balance(referrer_id, config.REFERRAL_BONUS)
-            db.mark_referral_credited(user_id)
-            db.increment_stat(referrer_id, "referrals")
-            db.increment_stat(user_id, "referral_rewards")
-            try:
-                await query.answer(
-                    t(lang, "referral_bonus_claimed", points=config.REFERRAL_BONUS),
-                    show_alert=True,
-                )
-            except Exception:
-                pass
-            try:
-                await query.message.reply_text(t(lang, "referral_bonus_claimed", points=config.REFERRAL_BONUS))
-            except Exception:
-                pass
+    media = context.user_data.pop("tinder_media", None)
+    referral_credited = False
+    with db.transaction():
+        db.upsert_profile(user_id, age, gender, interest, city, lat, lon, name, bio, norm_city)
+        if media:
+            db.replace_profile_media(user_id, media)
+        if is_new_profile:
+            db.increment_stat(user_id, "profiles_created")
+        else:
+            db.increment_stat(user_id, "profiles_updated")
+        # Referral credit on first profile creation
+        if is_new_profile:
+            referrer_id, credited = db.get_referrer(user_id)
+            if referrer_id and credited == 0:
+                db.adjust_balance(user_id, config.REFERRAL_BONUS)
+                db.adjust_balance(referrer_id, config.REFERRAL_BONUS)
+                db.mark_referral_credited(user_id)
+                db.increment_stat(referrer_id, "referrals")
+                db.increment_stat(user_id, "referral_rewards")
+                referral_credited = True
+    if referral_credited:
+        bonus_text = t(lang, "referral_bonus_claimed", points=config.REFERRAL_BONUS)
+        await asyncio.gather(
+            query.answer(bonus_text, show_alert=True),
+            query.message.reply_text(bonus_text),
+            return_exceptions=True,
+        )
     # If this was triggered from edit flow, return to edit menu
     if context.user_data.get("tinder_edit_mode"):
         context.user_data["tinder_edit_mode"] = False
@@ -1786,12 +2110,7 @@ async def tinder_save_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
 
     # Collect/paused: show options to go to contest or browse or home
-    buttons = []
-    if mode == "collect":
-        buttons.append([InlineKeyboardButton(t(lang, "start_application_button"), callback_data="start:submit")])
-    buttons.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:browse")])
-    buttons.append([InlineKeyboardButton(t(lang, "back_main_menu"), callback_data="game:home")])
-    await query.message.reply_text(t(lang, "tinder_saved"), reply_markup=InlineKeyboardMarkup(buttons))
+    await query.message.reply_text(t(lang, "tinder_saved"), reply_markup=_saved_next_keyboard(lang, mode))
     return ConversationHandler.END
 
 
@@ -1799,13 +2118,9 @@ async def tinder_edit_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return await tinder_edit_menu(update, context)
 
 
-async def tinder_edit_menu(update_or_query, context: ContextTypes.DEFAULT_TYPE):
-    user_id = ensure_user_context(update_or_query)
-    lang = lang_for_user(user_id)
-    profile = db.get_profile(user_id)
-    if not profile:
-        return await start_tinder_flow(update_or_query, context)
-    if context.user_data.get("edit_for_submit"):
+@lru_cache(maxsize=None)
+def _edit_menu_keyboard(lang: str, for_submit: bool) -> InlineKeyboardMarkup:
+    if for_submit:
         buttons = [
             [InlineKeyboardButton(t(lang, "btn_age"), callback_data="tedit:age"), InlineKeyboardButton(t(lang, "btn_gender"), callback_data="tedit:gender")],
             [InlineKeyboardButton(t(lang, "btn_name"), callback_data="tedit:name")],
@@ -1820,7 +2135,27 @@ async def tinder_edit_menu(update_or_query, context: ContextTypes.DEFAULT_TYPE):
             [InlineKeyboardButton(t(lang, "btn_media"), callback_data="tedit:media")],
             [InlineKeyboardButton(t(lang, "btn_browse"), callback_data="tedit:browse")],
         ]
-    await _respond(update_or_query, t(lang, "tinder_edit_prompt"), reply_markup=InlineKeyboardMarkup(buttons))
+    return InlineKeyboardMarkup(buttons)
+
+
+@lru_cache(maxsize=None)
+def _saved_next_keyboard(lang: str, mode: str) -> InlineKeyboardMarkup:
+    buttons = []
+    if mode == "collect":
+        buttons.append([InlineKeyboardButton(t(lang, "start_application_button"), callback_data="start:submit")])
+    buttons.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:browse")])
+    buttons.append([InlineKeyboardButton(t(lang, "back_main_menu"), callback_data="game:home")])
+    return InlineKeyboardMarkup(buttons)
+
+
+async def tinder_edit_menu(update_or_query, context: ContextTypes.DEFAULT_TYPE):
+    user_id = ensure_user_context(update_or_query)
+    lang = lang_for_user(user_id)
+    profile = db.get_profile(user_id)
+    if not profile:
+        return await start_tinder_flow(update_or_query, context)
+    keyboard = _edit_menu_keyboard(lang, bool(context.user_data.get("edit_for_submit")))
+    await _respond(update_or_query, t(lang, "tinder_edit_prompt"), reply_markup=keyboard)
     return ConversationHandler.END
 
 
@@ -1841,24 +2176,11 @@ async def tinder_edit_dispatch(update: Update, context: ContextTypes.DEFAULT_TYP
         await query.message.reply_text(t(lang, "tinder_age_prompt"), reply_markup=ReplyKeyboardRemove())
         return config.TINDER_AGE
     if field == "gender":
-        keyboard = ReplyKeyboardMarkup(
-            [
-                [f"👦 {t(lang, 'gender_male')}", f"👧 {t(lang, 'gender_female')}"],
-            ],
-            resize_keyboard=True,
-            one_time_keyboard=True,
-        )
+        keyboard = _gender_reply_keyboard(lang)
         await query.message.reply_text(t(lang, "tinder_gender_prompt"), reply_markup=keyboard)
         return config.TINDER_GENDER
     if field == "interest":
-        keyboard = ReplyKeyboardMarkup(
-            [
-                [t(lang, "tinder_interest_male"), t(lang, "tinder_interest_female")],
-                [t(lang, "tinder_interest_any")],
-            ],
-            resize_keyboard=True,
-            one_time_keyboard=True,
-        )
+        keyboard = _interest_reply_keyboard(lang)
         await query.message.reply_text(t(lang, "tinder_interest_prompt"), reply_markup=keyboard)
         return config.TINDER_INTEREST
     if field == "city":
@@ -1879,8 +2201,7 @@ async def tinder_edit_dispatch(update: Update, context: ContextTypes.DEFAULT_TYP
         return config.TINDER_BIO
     if field == "media":
         context.user_data["tinder_media"] = []
-        kb = ReplyKeyboardMarkup([[t(lang, "tinder_done_button")]], resize_keyboard=True, one_time_keyboard=True)
-        await query.message.reply_text(t(lang, "tinder_media_prompt"), reply_markup=kb)
+        await query.message.reply_text(t(lang, "tinder_media_prompt"), reply_markup=_done_keyboard(lang))
         return config.TINDER_MEDIA
     if field == "browse":
         context.user_data["tinder_edit_mode"] = False
@@ -1893,7 +2214,7 @@ async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     if not db.is_feature_enabled("finder"):
-        await _respond(update, t(lang, "feature_disabled"))
+        await _respond_update(update, t(lang, "feature_disabled"))
         return ConversationHandler.END
     profile = db.get_profile(user_id)
     if not profile:
@@ -1901,7 +2222,7 @@ async def find_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if context.user_data.get("tinder_age"):
             return await tinder_confirm(update, context)
         return await start_tinder_flow(update, context)
-    await send_own_profile(update, user_id, lang)
+    await send_own_profile(update, user_id, lang, profile)
     return ConversationHandler.END
 
 
@@ -1909,11 +2230,16 @@ async def likes_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     if not db.is_feature_enabled("finder"):
-        await _respond(update, t(lang, "feature_disabled"))
+        await _respond_update(update, t(lang, "feature_disabled"))
         return ConversationHandler.END
     await send_next_liker_card(update, user_id, lang, context)
 
 
+_SWIPE_KB = ReplyKeyboardMarkup([["❤️", "💔", "😴"]], resize_keyboard=True, one_time_keyboard=True)
+_SWIPE_IDLE_KB = ReplyKeyboardMarkup([["🔍", "📥"], ["😴"]], resize_keyboard=True, one_time_keyboard=True)
+_LIKES_EMPTY_KB = ReplyKeyboardMarkup([["🔍", "📥", "😴"]], resize_keyboard=True, one_time_keyboard=True)
+
+
 def build_swipe_keyboard(lang: str, target_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
@@ -1932,15 +2258,14 @@ async def send_next_candidate_card(update_or_query, user_id: int, lang: str, con
         await _respond(update_or_query, t(lang, "tinder_profile_needed"))
         return False
     _, _, user_gender, user_interest, _, norm_city, *_ = profile
-    row = db.get_next_candidate(user_id, user_gender, user_interest, norm_city or "")
+    # The candidate search is the heaviest query on the swipe path; keep it off the event loop.
+    row = await asyncio.to_thread(db.get_next_candidate, user_id, user_gender, user_interest, norm_city or "")
     if not row:
-        kb = ReplyKeyboardMarkup([["🔍", "📥"], ["😴"]], resize_keyboard=True, one_time_keyboard=True)
-        await _respond(update_or_query, t(lang, "tinder_no_more_profiles"), reply_markup=kb)
+        await _respond(update_or_query, t(lang, "tinder_no_more_profiles"), reply_markup=_SWIPE_IDLE_KB)
         return False
-    target_id, age, gender, interest, city, name, bio = row
+    target_id, age, gender, interest, city, name, bio, first_fid, first_kind = row
     if context:
         context.user_data["tinder_current_target"] = target_id
-    media = db.list_profile_media(target_id)
     caption = t(
         lang,
         "tinder_profile_line",
@@ -1951,9 +2276,9 @@ async def send_next_candidate_card(update_or_query, user_id: int, lang: str, con
         interest=interest_label(interest, lang),
         bio=bio or "—",
     )
-    kb = ReplyKeyboardMarkup([["❤️", "💔", "😴"]], resize_keyboard=True, one_time_keyboard=True)
-    if media:
-        fid, kind = media[0]
+    kb = _SWIPE_KB
+    if first_fid:
+        fid, kind = first_fid, first_kind
         if isinstance(update_or_query, Update) and update_or_query.message:
             if kind == "video":
                 await update_or_query.message.reply_video(video=fid, caption=caption, reply_markup=kb)
@@ -1974,22 +2299,59 @@ async def send_next_candidate_card(update_or_query, user_id: int, lang: str, con
     return True
 
 
+_LIKERS_PAGE = 20
+# DB user id -> cached page of users_who_liked_me. Keyed by the DB id rather than
+# kept in user_data, which PTB keys by the Telegram id (differs in guest mode).
+_LIKERS_PAGES: dict[int, list] = {}
+
+
+def _next_liker(user_id: int, context: Optional[ContextTypes.DEFAULT_TYPE]) -> Optional[int]:
+    """Peek at the next liker in the user's cached page, refilling it when empty.
+
+    Entries leave the page only through _discard_liker, so a card that is shown
+    but never swiped comes up again next time.
+    """
+    if context is None:
+        likers = db.users_who_liked_me(user_id, limit=1)
+        return likers[0] if likers else None
+    queue = _LIKERS_PAGES.get(user_id)
+    if not queue:
+        queue = db.users_who_liked_me(user_id, limit=_LIKERS_PAGE)
+        if len(_LIKERS_PAGES) >= 10_000:
+            _LIKERS_PAGES.clear()
+        _LIKERS_PAGES[user_id] = queue
+    return queue[0] if queue else None
+
+
+def _discard_liker(user_id: int, target_id: int) -> None:
+    """Record that user_id swiped target_id in both cached liker pages.
+
+    The target leaves the swiper's page, and the target's own page is dropped
+    because this swipe changes who has liked them.
+    """
+    queue = _LIKERS_PAGES.get(user_id)
+    if queue and target_id in queue:
+        queue.remove(target_id)
+    _LIKERS_PAGES.pop(target_id, None)
+
+
 async def send_next_liker_card(update_or_query, user_id: int, lang: str, context: ContextTypes.DEFAULT_TYPE = None):
-    likers = db.users_who_liked_me(user_id)
-    if not likers:
-        kb_empty = ReplyKeyboardMarkup([["🔍", "📥", "😴"]], resize_keyboard=True, one_time_keyboard=True)
-        await _respond(update_or_query, t(lang, "tinder_likes_empty"), reply_markup=kb_empty)
-        return
-    target_id = likers[0]
-    row = db.get_profile(target_id)
-    if not row:
-        kb_empty = ReplyKeyboardMarkup([["🔍", "📥", "😴"]], resize_keyboard=True, one_time_keyboard=True)
-        await _respond(update_or_query, t(lang, "tinder_likes_empty"), reply_markup=kb_empty)
-        return
+    row = first_media = None
+    while row is None:
+        target_id = _next_liker(user_id, context)
+        if target_id is None:
+            await _respond(update_or_query, t(lang, "tinder_likes_empty"), reply_markup=_LIKES_EMPTY_KB)
+            return
+        row, first_media = db.get_profile_with_first_media(target_id)
+        if row is None:
+            if context is None:
+                await _respond(update_or_query, t(lang, "tinder_likes_empty"), reply_markup=_LIKES_EMPTY_KB)
+                return
+            # The liker's profile is gone; drop them from the page and try the next one.
+            _LIKERS_PAGES[user_id].remove(target_id)
     _, age, gender, interest, city, norm_city, lat, lon, name, bio, *_ = row
     if context:
         context.user_data["tinder_current_target"] = target_id
-    media = db.list_profile_media(target_id)
     caption = t(
         lang,
         "tinder_profile_line",
@@ -2000,9 +2362,9 @@ async def send_next_liker_card(update_or_query, user_id: int, lang: str, context
         interest=interest_label(interest, lang),
         bio=bio or "—",
     )
-    kb = ReplyKeyboardMarkup([["❤️", "💔", "😴"]], resize_keyboard=True, one_time_keyboard=True)
-    if media:
-        fid, kind = media[0]
+    kb = _SWIPE_KB
+    if first_media:
+        fid, kind = first_media
         if kind == "video":
             await update_or_query.message.reply_video(video=fid, caption=caption, reply_markup=kb)
         else:
@@ -2011,56 +2373,49 @@ async def send_next_liker_card(update_or_query, user_id: int, lang: str, context
         await _respond(update_or_query, caption, reply_markup=kb)
 
 
+_SWIPE_ACTIONS = {"❤️": "like", "❤": "like", "💔": "dislike", "😴": "sleep", "🔍": "find", "📥": "likes"}
+
+
+class _SwipeButtonFilter(filters.MessageFilter):
+    """Texts that are exactly one of the swipe keyboard buttons (a dict probe, no regex)."""
+
+    __slots__ = ()
+
+    def filter(self, message) -> bool:
+        return message.text in _SWIPE_ACTIONS
+
+
 async def tinder_swipe_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     target_id = context.user_data.get("tinder_current_target")
-    txt = update.message.text.strip()
-    kb = ReplyKeyboardMarkup([["🔍", "📥"], ["😴"]], resize_keyboard=True, one_time_keyboard=True)
-    if "🔍" in txt:
+    action = _SWIPE_ACTIONS.get(update.message.text.strip())
+    if action == "find":
         await send_next_candidate_card(update, user_id, lang, context)
         return
-    if "📥" in txt:
+    if action == "likes":
         await send_next_liker_card(update, user_id, lang, context)
         return
-    if "😴" in txt:
+    if action == "sleep":
         context.user_data.pop("tinder_current_target", None)
         await send_start_message(update, lang, user_id)
         return
     if not target_id:
-        await update.message.reply_text(t(lang, "tinder_no_more_profiles"), reply_markup=kb)
+        await update.message.reply_text(t(lang, "tinder_no_more_profiles"), reply_markup=_SWIPE_IDLE_KB)
         return
-    if "❤️" in txt:
+    if action in ("like", "dislike"):
+        _discard_liker(user_id, target_id)
+    if action == "like":
         mutual = db.mark_like_and_check(user_id, target_id)
         if mutual:
-            try:
-                chat = await context.bot.get_chat(target_id)
-                username = format_username(chat.username, target_id)
-            except Exception:
-                username = format_username(None, target_id)
-            await update.message.reply_text(t(lang, "tinder_match", username=username))
-            target_lang = lang_for_user(target_id)
-            me_un = update.effective_user.username
-            me_username = format_username(me_un, user_id)
-            await context.bot.send_message(
-                chat_id=target_id,
-                text=t(target_lang, "tinder_match", username=me_username),
+            await _announce_match(
+                context.bot, update.message, lang, user_id, update.effective_user.username, target_id
             )
         else:
             target_lang = lang_for_user(target_id)
-            try:
-                await context.bot.send_message(
-                    chat_id=target_id,
-                    text=t(target_lang, "tinder_new_like"),
-                )
-            except Exception:
-                pass
-    elif "💔" in txt:
+            await _notify_user(context.bot, target_id, t(target_lang, "tinder_new_like"))
+    elif action == "dislike":
         db.mark_swipe(user_id, target_id, "dislike")
-    elif "😴" in txt:
-        context.user_data.pop("tinder_current_target", None)
-        await send_start_message(update, lang, user_id)
-        return
     await send_next_candidate_card(update, user_id, lang, context)
 
 
@@ -2068,7 +2423,7 @@ async def handle_checkin(update_or_query) -> None:
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
     last = db.get_last_checkin(user_id)
-    today = date.today().isoformat()
+    today = _today_iso()
     if last == today:
         await _respond(update_or_query, t(lang, "checkin_already"))
         return
@@ -2091,10 +2446,10 @@ async def show_balance(update_or_query) -> None:
     )
 
 
-def feature_enabled_or_reply(feature: str, update_or_query, lang: str):
+async def feature_enabled_or_reply(feature: str, update_or_query, lang: str) -> bool:
     if db.is_feature_enabled(feature):
         return True
-    _respond(update_or_query, t(lang, "feature_disabled"))
+    await _respond(update_or_query, t(lang, "feature_disabled"))
     return False
 
 
@@ -2113,9 +2468,9 @@ async def blackjack_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def blackjack_boost_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin: set blackjack win bias percentage for a user."""
-    ensure_user_context(update)
     if not is_admin(update.effective_user.id):
         return
+    ensure_user_context(update)
     lang = lang_for_user(update.effective_user.id)
     if len(context.args) != 2:
         await update.message.reply_text(t(lang, "bj_boost_usage"))
@@ -2133,9 +2488,9 @@ async def blackjack_boost_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def grant_boost_points_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin: manually credit boost rewards and track stats."""
-    ensure_user_context(update)
     if not is_admin(update.effective_user.id):
         return
+    ensure_user_context(update)
     lang = lang_for_user(update.effective_user.id)
     if len(context.args) != 2:
         await update.message.reply_text(t(lang, "grant_boost_usage"))
@@ -2174,9 +2529,8 @@ async def santa_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, *, ed
         await _respond(update_or_query, t(lang, "santa_disabled"))
         return ConversationHandler.END
     clear_transient_state(context)
-    context.user_data["santa_active"] = True
-    context.user_data.pop("santa_name", None)
-    context.user_data.pop("santa_insta", None)
+    state = _state(context)
+    state.santa_active = True
     existing_number = db.get_santa_number_for_user(user_id)
     # assign a number immediately so partial submissions are visible
     if not existing_number:
@@ -2190,7 +2544,7 @@ async def santa_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, *, ed
         )
         await _respond(update_or_query, t(lang, "santa_complete", number=_fmt_santa_number(existing_number)), reply_markup=kb)
         return ConversationHandler.END
-    context.user_data["santa_existing_number"] = existing_number
+    state.santa_existing_number = existing_number
     await _respond(update_or_query, t(lang, "santa_name_prompt"), reply_markup=ReplyKeyboardRemove())
     return config.SANTA_NAME
 
@@ -2198,13 +2552,14 @@ async def santa_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, *, ed
 async def santa_name_step(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    if not context.user_data.get("santa_active"):
+    state = _state(context)
+    if not state.santa_active:
         return ConversationHandler.END
     name = (update.message.text or "").strip()
     if not name:
         await update.message.reply_text(t(lang, "santa_name_prompt"))
         return config.SANTA_NAME
-    context.user_data["santa_name"] = name[:120]
+    state.santa_name = name[:120]
     await update.message.reply_text(
         t(lang, "santa_gift_prompt"),
         reply_markup=ReplyKeyboardRemove(),
@@ -2215,7 +2570,8 @@ async def santa_name_step(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def santa_insta_step(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    if not context.user_data.get("santa_active"):
+    state = _state(context)
+    if not state.santa_active:
         return ConversationHandler.END
     # Require a real photo (not a file/document)
     if update.message and update.message.document and not update.message.photo:
@@ -2225,8 +2581,8 @@ async def santa_insta_step(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(t(lang, "santa_gift_prompt"))
         return config.SANTA_GIFT
     file_id = update.message.photo[-1].file_id
-    name = context.user_data.get("santa_name")
-    existing_number = context.user_data.get("santa_existing_number")
+    name = state.santa_name
+    existing_number = state.santa_existing_number
     number = existing_number or db.assign_secret_santa_number(user_id)
     if name:
         db.update_secret_santa_details(user_id, name=name, gift_photo_id=file_id)
@@ -2283,17 +2639,9 @@ async def santa_lookup_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await send_santa_card(update, number, lang)
 
 
-async def send_santa_card(update_or_query, gift_number: int, lang: str):
-    row = db.get_santa_by_number(gift_number)
-    if not row:
-        await _respond(update_or_query, t(lang, "santa_lookup_not_found", number=gift_number))
-        return
-    gift_number, uid, username, first_name, last_name, saved_name, gift_photo_id = row
-    name_parts = [n for n in [saved_name, first_name, last_name] if n]
-    name = " ".join(name_parts) if name_parts else "—"
-    uname = username if username else "—"
-    caption = t(lang, "santa_lookup", number=_fmt_santa_number(gift_number), uid=uid, username=uname, name=name)
-    kb = InlineKeyboardMarkup(
+@lru_cache(maxsize=1024)
+def _santa_nav_keyboard(gift_number: int) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
         [
             [
                 InlineKeyboardButton("⬅️", callback_data=f"santa:nav:{gift_number}:prev"),
@@ -2302,20 +2650,57 @@ async def send_santa_card(update_or_query, gift_number: int, lang: str):
             ]
         ]
     )
+
+
+@lru_cache(maxsize=None)
+def _photo_unavailable(lang: str) -> str:
+    return t(lang, "photo_unavailable")
+
+
+_SANTA_CARD_TTL = 60
+
+
+@lru_cache(maxsize=2048)
+def _santa_card(gift_number: int, lang: str, version: int, bucket: int):
+    """(caption, gift_photo_id) for a gift number, or None if it doesn't exist.
+
+    `version` is db.santa_version() so santa writes invalidate entries; `bucket`
+    is a time slice that bounds staleness of the joined users columns.
+    """
+    row = db.get_santa_by_number(gift_number)
+    if not row:
+        return None
+    gift_number, uid, username, first_name, last_name, saved_name, gift_photo_id = row
+    name_parts = [n for n in [saved_name, first_name, last_name] if n]
+    name = " ".join(name_parts) if name_parts else "—"
+    uname = username if username else "—"
+    caption = t(lang, "santa_lookup", number=_fmt_santa_number(gift_number), uid=uid, username=uname, name=name)
+    return caption, gift_photo_id
+
+
+async def send_santa_card(update_or_query, gift_number: int, lang: str):
+    card = _santa_card(gift_number, lang, db.santa_version(), int(time.monotonic() // _SANTA_CARD_TTL))
+    if not card:
+        await _respond(update_or_query, t(lang, "santa_lookup_not_found", number=gift_number))
+        return
+    caption, gift_photo_id = card
+    kb = _santa_nav_keyboard(gift_number)
     bot = update_or_query.get_bot() if hasattr(update_or_query, "get_bot") else None
+    if not (gift_photo_id and bot):
+        await _respond(update_or_query, caption, reply_markup=kb)
+        return
     chat_id = (
         update_or_query.effective_user.id
         if isinstance(update_or_query, Update) and update_or_query.effective_user
         else update_or_query.from_user.id
     )
-    if gift_photo_id and bot:
-        try:
-            await bot.send_photo(chat_id=chat_id, photo=gift_photo_id, caption=caption, reply_markup=kb)
-            return
-        except Exception:
-            # Fall back to text if the stored file_id is invalid
-            caption = caption + f"\n\n{t(lang, 'photo_unavailable')}"
-    await _respond(update_or_query, caption, reply_markup=kb)
+    try:
+        await bot.send_photo(chat_id=chat_id, photo=gift_photo_id, caption=caption, reply_markup=kb)
+        return
+    except Exception:
+        # Fall back to text if the stored file_id is invalid
+        pass
+    await _respond(update_or_query, f"{caption}\n\n{_photo_unavailable(lang)}", reply_markup=kb)
 
 
 async def feature_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2328,18 +2713,8 @@ async def feature_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(t(lang, "feature_usage"))
         return
     if context.args[0].lower() == "list":
-        flags = [
-            ("finder", db.is_feature_enabled("finder")),
-            ("shop", db.is_feature_enabled("shop")),
-            ("blackjack", db.is_feature_enabled("blackjack")),
-            ("earn", db.is_feature_enabled("earn")),
-            ("referral", db.is_feature_enabled("referral")),
-            ("boost", db.is_feature_enabled("boost")),
-            ("santa", db.is_feature_enabled("santa")),
-            ("fun", db.is_feature_enabled("fun")),
-            ("voting", db.is_feature_enabled("voting")),
-        ]
-        lines = [t(lang, "feature_status_line", name=name, status=("on" if val else "off")) for name, val in flags]
+        flags = db.get_feature_flags(FEATURE_ORDER)
+        lines = [t(lang, "feature_status_line", name=name, status=("on" if val else "off")) for name, val in flags.items()]
         await update.message.reply_text("\n".join(lines))
         return
     if len(context.args) != 2:
@@ -2347,13 +2722,23 @@ async def feature_toggle_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return
     name = context.args[0].lower()
     value = context.args[1].lower()
-    if name not in {"finder", "shop", "blackjack", "earn", "referral", "boost", "santa", "fun", "voting"} or value not in {"on", "off"}:
+    if name not in FEATURE_NAMES or value not in ("on", "off"):
         await update.message.reply_text(t(lang, "feature_usage"))
         return
     db.set_feature_enabled(name, value == "on")
     await update.message.reply_text(t(lang, "feature_set", name=name, status=value))
 
 
+@lru_cache(maxsize=None)
+def _quick_actions(lang: str) -> dict:
+    """Localized quick-keyboard label -> action tag."""
+    return {
+        t(lang, "quick_help_btn"): "help",
+        t(lang, "back_main_menu"): "main_menu",
+        t(lang, "back_game_menu"): "game_menu",
+    }
+
+
 async def quick_reply_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle taps on the always-visible quick keyboard."""
     user_id = ensure_user_context(update)
@@ -2362,12 +2747,12 @@ async def quick_reply_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     if not text:
         return
     # Support reply handling
-    if context.user_data.get("support_waiting"):
+    state = _state(context)
+    if state.support_waiting:
+        state.support_waiting = False
         if text == t(lang, "support_cancel"):
-            context.user_data.pop("support_waiting", None)
             await update.message.reply_text(t(lang, "support_cancelled"), reply_markup=ReplyKeyboardRemove())
             return
-        context.user_data.pop("support_waiting", None)
         admin_msg = f"🆘 Support message from {user_id} (@{update.effective_user.username or '—'}):\n{text}"
         try:
             await context.bot.send_message(chat_id=config.ADMIN_ID, text=admin_msg)
@@ -2382,66 +2767,67 @@ async def quick_reply_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
             pass
         await update.message.reply_text(t(lang, "support_sent"), reply_markup=ReplyKeyboardRemove())
         return
-    if context.user_data.get("bj_pending"):
+    if _state(context).bj_pending:
         if text.isdigit():
             await handle_bet_selection(update, context, int(text))
         else:
             await update.message.reply_text(t(lang, "bet_invalid"))
         return
-    if text == t(lang, "back_game_menu"):
+    action = _quick_actions(lang).get(text)
+    if action == "game_menu":
         await send_game_menu(update)
-        return
-    if text == t(lang, "back_main_menu"):
+    elif action == "main_menu":
         await send_start_message(update, lang, user_id)
-        return
-    if text == t(lang, "quick_help_btn"):
+    elif action == "help":
         await help_command(update, context)
 
 
+@lru_cache(maxsize=None)
+def _nav_reply_keyboard(lang: str) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        [[t(lang, "back_game_menu"), t(lang, "back_main_menu")]],
+        resize_keyboard=True,
+    )
+
+
 async def send_earn_points(update_or_query, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
     clear_transient_state(context)
-    if not db.is_feature_enabled("earn"):
+    flags = db.get_feature_flags(("earn", "boost", "referral"))
+    if not flags["earn"]:
         await _respond(update_or_query, t(lang, "feature_disabled"))
         return
     # Build buttons based on enabled sub-features
     rows = []
-    if db.is_feature_enabled("boost"):
+    if flags["boost"]:
         rows.append([InlineKeyboardButton(t(lang, "earn_boost_button"), callback_data="earn:boost")])
-    if db.is_feature_enabled("referral"):
+    if flags["referral"]:
         rows.append([InlineKeyboardButton(t(lang, "earn_ref_button"), callback_data="earn:ref")])
     rows.append([InlineKeyboardButton(t(lang, "blackjack_button"), callback_data="game:blackjack")])
-    if not rows or (not db.is_feature_enabled("boost") and not db.is_feature_enabled("referral")):
+    if not rows or (not flags["boost"] and not flags["referral"]):
         await _respond(update_or_query, t(lang, "feature_disabled"))
         return
     text = t(lang, "earn_title") + "\n\n" + t(lang, "earn_choose")
     bot = update_or_query.get_bot() if hasattr(update_or_query, "get_bot") else None
     kb_inline = InlineKeyboardMarkup(rows)
-    kb_reply = ReplyKeyboardMarkup(
-        [[t(lang, "back_game_menu"), t(lang, "back_main_menu")]],
-        resize_keyboard=True,
-    )
+    kb_reply = _nav_reply_keyboard(lang)
+    sends = []
     # Always push our nav keyboard to override any lingering "Help" keyboard
     if bot:
-        try:
-            await bot.send_message(
-                chat_id=user_id,
-                text=" ",
-                reply_markup=kb_reply,
-                disable_notification=True,
-            )
-        except Exception:
-            pass
-    if isinstance(update_or_query, Update) and update_or_query.callback_query and update_or_query.callback_query.message:
-        try:
-            await update_or_query.callback_query.edit_message_text(text=text, reply_markup=kb_inline, disable_web_page_preview=False)
-            return
-        except Exception:
-            pass
+        sends.append(_set_reply_keyboard(bot, user_id, kb_reply))
+    query = _editable_text_query(update_or_query)
+    if query:
+        sends.append(query.edit_message_text(text=text, reply_markup=kb_inline, disable_web_page_preview=False))
+    # Both requests are independent, so issue them concurrently.
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    # An exception here only means the message changed under us (deleted, edited).
+    if query and not isinstance(results[-1], BaseException):
+        return
     await _respond(update_or_query, text, reply_markup=kb_inline)
 
 
+@lru_cache(maxsize=None)
 def blackjack_actions_keyboard(lang: str, allow_double: bool) -> InlineKeyboardMarkup:
     rows = [
         [
@@ -2456,6 +2842,7 @@ def blackjack_actions_keyboard(lang: str, allow_double: bool) -> InlineKeyboardM
     return InlineKeyboardMarkup(rows)
 
 
+@lru_cache(maxsize=None)
 def post_round_keyboard(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
@@ -2480,7 +2867,7 @@ async def start_blackjack(update_or_query, context: ContextTypes.DEFAULT_TYPE) -
     if not bets:
         bets = [balance]
     if context:
-        context.user_data["bj_pending"] = True
+        _state(context).bj_pending = True
     kb = ReplyKeyboardMarkup(
         [list(map(str, bets))],
         resize_keyboard=True,
@@ -2513,7 +2900,22 @@ async def send_blackjack_state(update_or_query, player_hand, dealer_hand, bet, a
     await _respond(update_or_query, text, reply_markup=blackjack_actions_keyboard(lang, allow_double))
 
 
-async def resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet):
+def _round_summary(lang: str, player_hand, dealer_hand, player_total: int, dealer_total: int, outcome: str, balance: int) -> str:
+    """Render a settled hand: title, both hands, outcome and balance."""
+    return (
+        f"{t(lang, 'blackjack_title')}\n"
+        f"{t(lang, 'player_hand', cards=game.format_hand(player_hand), total=player_total)}\n"
+        f"{t(lang, 'dealer_hand', cards=game.format_hand(dealer_hand), total=dealer_total)}\n\n"
+        f"{outcome}\n\n"
+        f"{t(lang, 'balance_label', points=balance)}"
+    )
+
+
+async def resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet, extra_stake: int = 0, boost: float = 0.0):
+    """Settle a finished hand; `extra_stake` is taken from the balance in the same commit (doubles).
+
+    `boost` is the admin win bias snapshotted into the session when the bet was placed.
+    """
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
     player_total, _ = game.hand_value(player_hand)
@@ -2521,10 +2923,9 @@ async def resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, b
     dealer_total_orig = dealer_total
 
     # Apply admin-set boost: chance to flip a dealer win/tie into a bust
-    boost = db.get_blackjack_boost(user_id)
     forced_dealer_bust = False
     if (
-        boost > 0
+        boost > 0.0
         and player_total <= 21
         and dealer_total >= player_total
         and dealer_total <= 21
@@ -2532,45 +2933,31 @@ async def resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, b
     ):
         forced_dealer_bust = True
 
-    message_lines = [
-        t(lang, "blackjack_title"),
-        t(lang, "player_hand", cards=game.format_hand(player_hand), total=player_total),
-        t(lang, "dealer_hand", cards=game.format_hand(dealer_hand), total=dealer_total_orig),
-        "",
-    ]
-    outcome_text = ""
     payout = 0
     if player_total > 21:
         outcome_text = t(lang, "blackjack_bust", bet=bet)
-        db.increment_stat(user_id, "blackjack_losses")
+        stat = "blackjack_losses"
     elif forced_dealer_bust or dealer_total > 21:
         payout = bet * 2
-        db.adjust_balance(user_id, payout)
         outcome_text = t(lang, "blackjack_dealer_bust", payout=payout)
-        db.increment_stat(user_id, "blackjack_wins")
+        stat = "blackjack_wins"
     elif player_total > dealer_total:
         payout = bet * 2
-        db.adjust_balance(user_id, payout)
         outcome_text = t(lang, "blackjack_player_win", payout=payout, profit=payout - bet)
-        db.increment_stat(user_id, "blackjack_wins")
+        stat = "blackjack_wins"
     elif dealer_total > player_total:
         outcome_text = t(lang, "blackjack_dealer_win", bet=bet)
-        db.increment_stat(user_id, "blackjack_losses")
+        stat = "blackjack_losses"
     else:
         payout = bet
-        db.adjust_balance(user_id, payout)
         outcome_text = t(lang, "blackjack_push")
-        db.increment_stat(user_id, "blackjack_pushes")
-    message_lines.append(outcome_text)
-    balance = db.get_balance(user_id)
-    message_lines.append("")
-    message_lines.append(t(lang, "balance_label", points=balance))
+        stat = "blackjack_pushes"
+    balance = db.finish_blackjack_round(user_id, payout - extra_stake, stat)
     await _respond(
         update_or_query,
-        "\n".join(message_lines),
+        _round_summary(lang, player_hand, dealer_hand, player_total, dealer_total_orig, outcome_text, balance),
         reply_markup=post_round_keyboard(lang),
     )
-    db.clear_blackjack_session(user_id)
 
 
 async def handle_bet_selection(update_or_query, context: ContextTypes.DEFAULT_TYPE, bet: int) -> None:
@@ -2582,37 +2969,31 @@ async def handle_bet_selection(update_or_query, context: ContextTypes.DEFAULT_TY
         return
 
     if context:
-        context.user_data["bj_pending"] = False
-    db.increment_stat(user_id, "games_played")
+        _state(context).bj_pending = False
     deck = game.build_deck()
     player_hand = [game.draw_card(deck), game.draw_card(deck)]
     dealer_hand = [game.draw_card(deck), game.draw_card(deck)]
-    db.adjust_balance(user_id, -bet)
-    db.save_blackjack_session(user_id, deck, player_hand, dealer_hand, bet)
+    db.start_blackjack_round(user_id, bet, deck, player_hand, dealer_hand)
 
     player_bj = game.is_blackjack(player_hand)
     dealer_bj = game.is_blackjack(dealer_hand)
     if player_bj or dealer_bj:
-        outcome_lines = [
-            t(lang, "blackjack_title"),
-            t(lang, "player_hand", cards=game.format_hand(player_hand), total=game.hand_value(player_hand)[0]),
-            t(lang, "dealer_hand", cards=game.format_hand(dealer_hand), total=game.hand_value(dealer_hand)[0]),
-            "",
-        ]
+        payout = 0
         if player_bj and dealer_bj:
-            db.adjust_balance(user_id, bet)
-            outcome_lines.append(t(lang, "blackjack_push"))
+            payout = bet
+            outcome_text = t(lang, "blackjack_push")
         elif player_bj:
             payout = bet * 2
-            db.adjust_balance(user_id, payout)
-            outcome_lines.append(t(lang, "blackjack_player_blackjack", payout=payout))
+            outcome_text = t(lang, "blackjack_player_blackjack", payout=payout)
         else:
-            outcome_lines.append(t(lang, "blackjack_dealer_blackjack", bet=bet))
-        balance = db.get_balance(user_id)
-        outcome_lines.append("")
-        outcome_lines.append(t(lang, "balance_label", points=balance))
-        await _respond(update_or_query, "\n".join(outcome_lines), reply_markup=post_round_keyboard(lang))
-        db.clear_blackjack_session(user_id)
+            outcome_text = t(lang, "blackjack_dealer_blackjack", bet=bet)
+        balance = db.finish_blackjack_round(user_id, payout)
+        text = _round_summary(
+            lang, player_hand, dealer_hand,
+            game.hand_value(player_hand)[0], game.hand_value(dealer_hand)[0],
+            outcome_text, balance,
+        )
+        await _respond(update_or_query, text, reply_markup=post_round_keyboard(lang))
         return
 
     await send_blackjack_state(update_or_query, player_hand, dealer_hand, bet, allow_double=True)
@@ -2631,27 +3012,22 @@ async def blackjack_hit(update_or_query) -> None:
     bet = session["bet"]
 
     player_hand.append(game.draw_card(deck))
-    db.save_blackjack_session(user_id, deck, player_hand, dealer_hand, bet)
+    db.save_blackjack_session(user_id, deck, player_hand, dealer_hand, bet, boost=session["boost"])
 
     total, _ = game.hand_value(player_hand)
     if total > 21:
-        db.clear_blackjack_session(user_id)
-        balance = db.get_balance(user_id)
-        text = "\n".join(
-            [
-                t(lang, "blackjack_bust", bet=bet),
-                t(lang, "player_hand", cards=game.format_hand(player_hand), total=total),
-                "",
-                t(lang, "balance_label", points=balance),
-            ]
+        balance = db.finish_blackjack_round(user_id)
+        text = (
+            f"{t(lang, 'blackjack_bust', bet=bet)}\n"
+            f"{t(lang, 'player_hand', cards=game.format_hand(player_hand), total=total)}\n\n"
+            f"{t(lang, 'balance_label', points=balance)}"
         )
         await _respond(update_or_query, text, reply_markup=post_round_keyboard(lang))
         return
     if total == 21:
         # Auto-stand and resolve when player hits 21
         dealer_hand = game.dealer_play(dealer_hand, deck)
-        db.clear_blackjack_session(user_id)
-        await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet)
+        await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet, boost=session["boost"])
         return
 
     await send_blackjack_state(
@@ -2670,7 +3046,7 @@ async def blackjack_stand(update_or_query) -> None:
     player_hand = session["player_hand"]
     dealer_hand = game.dealer_play(session["dealer_hand"], deck)
     bet = session["bet"]
-    await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet)
+    await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet, boost=session["boost"])
 
 
 async def blackjack_double(update_or_query) -> None:
@@ -2691,34 +3067,28 @@ async def blackjack_double(update_or_query) -> None:
         await _respond(update_or_query, t(lang, "not_enough_points"), reply_markup=blackjack_actions_keyboard(lang, False))
         return
 
-    db.adjust_balance(user_id, -bet)
+    extra_stake = bet
     bet *= 2
     deck = session["deck"]
     dealer_hand = session["dealer_hand"]
     player_hand.append(game.draw_card(deck))
     total, _ = game.hand_value(player_hand)
     if total > 21:
-        db.clear_blackjack_session(user_id)
-        balance = db.get_balance(user_id)
-        text = "\n".join(
-            [
-                t(lang, "blackjack_bust", bet=bet),
-                t(lang, "player_hand", cards=game.format_hand(player_hand), total=total),
-                "",
-                t(lang, "balance_label", points=balance),
-            ]
+        balance = db.finish_blackjack_round(user_id, -extra_stake)
+        text = (
+            f"{t(lang, 'blackjack_bust', bet=bet)}\n"
+            f"{t(lang, 'player_hand', cards=game.format_hand(player_hand), total=total)}\n\n"
+            f"{t(lang, 'balance_label', points=balance)}"
         )
         await _respond(update_or_query, text, reply_markup=post_round_keyboard(lang))
         return
     if total == 21:
         dealer_hand = game.dealer_play(dealer_hand, deck)
-        db.clear_blackjack_session(user_id)
-        await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet)
+        await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet, extra_stake, session["boost"])
         return
 
     dealer_hand = game.dealer_play(dealer_hand, deck)
-    db.clear_blackjack_session(user_id)
-    await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet)
+    await resolve_blackjack_outcome(update_or_query, player_hand, dealer_hand, bet, extra_stake, session["boost"])
 
 
 async def show_shop(update_or_query) -> None:
@@ -2733,9 +3103,10 @@ async def show_shop(update_or_query) -> None:
         return
     lines = [t(lang, "shop_title")]
     buttons = []
+    item_line = formatter(lang, "shop_item_line")
     for item_id, name, price, code, kind in items:
         label = shop_item_label(lang, code, kind, name)
-        lines.append(t(lang, "shop_item_line", name=label, price=price))
+        lines.append(item_line(name=label, price=price))
         buttons.append([InlineKeyboardButton(f"{label} ({price})", callback_data=f"shopbuy:{item_id}")])
     buttons.append([InlineKeyboardButton(t(lang, "back_main_menu"), callback_data="game:home")])
     await _respond(update_or_query, "\n".join(lines), reply_markup=InlineKeyboardMarkup(buttons))
@@ -2753,12 +3124,19 @@ def parse_username(text: str) -> Optional[str]:
     return txt
 
 
+_NO_CONTACT = ShopContact()
+
+
 def shop_contact_from_saved(user_id: int):
-    contact = db.get_contact(user_id)
-    if contact:
-        full_name, email, address, size = contact
-        return full_name, email, address, size
-    return None, None, None, None
+    return db.get_contact(user_id) or _NO_CONTACT
+
+
+def merge_contact(data: Optional[dict] = None, saved=None) -> ShopContact:
+    """Shop-flow contact: values from `data` where set, else from the saved row."""
+    contact = ShopContact(*saved) if saved else _NO_CONTACT
+    if data:
+        contact = contact._replace(**{k: data[k] for k in ShopContact._fields if data.get(k)})
+    return contact
 
 
 def shop_item_label(lang: str, code: str, kind: str, fallback: str) -> str:
@@ -2772,32 +3150,44 @@ def shop_item_label(lang: str, code: str, kind: str, fallback: str) -> str:
     return fallback
 
 
+_GIFT_NOTIFY_CONCURRENCY = 5
+
+
 async def deliver_pending_gifts(user_id: int, username: Optional[str], context: ContextTypes.DEFAULT_TYPE):
     """Notify user about any gifts waiting for them."""
     pending = db.pending_gifts_for_user(user_id, username)
     if not pending:
         return
     lang = lang_for_user(user_id)
-    for pid, buyer_id, item_id, recipient_username, data_json, item_name, item_kind in pending:
+    sem = asyncio.Semaphore(_GIFT_NOTIFY_CONCURRENCY)
+    received_text = formatter(lang, "shop_gift_received")
+
+    async def _deliver(pid, buyer_id, item_name):
         buyer_basic = db.get_user_basic(buyer_id)
         buyer_username = buyer_basic[0] if buyer_basic else None
         sender_label = format_username(buyer_username, buyer_id)
         kb = InlineKeyboardMarkup(
             [[InlineKeyboardButton(t(lang, "shop_fill_button"), callback_data=f"giftfill:{pid}")]]
         )
-        try:
-            await context.bot.send_message(
-                chat_id=user_id,
-                text=t(lang, "shop_gift_received", item=item_name, sender=sender_label),
-                reply_markup=kb,
-            )
-            db.set_purchase_recipient(pid, user_id, username)
-            db.mark_purchase_notified(pid)
-        except Exception as e:
-            logger.warning("Failed to notify gift recipient %s for purchase %s: %s", user_id, pid, e)
+        async with sem:
+            try:
+                await context.bot.send_message(
+                    chat_id=user_id,
+                    text=received_text(item=item_name, sender=sender_label),
+                    reply_markup=kb,
+                )
+            except Exception as e:
+                logger.warning("Failed to notify gift recipient %s for purchase %s: %s", user_id, pid, e)
+                return
+        db.mark_gift_delivered(pid, user_id, username)
+
+    await asyncio.gather(
+        *(_deliver(pid, buyer_id, item_name) for pid, buyer_id, _, _, _, item_name, _ in pending)
+    )
 
 
 async def shop_buy_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, item_id: int):
+    state = _state(context)
     user_id = ensure_user_context(update_or_query)
     lang = lang_for_user(user_id)
     item = db.get_shop_item(item_id)
@@ -2811,8 +3201,9 @@ async def shop_buy_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, it
         await _respond(update_or_query, t(lang, "shop_no_points", name=label, price=price, points=balance), reply_markup=game_menu_markup(lang, user_id))
         return ConversationHandler.END
 
-    context.user_data["shop_item"] = (item[0], code, label, kind, price)
-    context.user_data["shop_data"] = {"buyer": user_id}
+    state.clear_shop()
+    state.shop_item = (item[0], code, label, kind, price)
+    state.shop_data = {"buyer": user_id}
     buttons = [
         [InlineKeyboardButton(t(lang, "shop_keep"), callback_data="shop:keep")],
         [InlineKeyboardButton(t(lang, "shop_gift"), callback_data="shop:gift")],
@@ -2824,24 +3215,25 @@ async def shop_buy_start(update_or_query, context: ContextTypes.DEFAULT_TYPE, it
 async def shop_buy_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    _, item_id = query.data.split(":")
+    item_id = query.data.partition(":")[2]
     return await shop_buy_start(query, context, int(item_id))
 
 
 async def shop_keep_gift_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     query = update.callback_query
     await query.answer()
     user_id = ensure_user_context(query)
     lang = lang_for_user(user_id)
-    choice = query.data.split(":")[1]
-    item = context.user_data.get("shop_item")
+    choice = query.data.partition(":")[2]
+    item = state.shop_item
     if not item:
         await query.message.reply_text(t(lang, "shop_empty"))
         return ConversationHandler.END
     _, code, name, kind, price = item
-    context.user_data["shop_recipient_id"] = None
-    context.user_data["shop_recipient_username"] = None
-    context.user_data["shop_skip_details"] = False
+    state.shop_recipient_id = None
+    state.shop_recipient_username = None
+    state.shop_skip_details = False
     if choice == "gift":
         await query.message.reply_text(t(lang, "shop_enter_recipient"))
         return config.SHOP_RECIPIENT
@@ -2849,16 +3241,17 @@ async def shop_keep_gift_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def shop_recipient_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
     username = parse_username(update.message.text or "")
     if not username:
         await update.message.reply_text(t(lang, "shop_recipient_invalid"))
         return config.SHOP_RECIPIENT
-    context.user_data["shop_recipient_username"] = username
-    context.user_data["shop_recipient_id"] = None  # we don't resolve id reliably
+    state.shop_recipient_username = username
+    state.shop_recipient_id = None  # we don't resolve id reliably
     await update.message.reply_text(t(lang, "shop_recipient_saved", username=f"@{username}"))
-    item = context.user_data.get("shop_item")
+    item = state.shop_item
     if not item:
         return ConversationHandler.END
     _, code, name, kind, price = item
@@ -2872,26 +3265,28 @@ async def shop_recipient_text(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 async def shop_fill_who_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     query = update.callback_query
     await query.answer()
     user_id = ensure_user_context(query)
     lang = lang_for_user(user_id)
-    choice = query.data.split(":")[1]
-    item = context.user_data.get("shop_item")
+    choice = query.data.partition(":")[2]
+    item = state.shop_item
     if not item:
         return ConversationHandler.END
     _, code, name, kind, price = item
     if choice == "recipient":
-        context.user_data["shop_skip_details"] = True
+        state.shop_skip_details = True
         return await shop_finalize(query, context, user_id)
-    context.user_data["shop_skip_details"] = False
+    state.shop_skip_details = False
     return await shop_collect_details(query, context, user_id, kind)
 
 
 async def shop_collect_details(update_or_query, context: ContextTypes.DEFAULT_TYPE, user_id: int, kind: str):
+    state = _state(context)
     lang = lang_for_user(user_id)
     saved_name, saved_email, saved_address, saved_size = shop_contact_from_saved(user_id)
-    context.user_data["shop_contact"] = {"full_name": None, "email": None, "address": None, "size": None}
+    state.shop_contact = merge_contact()
 
     # Tickets need name/email
     if kind == "ticket":
@@ -2908,8 +3303,7 @@ async def shop_collect_details(update_or_query, context: ContextTypes.DEFAULT_TY
     # Hoodie needs size/address; reuse name/email if present
     if kind == "hoodie":
         if saved_name and saved_email:
-            context.user_data["shop_contact"]["full_name"] = saved_name
-            context.user_data["shop_contact"]["email"] = saved_email
+            state.shop_contact = state.shop_contact._replace(full_name=saved_name, email=saved_email)
         await _respond(update_or_query, t(lang, "shop_hoodie_size"))
         return config.SHOP_SIZE
 
@@ -2930,15 +3324,16 @@ async def shop_collect_details(update_or_query, context: ContextTypes.DEFAULT_TY
 
 
 async def shop_use_contact_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     query = update.callback_query
     await query.answer()
     user_id = ensure_user_context(query)
     lang = lang_for_user(user_id)
-    choice = query.data.split(":")[1]
+    choice = query.data.partition(":")[2]
     saved_name, saved_email, saved_address, saved_size = shop_contact_from_saved(user_id)
     if choice == "usecontact" and saved_name and saved_email:
-        context.user_data["shop_contact"] = {"full_name": saved_name, "email": saved_email, "address": saved_address, "size": saved_size}
-        item = context.user_data.get("shop_item")
+        state.shop_contact = merge_contact(saved=(saved_name, saved_email, saved_address, saved_size))
+        item = state.shop_item
         if not item:
             return ConversationHandler.END
         _, code, name, kind, price = item
@@ -2953,31 +3348,32 @@ async def shop_use_contact_cb(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 async def shop_name_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    context.user_data.setdefault("shop_contact", {})
-    context.user_data["shop_contact"]["full_name"] = update.message.text.strip()
+    state.shop_contact = state.shop_contact._replace(full_name=update.message.text.strip())
     # If email already present (e.g., from saved contact), skip asking
-    if context.user_data["shop_contact"].get("email"):
+    if state.shop_contact.email:
         return await shop_email_text(update, context)
     await update.message.reply_text(t(lang, "shop_ticket_email"))
     return config.SHOP_EMAIL
 
 
 async def gift_contact_new_flow(update_or_query, context: ContextTypes.DEFAULT_TYPE, user_id: int, item_kind: str, item_name: str, fresh_prompt: bool = False):
+    state = _state(context)
     lang = lang_for_user(user_id)
-    contact = context.user_data.get("shop_contact", {})
+    contact = state.shop_contact
     if item_kind in ("ticket", "bottle"):
         if fresh_prompt:
             await _respond(update_or_query, t(lang, "shop_fill_prompt", item=item_name))
-        if contact.get("full_name") and contact.get("email"):
+        if contact.full_name and contact.email:
             return await shop_finalize(update_or_query, context, user_id)
         await _respond(update_or_query, t(lang, "shop_ticket_name"))
         return config.SHOP_NAME
     if item_kind == "hoodie":
-        need_name = not contact.get("full_name") or not contact.get("email")
-        need_size = not contact.get("size")
-        need_addr = not contact.get("address")
+        need_name = not contact.full_name or not contact.email
+        need_size = not contact.size
+        need_addr = not contact.address
         if fresh_prompt:
             await _respond(update_or_query, t(lang, "shop_fill_prompt", item=item_name))
         if need_name:
@@ -2994,36 +3390,31 @@ async def gift_contact_new_flow(update_or_query, context: ContextTypes.DEFAULT_T
 
 
 async def gift_contact_choice_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     query = update.callback_query
     await query.answer()
     user_id = ensure_user_context(query)
     lang = lang_for_user(user_id)
-    choice = query.data.split(":")[1]
-    item = context.user_data.get("shop_item")
+    choice = query.data.partition(":")[2]
+    item = state.shop_item
     if not item:
         return ConversationHandler.END
     _, code, name, kind, price = item
     saved = db.get_contact(user_id)
     if choice == "use" and saved:
-        full_name_saved, email_saved, address_saved, size_saved = saved
-        context.user_data["shop_contact"] = {
-            "full_name": full_name_saved,
-            "email": email_saved,
-            "address": address_saved,
-            "size": size_saved,
-        }
+        state.shop_contact = merge_contact(saved=saved)
         return await gift_contact_new_flow(query, context, user_id, kind, name)
     # new info: clear contact so they enter fresh
-    context.user_data["shop_contact"] = {"full_name": None, "email": None, "address": None, "size": None}
+    state.shop_contact = merge_contact()
     return await gift_contact_new_flow(query, context, user_id, kind, name, fresh_prompt=True)
 
 
 async def shop_email_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    context.user_data.setdefault("shop_contact", {})
-    context.user_data["shop_contact"]["email"] = update.message.text.strip()
-    item = context.user_data.get("shop_item")
+    state.shop_contact = state.shop_contact._replace(email=update.message.text.strip())
+    item = state.shop_item
     if not item:
         return ConversationHandler.END
     _, code, name, kind, price = item
@@ -3038,23 +3429,24 @@ async def shop_email_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def shop_size_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    context.user_data.setdefault("shop_contact", {})
-    context.user_data["shop_contact"]["size"] = update.message.text.strip()
+    state.shop_contact = state.shop_contact._replace(size=update.message.text.strip())
     await update.message.reply_text(t(lang, "shop_hoodie_address"))
     return config.SHOP_ADDRESS
 
 
 async def shop_address_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     user_id = ensure_user_context(update)
     lang = lang_for_user(user_id)
-    context.user_data.setdefault("shop_contact", {})
-    context.user_data["shop_contact"]["address"] = update.message.text.strip()
+    state.shop_contact = state.shop_contact._replace(address=update.message.text.strip())
     return await shop_finalize(update, context, user_id)
 
 
 async def gift_fill_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    state = _state(context)
     query = update.callback_query
     await query.answer()
     user_id = ensure_user_context(query)
@@ -3083,21 +3475,16 @@ async def gift_fill_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         data = json.loads(data_json) if data_json else {}
     except Exception:
         data = {}
-    saved_contact = db.get_contact(user_id)
-    full_name_saved, email_saved, address_saved, size_saved = saved_contact if saved_contact else (None, None, None, None)
-    context.user_data["shop_item"] = (item_id, item_code, shop_item_label(lang, item_code, item_kind, item_name), item_kind, price)
-    context.user_data["shop_purchase_id"] = pid
-    context.user_data["shop_contact"] = {
-        "full_name": data.get("full_name") or full_name_saved,
-        "email": data.get("email") or email_saved,
-        "address": data.get("address") or address_saved,
-        "size": data.get("size") or size_saved,
-    }
-    context.user_data["shop_recipient_id"] = user_id
-    context.user_data["shop_recipient_username"] = query.from_user.username
-    context.user_data["shop_skip_details"] = False
-    context.user_data["shop_purchase_id"] = pid
-    contact = context.user_data["shop_contact"]
+    saved_contact = shop_contact_from_saved(user_id)
+    full_name_saved, email_saved, address_saved, size_saved = saved_contact
+    state.shop_item = (item_id, item_code, shop_item_label(lang, item_code, item_kind, item_name), item_kind, price)
+    state.shop_purchase_id = pid
+    state.shop_contact = merge_contact(data, saved_contact)
+    state.shop_recipient_id = user_id
+    state.shop_recipient_username = query.from_user.username
+    state.shop_skip_details = False
+    state.shop_purchase_id = pid
+    contact = state.shop_contact
     # If we have saved contact, offer reuse
     if full_name_saved or email_saved or address_saved or size_saved:
         buttons = [
@@ -3110,23 +3497,64 @@ async def gift_fill_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return await gift_contact_new_flow(query, context, user_id, item_kind, item_name)
 
 
+async def _notify_admin_purchase(bot, pid: int, item: str, kind: str, buyer: str, recipient: str, data: str) -> None:
+    """Post a purchase card with a "mark done" button to the admin via the outbound queue."""
+    admin_lang = lang_for_user(config.ADMIN_ID)
+    text = t(admin_lang, "shop_admin_new_purchase", pid=pid, item=item, kind=kind, buyer=buyer, recipient=recipient, data=data)
+    kb = InlineKeyboardMarkup([[InlineKeyboardButton(t(admin_lang, "shop_admin_mark_done"), callback_data=f"pdone:{pid}")]])
+    if notifier.enqueue(config.ADMIN_ID, text, reply_markup=kb):
+        return
+    try:
+        await bot.send_message(chat_id=config.ADMIN_ID, text=text, reply_markup=kb)
+    except Exception:
+        pass
+
+
+async def _notify_gift_recipient(bot, pid: int, target_id: int, item_name: str, sender_label: str) -> bool:
+    """Tell a known recipient about their gift; returns True once they've been messaged."""
+    if not db.user_exists(target_id):
+        return False
+    lang_rec = lang_for_user(target_id)
+    kb = InlineKeyboardMarkup([[InlineKeyboardButton(t(lang_rec, "shop_fill_button"), callback_data=f"giftfill:{pid}")]])
+    try:
+        await bot.send_message(
+            chat_id=target_id,
+            text=t(lang_rec, "shop_gift_received", item=item_name, sender=sender_label),
+            reply_markup=kb,
+        )
+    except Exception as e:
+        logger.warning("Failed to notify gift recipient %s for purchase %s: %s", target_id, pid, e)
+        return False
+    db.mark_purchase_notified(pid)
+    return True
+
+
 async def shop_finalize(update_or_query, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    state = _state(context)
     lang = lang_for_user(user_id)
-    item = context.user_data.get("shop_item")
+    item = state.shop_item
     if not item:
         return ConversationHandler.END
     item_id, code, name, kind, price = item
-    contact = context.user_data.get("shop_contact", {})
-    recipient_id = context.user_data.get("shop_recipient_id")
-    recipient_username = context.user_data.get("shop_recipient_username")
-    skip_details = context.user_data.get("shop_skip_details")
-    existing_purchase_id = context.user_data.get("shop_purchase_id")
+    contact = state.shop_contact
+    recipient_id = state.shop_recipient_id
+    recipient_username = state.shop_recipient_username
+    skip_details = state.shop_skip_details
+    existing_purchase_id = state.shop_purchase_id
     new_purchase = existing_purchase_id is None
     buyer_id_orig = user_id
+    already_notified = False
+    tg_user = update_or_query.effective_user if isinstance(update_or_query, Update) else update_or_query.from_user
+    if tg_user and tg_user.id == user_id:
+        buyer_username = tg_user.username
+    else:
+        # Guest mode maps the admin to a phantom id; use that account's stored name.
+        buyer_basic = db.get_user_basic(user_id)
+        buyer_username = buyer_basic[0] if buyer_basic else None
     if existing_purchase_id:
         meta = db.get_purchase(existing_purchase_id)
         if meta:
-            _, buyer_id_orig, _, _, _, _, _, _, _, _, price_db, _ = meta
+            _, buyer_id_orig, _, _, _, _, _, already_notified, _, _, price_db, _ = meta
             if price_db:
                 price = price_db
 
@@ -3135,124 +3563,80 @@ async def shop_finalize(update_or_query, context: ContextTypes.DEFAULT_TYPE, use
         resolved = db.find_user_by_username(recipient_username)
         if resolved:
             recipient_id = resolved
-            context.user_data["shop_recipient_id"] = resolved
-
-    # charge balance only for new purchases
-    if new_purchase:
-        balance = db.get_balance(user_id)
-        if balance < price:
-            await _respond(update_or_query, t(lang, "shop_no_points", name=name, price=price, points=balance), reply_markup=game_menu_markup(lang, user_id))
-            return ConversationHandler.END
-        db.adjust_balance(user_id, -price)
-        db.increment_stat(user_id, "purchases")
-        db.increment_stat(user_id, "shop_spent", price)
-
-    # persist contact
-    if not skip_details:
-        db.upsert_contact(user_id, contact.get("full_name"), contact.get("email"), contact.get("address"), contact.get("size"))
+            state.shop_recipient_id = resolved
 
     data = {
-        "full_name": contact.get("full_name"),
-        "email": contact.get("email"),
-        "address": contact.get("address"),
-        "size": contact.get("size"),
+        "full_name": contact.full_name,
+        "email": contact.email,
+        "address": contact.address,
+        "size": contact.size,
         "kind": kind,
         "filled_by": "recipient" if skip_details else "buyer",
     }
+    data_json = json.dumps(data, ensure_ascii=False)
+    data_pretty = json.dumps(data, ensure_ascii=False, indent=2)
+    contact_row = None
+    if not skip_details:
+        contact_row = tuple(contact)
     if new_purchase:
-        pid = db.create_purchase(
-            buyer_id=user_id,
-            item_id=item_id,
-            recipient_id=recipient_id,
-            recipient_username=recipient_username,
-            data=json.dumps(data, ensure_ascii=False),
-        )
+        # charge, contact and purchase row land in one commit
+        result = db.finalize_purchase(user_id, price, item_id, recipient_id, recipient_username, data_json, contact_row)
+        if result is None:
+            points = db.get_balance(user_id)
+            await _respond(update_or_query, t(lang, "shop_no_points", name=name, price=price, points=points), reply_markup=game_menu_markup(lang, user_id))
+            return ConversationHandler.END
+        pid, balance = result
     else:
         pid = existing_purchase_id
-        db.update_purchase_data(pid, json.dumps(data, ensure_ascii=False))
+        with db.transaction():
+            if contact_row:
+                db.upsert_contact(user_id, *contact_row)
+            db.update_purchase_data(pid, data_json)
+            if not already_notified:
+                db.mark_purchase_notified(pid)
 
     # Notify buyer
     if not new_purchase:
-        db.mark_purchase_notified(pid)
         await _respond(update_or_query, t(lang, "shop_fill_saved"))
         # Notify admin with updated data
-        admin_id = config.ADMIN_ID
-        admin_lang = lang_for_user(admin_id)
         buyer_basic = db.get_user_basic(buyer_id_orig)
         buyer_label = format_username(buyer_basic[0] if buyer_basic else None, buyer_id_orig)
         recipient_label = format_username(recipient_username, recipient_id or recipient_username or buyer_id_orig)
-        try:
-            await update_or_query.get_bot().send_message(
-                chat_id=admin_id,
-                text=t(admin_lang, "shop_admin_new_purchase", pid=pid, item=name, kind=kind, buyer=buyer_label, recipient=recipient_label, data=json.dumps(data, ensure_ascii=False, indent=2)),
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton(t(admin_lang, "shop_admin_mark_done"), callback_data=f"pdone:{pid}")]]),
-            )
-        except Exception:
-            pass
+        await _notify_admin_purchase(update_or_query.get_bot(), pid, name, kind, buyer_label, recipient_label, data_pretty)
         await send_start_message(update_or_query, lang, user_id)
         return ConversationHandler.END
     else:
         if kind == "ticket":
-            await _respond(update_or_query, t(lang, "shop_ticket_done") + "\n" + t(lang, "shop_balance_after", points=db.get_balance(user_id)), reply_markup=game_menu_markup(lang, user_id))
+            await _respond(update_or_query, t(lang, "shop_ticket_done") + "\n" + t(lang, "shop_balance_after", points=balance), reply_markup=game_menu_markup(lang, user_id))
         elif kind == "hoodie":
-            await _respond(update_or_query, t(lang, "shop_hoodie_done") + "\n" + t(lang, "shop_balance_after", points=db.get_balance(user_id)), reply_markup=game_menu_markup(lang, user_id))
+            await _respond(update_or_query, t(lang, "shop_hoodie_done") + "\n" + t(lang, "shop_balance_after", points=balance), reply_markup=game_menu_markup(lang, user_id))
         elif kind == "bottle":
-            await _respond(update_or_query, t(lang, "shop_bottle_done") + "\n" + t(lang, "shop_balance_after", points=db.get_balance(user_id)), reply_markup=game_menu_markup(lang, user_id))
+            await _respond(update_or_query, t(lang, "shop_bottle_done") + "\n" + t(lang, "shop_balance_after", points=balance), reply_markup=game_menu_markup(lang, user_id))
 
     # Notify recipient if this is a gift and this is a new purchase (not when recipient is filling)
-    if new_purchase and (recipient_username or (recipient_id and recipient_id != user_id)):
-        bot_username = getattr(context.bot, "username", None) if context and context.bot else None
+    if recipient_username or (recipient_id and recipient_id != user_id):
         recipient_label = format_username(recipient_username, recipient_id or recipient_username or "")
-        notified = False
-        target_id = recipient_id if recipient_id else None
-        if target_id and db.user_exists(target_id):
-            try:
-                buyer_basic = db.get_user_basic(user_id)
-                buyer_username = buyer_basic[0] if buyer_basic else None
-                sender_label = format_username(buyer_username, user_id)
-                lang_rec = lang_for_user(target_id)
-                kb = InlineKeyboardMarkup(
-                    [[InlineKeyboardButton(t(lang_rec, "shop_fill_button"), callback_data=f"giftfill:{pid}")]]
-                )
-                await context.bot.send_message(
-                    chat_id=target_id,
-                    text=t(lang_rec, "shop_gift_received", item=name, sender=sender_label),
-                    reply_markup=kb,
-                )
-                db.mark_purchase_notified(pid)
-                notified = True
-            except Exception as e:
-                logger.warning("Failed to notify gift recipient %s for purchase %s: %s", target_id, pid, e)
-    if notified:
-        await _respond(update_or_query, t(lang, "shop_gift_notified_sender", recipient=recipient_label))
-    else:
-        invite_link = f"https://t.me/{bot_username}" if bot_username else (f"@{recipient_username}" if recipient_username else "")
-        rec_display = f"@{recipient_username}" if recipient_username else recipient_label
-        await _respond(update_or_query, t(lang, "shop_gift_pending_sender", recipient=rec_display, link=invite_link))
+        sender_label = format_username(buyer_username, user_id)
+        if recipient_id and await _notify_gift_recipient(context.bot, pid, recipient_id, name, sender_label):
+            await _respond(update_or_query, t(lang, "shop_gift_notified_sender", recipient=recipient_label))
+        else:
+            invite_link = f"https://t.me/{_BOT_USERNAME}" if _BOT_USERNAME else (f"@{recipient_username}" if recipient_username else "")
+            rec_display = f"@{recipient_username}" if recipient_username else recipient_label
+            await _respond(update_or_query, t(lang, "shop_gift_pending_sender", recipient=rec_display, link=invite_link))
 
     # Notify admin (buyer id)
-    admin_id = config.ADMIN_ID
-    try:
-        buyer = f"@{update_or_query.effective_user.username}" if update_or_query.effective_user and update_or_query.effective_user.username else str(user_id)
-    except Exception:
-        buyer = str(user_id)
+    buyer = format_username(buyer_username, user_id)
     recipient_label = f"@{recipient_username}" if recipient_username else (str(recipient_id) if recipient_id else "self")
-    admin_lang = lang_for_user(admin_id)
-    try:
-        await update_or_query.get_bot().send_message(
-            chat_id=admin_id,
-            text=t(admin_lang, "shop_admin_new_purchase", pid=pid, item=name, kind=kind, buyer=buyer, recipient=recipient_label, data=json.dumps(data, ensure_ascii=False, indent=2)),
-            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton(t(admin_lang, "shop_admin_mark_done"), callback_data=f"pdone:{pid}")]]),
-        )
-    except Exception:
-        pass
+    await _notify_admin_purchase(update_or_query.get_bot(), pid, name, kind, buyer, recipient_label, data_pretty)
 
     # Clear context
-    for key in ["shop_item", "shop_data", "shop_recipient_id", "shop_recipient_username", "shop_contact"]:
-        context.user_data.pop(key, None)
+    state.clear_shop()
     return ConversationHandler.END
 
 
+_ADMIN_FANOUT_CONCURRENCY = 3
+
+
 async def admin_purchases(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = ensure_user_context(update)
     if not is_admin(user_id):
@@ -3262,19 +3646,38 @@ async def admin_purchases(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not rows:
         await update.message.reply_text(t(lang, "shop_purchases_empty"))
         return
-    for pid, buyer_id, item_id, recipient_id, recipient_username, data, status, created_at, name, kind, price in rows:
-        text = t(
-            lang,
-            "shop_admin_new_purchase",
-            pid=pid,
-            item=name,
-            kind=kind,
-            buyer=buyer_id,
-            recipient=recipient_username or recipient_id or "self",
-            data=data,
+    purchase_text = formatter(lang, "shop_admin_new_purchase")
+    done_label = t(lang, "shop_admin_mark_done")
+    messages = [
+        (
+            purchase_text(
+                pid=pid,
+                item=name,
+                kind=kind,
+                buyer=buyer_id,
+                recipient=recipient_username or recipient_id or "self",
+                data=data,
+            ),
+            InlineKeyboardMarkup([[InlineKeyboardButton(done_label, callback_data=f"pdone:{pid}")]]),
         )
-        kb = InlineKeyboardMarkup([[InlineKeyboardButton(t(lang, "shop_admin_mark_done"), callback_data=f"pdone:{pid}")]])
-        await update.message.reply_text(text, reply_markup=kb)
+        for pid, buyer_id, item_id, recipient_id, recipient_username, data, status, created_at, name, kind, price in rows
+    ]
+    # Each card carries its own id, so a few in flight at once is fine; keep it
+    # small since they all go to the same chat.
+    sem = asyncio.Semaphore(_ADMIN_FANOUT_CONCURRENCY)
+
+    async def _send(text, kb):
+        async with sem:
+            try:
+                await update.message.reply_text(text, reply_markup=kb)
+            except RetryAfter as e:
+                await asyncio.sleep(float(e.retry_after))
+                await update.message.reply_text(text, reply_markup=kb)
+
+    results = await asyncio.gather(*(_send(text, kb) for text, kb in messages), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Failed to list purchase: %s", result)
 
 
 async def admin_purchase_done(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -3309,6 +3712,19 @@ async def buy_item(update_or_query, item_id: int) -> None:
     )))
 
 
+@lru_cache(maxsize=None)
+def _voter_gender_keyboard(lang: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(
+        [
+            [
+                InlineKeyboardButton(f"👦 {t(lang, 'gender_button_prompt')}", callback_data="votergender:Male"),
+                InlineKeyboardButton(f"👧 {t(lang, 'gender_button_prompt_female')}", callback_data="votergender:Female"),
+            ]
+        ]
+    )
+
+
+@lru_cache(maxsize=4096)
 def build_rating_keyboard(cid: int) -> InlineKeyboardMarkup:
     row1 = [
         InlineKeyboardButton(str(i), callback_data=f"rate:{cid}:{i}") for i in range(1, 6)
@@ -3319,6 +3735,22 @@ def build_rating_keyboard(cid: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup([row1, row2])
 
 
+@lru_cache(maxsize=None)
+def _rating_caption(lang: str):
+    """Bound format for the whole rating card caption (one template per language)."""
+    return "\n".join(
+        [
+            template(lang, "participant_number"),
+            template(lang, "label_name"),
+            template(lang, "label_age"),
+            template(lang, "label_gender"),
+            template(lang, "label_instagram"),
+            "",
+            template(lang, "rate_prompt"),
+        ]
+    ).format
+
+
 async def send_next_rating_candidate(update_or_query, user_id: int, target_gender: Optional[str]):
     lang = lang_for_user(user_id)
     row = db.get_next_unrated_candidate(user_id, target_gender)
@@ -3347,21 +3779,13 @@ async def send_next_rating_candidate(update_or_query, user_id: int, target_gende
 
     cid, name, age, gender, instagram, photo_id = row
     first_name, _ = split_name(name)
-    caption_lines = [
-        t(lang, "participant_number", cid=cid),
-        t(lang, "label_name", name=first_name),
-        t(lang, "label_age", age=age),
-        t(lang, "label_gender", gender=gender),
-        t(lang, "label_instagram", instagram=instagram if instagram else "—"),
-        "",
-        t(lang, "rate_prompt"),
-    ]
+    caption = _rating_caption(lang)(cid=cid, name=first_name, age=age, gender=gender, instagram=instagram or "—")
     keyboard = build_rating_keyboard(cid)
 
     if isinstance(update_or_query, Update):
         await update_or_query.message.reply_photo(
             photo=photo_id,
-            caption="\n".join(caption_lines),
+            caption=caption,
             reply_markup=keyboard,
         )
     else:
@@ -3369,14 +3793,14 @@ async def send_next_rating_candidate(update_or_query, user_id: int, target_gende
             await update_or_query.edit_message_media(
                 media=InputMediaPhoto(
                     media=photo_id,
-                    caption="\n".join(caption_lines),
+                    caption=caption,
                 ),
                 reply_markup=keyboard,
             )
         else:
             await update_or_query.message.reply_photo(
                 photo=photo_id,
-                caption="\n".join(caption_lines),
+                caption=caption,
                 reply_markup=keyboard,
             )
 
@@ -3396,20 +3820,7 @@ async def vote_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             voter_gender = profile[2]
             db.set_user_gender(user_id, voter_gender)
     if not voter_gender:
-        keyboard = InlineKeyboardMarkup(
-            [
-                [
-                    InlineKeyboardButton(
-                        f"👦 {t(lang, 'gender_button_prompt')}",
-                        callback_data="votergender:Male",
-                    ),
-                    InlineKeyboardButton(
-                        f"👧 {t(lang, 'gender_button_prompt_female')}",
-                        callback_data="votergender:Female",
-                    ),
-                ]
-            ]
-        )
+        keyboard = _voter_gender_keyboard(lang)
         await update.message.reply_text(
             t(lang, "gender_prompt_vote"),
             reply_markup=keyboard,
@@ -3418,20 +3829,7 @@ async def vote_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     target_gender = target_gender_for_voter(voter_gender)
     if not target_gender:
-        keyboard = InlineKeyboardMarkup(
-            [
-                [
-                    InlineKeyboardButton(
-                        f"👦 {t(lang, 'gender_button_prompt')}",
-                        callback_data="votergender:Male",
-                    ),
-                    InlineKeyboardButton(
-                        f"👧 {t(lang, 'gender_button_prompt_female')}",
-                        callback_data="votergender:Female",
-                    ),
-                ]
-            ]
-        )
+        keyboard = _voter_gender_keyboard(lang)
         await update.message.reply_text(t(lang, "gender_choose_valid"), reply_markup=keyboard)
         return
 
@@ -3444,23 +3842,7 @@ async def results(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     lang = lang_for_user(update.effective_user.id)
 
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT c.id, c.name,
-               COUNT(v.id) as votes,
-               AVG(v.rating) as avg_rating
-        FROM candidates c
-        LEFT JOIN votes v ON c.id = v.candidate_id
-        WHERE c.approved = 1
-        GROUP BY c.id, c.name
-        ORDER BY (avg_rating IS NULL), avg_rating DESC, votes DESC
-        LIMIT 10
-        """
-    )
-    rows = cur.fetchall()
-    conn.close()
+    rows = db.top_candidates(10)
 
     if not rows:
         await update.message.reply_text(t(lang, "no_votes_yet"))
@@ -3476,6 +3858,9 @@ async def results(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("\n".join(lines))
 
 
+_BROADCAST_BATCH = 30
+
+
 async def broadcast_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ensure_user_context(update)
     if not is_admin(update.effective_user.id):
@@ -3486,15 +3871,34 @@ async def broadcast_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     message = " ".join(context.args)
     user_ids = db.get_all_user_ids()
+    bot = context.application.bot
+
+    async def _send(uid) -> bool:
+        for attempt in range(2):
+            try:
+                await bot.send_message(chat_id=uid, text=message)
+                return True
+            except RetryAfter as e:
+                if attempt:
+                    logger.warning("Broadcast failed to %s: %s", uid, e)
+                    return False
+                await asyncio.sleep(float(e.retry_after))
+            except Exception as e:
+                logger.warning("Broadcast failed to %s: %s", uid, e)
+                return False
+        return False
+
+    # Send one window of messages at a time, each window taking at least a
+    # second, to stay under Telegram's global limit of ~30 messages/sec.
     sent = 0
-    failed = 0
-    for uid in user_ids:
-        try:
-            await context.application.bot.send_message(chat_id=uid, text=message)
-            sent += 1
-        except Exception as e:
-            failed += 1
-            logger.warning("Broadcast failed to %s: %s", uid, e)
+    for start in range(0, len(user_ids), _BROADCAST_BATCH):
+        window_started = time.monotonic()
+        results = await asyncio.gather(*(_send(uid) for uid in user_ids[start:start + _BROADCAST_BATCH]))
+        sent += sum(results)
+        remaining = 1.0 - (time.monotonic() - window_started)
+        if remaining > 0 and start + _BROADCAST_BATCH < len(user_ids):
+            await asyncio.sleep(remaining)
+    failed = len(user_ids) - sent
     summary = t(lang, "broadcast_sent", count=sent)
     if failed:
         summary += " " + t(lang, "broadcast_failed", failed=failed)
@@ -3537,11 +3941,7 @@ async def edit_candidate_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await update.message.reply_text(t(lang, "gender_invalid_choice"))
             return
 
-    conn = sqlite3.connect(config.DB_PATH)
-    cur = conn.cursor()
-    cur.execute(f"UPDATE candidates SET {field} = ? WHERE id = ?", (value, cid))
-    conn.commit()
-    conn.close()
+    db.update_candidate_field(cid, field, value)
     await update.message.reply_text(t(lang, "edit_ok", cid=cid))
 
 
@@ -3566,6 +3966,27 @@ async def give_points_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@dataclass(frozen=True, slots=True)
+class _Boost:
+    id: Optional[str]
+    user_id: Optional[int]
+
+
+def _field(obj, name: str):
+    """Read `name` from a PTB object or from the raw dict of a _post() call."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _normalize_boost(boost) -> _Boost:
+    user = _field(_field(boost, "source"), "user") if boost is not None else None
+    return _Boost(
+        id=_field(boost, "boost_id") or _field(boost, "id"),
+        user_id=_field(user, "id") if user is not None else None,
+    )
+
+
 async def sync_boosts_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Admin: sync channel boosts and credit bonuses."""
     ensure_user_context(update)
@@ -3574,16 +3995,16 @@ async def sync_boosts_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     lang = lang_for_user(update.effective_user.id)
     # Short-circuit if we already learned this Bot API doesn't support getChatBoosts
     if context.bot_data.get("boosts_not_supported"):
-        await _respond(update, t(lang, "boost_not_supported"))
+        await _respond_update(update, t(lang, "boost_not_supported"))
         return
     if config.CHANNEL_ID in (0, -1000000000000):
-        await _respond(update, "Set CHANNEL_ID in config.py to your channel chat id first.")
+        await _respond_update(update, "Set CHANNEL_ID in config.py to your channel chat id first.")
         return
     try:
         await context.bot.get_chat(config.CHANNEL_ID)
     except Exception as e:
         logger.warning("Boost sync: cannot access channel %s: %s", config.CHANNEL_ID, e)
-        await _respond(
+        await _respond_update(
             update,
             t(lang, "boost_sync_error")
             + "\nCheck CHANNEL_ID and ensure the bot is an admin in that channel.",
@@ -3603,7 +4024,7 @@ async def sync_boosts_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         msg = t(lang, "boost_sync_error")
         if "Not Found" in str(e):
             msg += "\nThe Bot API server may not support getChatBoosts yet (needs Bot API 6.9+), or CHANNEL_ID is wrong."
-        await _respond(update, msg)
+        await _respond_update(update, msg)
         # If method is missing, remember to avoid spamming next time
         if "method not found" in str(e).lower():
             context.bot_data["boosts_not_supported"] = True
@@ -3615,46 +4036,26 @@ async def sync_boosts_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         boosts = list(raw_boosts)
 
-    credited = 0
-    skipped = 0
-    for boost in boosts:
-        boost_id = (
-            getattr(boost, "boost_id", None)
-            or getattr(boost, "id", None)
-            or (boost.get("boost_id") if isinstance(boost, dict) else None)
-            or (boost.get("id") if isinstance(boost, dict) else None)
-        )
-        if not boost_id:
-            continue
-        if db.boost_exists(boost_id):
-            skipped += 1
-            continue
-        source = getattr(boost, "source", None) if not isinstance(boost, dict) else boost.get("source")
-        user_obj = getattr(source, "user", None) if source and not isinstance(source, dict) else (
-            source.get("user") if isinstance(source, dict) else None
-        )
-        user_id = (
-            user_obj.id
-            if user_obj and hasattr(user_obj, "id")
-            else (user_obj.get("id") if isinstance(user_obj, dict) else None)
+    normalized = {}
+    for boost in map(_normalize_boost, boosts):
+        if boost.id and boost.id not in normalized:
+            normalized[boost.id] = boost.user_id
+    existing = db.existing_boost_ids(list(normalized))
+    new_boosts = [(boost_id, user_id) for boost_id, user_id in normalized.items() if boost_id not in existing]
+    db.credit_boosts(new_boosts, config.BOOST_BONUS)
+    boosters = [user_id for _, user_id in new_boosts if user_id]
+    credited = len(boosters)
+    skipped = len(normalized) - credited
+
+    # Hand the notices to the paced outbound queue instead of awaiting each send.
+    await asyncio.gather(
+        *(
+            _notify_user(context.bot, user_id, t(lang_for_user(user_id), "boost_reward_user", bonus=config.BOOST_BONUS))
+            for user_id in boosters
         )
-        db.add_boost(boost_id, user_id)
-        if user_id:
-            db.adjust_balance(user_id, config.BOOST_BONUS)
-            try:
-                user_lang = lang_for_user(user_id)
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text=t(user_lang, "boost_reward_user", bonus=config.BOOST_BONUS),
-                )
-            except Exception as notify_err:
-                logger.warning("Failed to notify booster %s: %s", user_id, notify_err)
-            db.mark_boost_credited(boost_id)
-            credited += 1
-        else:
-            skipped += 1
+    )
 
-    await _respond(update, t(lang, "boost_sync_ok", credited=credited, skipped=skipped))
+    await _respond_update(update, t(lang, "boost_sync_ok", credited=credited, skipped=skipped))
 
 # ---------- Admin ops ----------
 
@@ -3734,459 +4135,466 @@ async def wipe_profiles_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(t(lang, "tinder_wiped"))
 
 
-async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def _cb_earn_ref(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
     query = update.callback_query
-    try:
-        await query.answer()
-    except Exception:
-        pass
-    data = query.data
-    user_id = ensure_user_context(query)
+    lang = lang_for_user(user_id)
+    if not db.is_feature_enabled("referral"):
+        await _respond_query(query, t(lang, "feature_disabled"))
+        return
+    if _BOT_USERNAME:
+        link = f"https://t.me/{_BOT_USERNAME}?start=ref{user_id}"
+    else:
+        link = "/start ref<your_id>"
+    stats = db.get_user_stats(user_id)
+    ref_text = (
+        t(lang, "earn_referral", bonus=config.REFERRAL_BONUS, link=link)
+        + "\n"
+        + t(lang, "earn_referral_note")
+        + "\n\n"
+        + t(lang, "earn_referrals_count", count=stats.get("referrals", 0))
+    )
+    await _respond_query(query, ref_text)
 
-    try:
-        # --- game menu shortcuts ---
-        if data == "game:menu":
-            await send_game_menu(query)
-            return
-        if data == "game:checkin":
-            await handle_checkin(query)
-            return
-        if data == "game:balance":
-            await show_balance(query)
-            return
-        if data == "game:earn":
-            await send_earn_points(query, context)
-            return
-        if data == "santa:start":
-            await santa_start(query, context)
-            return
-        if data == "santa:edit":
-            await santa_edit_start(query, context)
-            return
-        if data == "earn:ref":
-            lang = lang_for_user(user_id)
-            if not db.is_feature_enabled("referral"):
-                await _respond(query, t(lang, "feature_disabled"))
-                return
-            bot_username = getattr(context.bot, "username", None)
-            if bot_username:
-                link = f"https://t.me/{bot_username}?start=ref{user_id}"
+
+async def _cb_earn_boost(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    if not db.is_feature_enabled("boost"):
+        await _respond_query(query, t(lang, "feature_disabled"))
+        return
+    channel = config.TELEGRAM_PROMO_URL or ""
+    stats = db.get_user_stats(user_id)
+    boost_text = t(
+        lang,
+        "earn_boost_info",
+        channel=channel,
+        boosts=stats.get("boosts_credited", 0),
+    )
+    await _respond_query(query, boost_text)
+
+
+async def _cb_home(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    lang = lang_for_user(user_id)
+    await send_start_message(update.callback_query, lang, user_id)
+
+
+async def _cb_submit_useprofile(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    if db.get_mode() != "collect":
+        await query.message.reply_text(t(lang, "applications_closed"))
+        return
+    if await ensure_candidate_from_profile(query, user_id, lang):
+        await query.message.reply_text(t(lang, "submit_profile_used"))
+        await send_start_message(query, lang, user_id)
+
+
+async def _cb_submit_editprofile(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    profile = db.get_profile(user_id)
+    if not profile:
+        await query.message.reply_text(t(lang, "submit_need_profile"))
+        return
+    context.user_data["edit_for_submit"] = True
+    context.user_data["contest_profile"] = profile
+    context.user_data["contest_media"] = db.list_profile_media(user_id)
+    await tinder_edit_menu(query, context)
+
+
+async def _cb_submit_saveprofile(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    if await ensure_candidate_from_contest(user_id, context, lang, query):
+        await query.message.reply_text(t(lang, "submit_profile_used"))
+        await send_start_message(query, lang, user_id)
+    context.user_data.pop("edit_for_submit", None)
+    context.user_data.pop("contest_profile", None)
+    context.user_data.pop("contest_media", None)
+
+
+async def _cb_submit_withdraw(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    db.delete_candidate_for_user(user_id)
+    await query.message.reply_text(t(lang, "submission_cancel"))
+    await send_start_message(query, lang, user_id)
+
+
+async def _cb_start_vote(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    query = update.callback_query
+    lang = lang_for_user(user_id)
+    if db.get_mode() != "vote":
+        await query.message.reply_text(
+            t(lang, "voting_not_open_yet"), reply_markup=start_voting_keyboard(lang)
+        )
+        return
+    voter_gender = db.get_user_gender(user_id)
+    if not voter_gender:
+        profile = db.get_profile(user_id)
+        if profile and profile[2]:
+            voter_gender = profile[2]
+            db.set_user_gender(user_id, voter_gender)
+    if not voter_gender:
+        keyboard = _voter_gender_keyboard(lang)
+        await query.message.reply_text(
+            t(lang, "gender_prompt_vote"),
+            reply_markup=keyboard,
+        )
+        return
+    target_gender = target_gender_for_voter(voter_gender)
+    if not target_gender:
+        keyboard = _voter_gender_keyboard(lang)
+        await query.message.reply_text(t(lang, "gender_choose_valid"), reply_markup=keyboard)
+        return
+    await send_next_rating_candidate(query, user_id, target_gender)
+
+
+async def _cb_tinder(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, action = parts
+    lang = lang_for_user(user_id)
+    if action == "browse":
+        await send_next_candidate_card(query, user_id, lang, context)
+    elif action == "edit":
+        await tinder_edit_menu(query, context)
+    elif action == "save":
+        await tinder_save_cb(update, context)
+    elif action == "snooze":
+        await send_start_message(query, lang, user_id)
+        return ConversationHandler.END
+    elif action == "viewmedia":
+        media = db.list_profile_media(user_id)
+        if media:
+            fid, kind = media[0]
+            caption = "Your media"
+            if kind == "video":
+                await query.message.reply_video(video=fid, caption=caption)
             else:
-                link = "/start ref<your_id>"
-            stats = db.get_user_stats(user_id)
-            ref_text = (
-                t(lang, "earn_referral", bonus=config.REFERRAL_BONUS, link=link)
-                + "\n"
-                + t(lang, "earn_referral_note")
-                + "\n\n"
-                + t(lang, "earn_referrals_count", count=stats.get("referrals", 0))
-            )
-            await _respond(query, ref_text)
-            return
-        if data == "earn:boost":
-            lang = lang_for_user(user_id)
-            if not db.is_feature_enabled("boost"):
-                await _respond(query, t(lang, "feature_disabled"))
-                return
-            channel = config.TELEGRAM_PROMO_URL or ""
-            stats = db.get_user_stats(user_id)
-            boost_text = t(
-                lang,
-                "earn_boost_info",
-                channel=channel,
-                boosts=stats.get("boosts_credited", 0),
-            )
-            await _respond(query, boost_text)
-            return
-        if data == "game:blackjack":
-            await start_blackjack(query, context)
-            return
-        if data == "game:shop":
-            await show_shop(query)
-            return
-        if data == "game:home":
-            lang = lang_for_user(user_id)
-            await send_start_message(query, lang, user_id)
-            return
+                await query.message.reply_photo(photo=fid, caption=caption)
+    elif action == "start":
+        profile = db.get_profile(user_id)
+        if profile:
+            await send_own_profile(query, user_id, lang, profile)
+        else:
+            await start_tinder_flow(query, context)
+    elif action == "adminreview":
+        await tinder_admin_review(query, context)
 
-        # --- contest profile actions ---
-        if data == "submit:useprofile":
-            lang = lang_for_user(user_id)
-            if db.get_mode() != "collect":
-                await query.message.reply_text(t(lang, "applications_closed"))
-                return
-            if await ensure_candidate_from_profile(query, user_id, lang):
-                await query.message.reply_text(t(lang, "submit_profile_used"))
-                await send_start_message(query, lang, user_id)
-            return
-        if data == "submit:editprofile":
-            lang = lang_for_user(user_id)
-            profile = db.get_profile(user_id)
-            if not profile:
-                await query.message.reply_text(t(lang, "submit_need_profile"))
-                return
-            context.user_data["edit_for_submit"] = True
-            context.user_data["contest_profile"] = profile
-            context.user_data["contest_media"] = db.list_profile_media(user_id)
-            await tinder_edit_menu(query, context)
+
+async def _cb_swipe(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, target_str, action = parts
+    target_id = int(target_str)
+    lang = lang_for_user(user_id)
+    _discard_liker(user_id, target_id)
+    if action == "like":
+        mutual = db.mark_like_and_check(user_id, target_id)
+        if mutual:
+            await _announce_match(context.bot, query.message, lang, user_id, query.from_user.username, target_id)
+        else:
+            target_lang = lang_for_user(target_id)
+            await _notify_user(context.bot, target_id, t(target_lang, "tinder_new_like"))
+    elif action == "pass":
+        db.mark_swipe(user_id, target_id, "dislike")
+    await send_next_candidate_card(query, user_id, lang, context)
+
+
+async def _cb_bjbet(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, bet_str = parts
+    await handle_bet_selection(query, context, int(bet_str))
+
+
+async def _cb_tadmin_edit_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    if not is_admin(user_id):
+        return
+    query = update.callback_query
+    _, uid_str = parts
+    target_id = int(uid_str)
+    lang = lang_for_user(user_id)
+    await admin_edit_menu(query, target_id, lang)
+
+
+async def _cb_tadmin(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    if not is_admin(user_id):
+        return
+    query = update.callback_query
+    _, uid_str, action = parts
+    current_id = int(uid_str)
+    lang = lang_for_user(user_id)
+    if action == "next":
+        version, prefetched = _ADMIN_NEXT_PREFETCH.pop(current_id, (None, None))
+        if prefetched and version == db.profiles_version():
+            next_row, next_media = prefetched
+            await show_admin_profile(query, next_row, lang, next_media)
             return
-        if data == "submit:saveprofile":
-            lang = lang_for_user(user_id)
-            if await ensure_candidate_from_contest(user_id, context, lang, query):
-                await query.message.reply_text(t(lang, "submit_profile_used"))
-                await send_start_message(query, lang, user_id)
-            context.user_data.pop("edit_for_submit", None)
-            context.user_data.pop("contest_profile", None)
-            context.user_data.pop("contest_media", None)
+        next_row = db.get_adjacent_profile(current_id, "next")
+        if not next_row:
+            await query.answer(t(lang, "tinder_no_more_profiles"), show_alert=True)
             return
-        if data == "submit:withdraw":
-            lang = lang_for_user(user_id)
-            db.delete_candidate_for_user(user_id)
-            await query.message.reply_text(t(lang, "submission_cancel"))
-            await send_start_message(query, lang, user_id)
+        await show_admin_profile(query, next_row, lang)
+    elif action == "prev":
+        prev_row = db.get_adjacent_profile(current_id, "prev")
+        if not prev_row:
+            await query.answer(t(lang, "tinder_no_more_profiles"), show_alert=True)
             return
-        if data == "submit:menu":
-            lang = lang_for_user(user_id)
-            await send_start_message(query, lang, user_id)
+        await send_admin_profile(query, prev_row, lang)
+    elif action == "toggle":
+        updated = db.toggle_profile_active(current_id)
+        if not updated:
+            await query.answer(t(lang, "tinder_admin_no_profiles"), show_alert=True)
             return
+        await send_admin_profile(query, updated, lang)
+    elif action == "edit":
+        await admin_edit_menu(query, current_id, lang)
+    elif action == "show":
+        row = db.get_profile(current_id)
+        await send_admin_profile(query, row, lang)
+    elif action == "purchases":
+        await admin_purchases(query, context)
+
+
+_ADMIN_EDIT_PROMPTS = {
+    "age": "tinder_age_prompt",
+    "gender": "tinder_gender_prompt",
+    "interest": "tinder_interest_prompt",
+    "city": "tinder_city_prompt",
+    "name": "tinder_name_prompt",
+    "bio": "tinder_bio_prompt",
+}
+
+
+async def _cb_tadmin_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    if not is_admin(user_id):
+        return
+    query = update.callback_query
+    _, uid_str, field = parts
+    target_id = int(uid_str)
+    lang = lang_for_user(user_id)
+    context.user_data["admin_edit_target"] = target_id
+    context.user_data["admin_edit_field"] = field
+    key = _ADMIN_EDIT_PROMPTS.get(field, "tinder_edit_prompt")
+    await query.message.reply_text(t(lang, key))
+    return config.TINDER_ADMIN_EDIT
 
-        # --- tinder-style browsing/edit ---
-        if data.startswith("tinder:"):
-            _, action = data.split(":")
-            lang = lang_for_user(user_id)
-            if action == "browse":
-                await send_next_candidate_card(query, user_id, lang, context)
-            elif action == "edit":
-                await tinder_edit_menu(query, context)
-            elif action == "save":
-                await tinder_save_cb(update, context)
-            elif action == "snooze":
-                await send_start_message(query, lang, user_id)
-                return ConversationHandler.END
-            elif action == "viewmedia":
-                media = db.list_profile_media(user_id)
-                if media:
-                    fid, kind = media[0]
-                    caption = "Your media"
-                    if kind == "video":
-                        await query.message.reply_video(video=fid, caption=caption)
-                    else:
-                        await query.message.reply_photo(photo=fid, caption=caption)
-            elif action == "start":
-                profile = db.get_profile(user_id)
-                if profile:
-                    await send_own_profile(query, user_id, lang)
-                else:
-                    await start_tinder_flow(query, context)
-            elif action == "adminreview":
-                await tinder_admin_review(query, context)
-            return
 
-        # --- swipes ---
-        if data.startswith("swipe:"):
-            _, target_str, action = data.split(":")
-            target_id = int(target_str)
-            lang = lang_for_user(user_id)
-            if action == "like":
-                mutual = db.mark_like_and_check(user_id, target_id)
-                if mutual:
-                    chat = await context.bot.get_chat(target_id)
-                    username = format_username(chat.username, target_id)
-                    await query.message.reply_text(t(lang, "tinder_match", username=username))
-                    target_lang = lang_for_user(target_id)
-                    me_un = query.from_user.username
-                    me_username = format_username(me_un, user_id)
-                    await context.bot.send_message(
-                        chat_id=target_id,
-                        text=t(target_lang, "tinder_match", username=me_username),
-                    )
-                else:
-                    target_lang = lang_for_user(target_id)
-                    try:
-                        await context.bot.send_message(
-                            chat_id=target_id,
-                            text=t(target_lang, "tinder_new_like"),
-                        )
-                    except Exception:
-                        pass
-            elif action == "pass":
-                db.mark_swipe(user_id, target_id, "dislike")
-            await send_next_candidate_card(query, user_id, lang, context)
-            return
+async def _cb_shopbuy(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    return await shop_buy_start(query, context, int(parts[1]))
 
-        # --- blackjack bets ---
-        if data.startswith("bjbet:"):
-            _, bet_str = data.split(":")
-            await handle_bet_selection(query, context, int(bet_str))
-            return
 
-        # --- tinder admin edit menu ---
-        if data.startswith("tadmineditmenu:"):
-            if not is_admin(user_id):
-                return
-            _, uid_str = data.split(":")
-            target_id = int(uid_str)
-            lang = lang_for_user(user_id)
-            await admin_edit_menu(query, target_id, lang)
-            return
+async def _cb_santa_nav(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    if len(parts) != 4 or parts[1] != "nav" or not parts[2].isdigit():
+        return
+    query = update.callback_query
+    current = int(parts[2])
+    action = parts[3]
+    lang = lang_for_user(user_id)
+    if action == "next":
+        nxt = db.get_next_santa_number(current)
+        if nxt:
+            await send_santa_card(query, nxt, lang)
+        else:
+            await query.answer(t(lang, "last_candidate_alert"), show_alert=True)
+    elif action == "prev":
+        prv = db.get_prev_santa_number(current)
+        if prv:
+            await send_santa_card(query, prv, lang)
+        else:
+            await query.answer(t(lang, "first_candidate_alert"), show_alert=True)
+    elif action == "stop":
+        await query.message.reply_text(t(lang, "submission_cancel"))
 
-        # --- tinder admin nav ---
-        if data.startswith("tadmin:"):
-            if not is_admin(user_id):
-                return
-            _, uid_str, action = data.split(":")
-            current_id = int(uid_str)
-            lang = lang_for_user(user_id)
-            if action == "next":
-                next_id = db.get_next_profile_id(current_id)
-                if not next_id:
-                    await query.answer(t(lang, "tinder_no_more_profiles"), show_alert=True)
-                    return
-                next_row = db.get_profile(next_id)
-                if not next_row:
-                    await query.answer(t(lang, "tinder_admin_no_profiles"), show_alert=True)
-                    return
-                await send_admin_profile(query, next_row, lang)
-            elif action == "prev":
-                prev_id = db.get_prev_profile_id(current_id)
-                if not prev_id:
-                    await query.answer(t(lang, "tinder_no_more_profiles"), show_alert=True)
-                    return
-                prev_row = db.get_profile(prev_id)
-                if not prev_row:
-                    await query.answer(t(lang, "tinder_admin_no_profiles"), show_alert=True)
-                    return
-                await send_admin_profile(query, prev_row, lang)
-            elif action == "toggle":
-                cur = db.get_profile(current_id)
-                if not cur:
-                    await query.answer(t(lang, "tinder_admin_no_profiles"), show_alert=True)
-                    return
-                active = cur[10]
-                db.set_profile_active(current_id, not active)
-                updated = db.get_profile(current_id)
-                await send_admin_profile(query, updated, lang)
-            elif action == "edit":
-                await query.answer()
-                await admin_edit_menu(query, current_id, lang)
-            elif action == "show":
-                row = db.get_profile(current_id)
-                await send_admin_profile(query, row, lang)
-            elif action == "purchases":
-                await admin_purchases(query, context)
-            return
 
-        # --- tinder admin field edit ---
-        if data.startswith("tadminedit:"):
-            if not is_admin(user_id):
-                return
-            _, uid_str, field = data.split(":")
-            target_id = int(uid_str)
-            lang = lang_for_user(user_id)
-            context.user_data["admin_edit_target"] = target_id
-            context.user_data["admin_edit_field"] = field
-            prompt_map = {
-                "age": "tinder_age_prompt",
-                "gender": "tinder_gender_prompt",
-                "interest": "tinder_interest_prompt",
-                "city": "tinder_city_prompt",
-                "name": "tinder_name_prompt",
-                "bio": "tinder_bio_prompt",
-            }
-            key = prompt_map.get(field, "tinder_edit_prompt")
-            await query.message.reply_text(t(lang, key))
-            return config.TINDER_ADMIN_EDIT
-
-        # --- blackjack actions ---
-        if data == "bj:hit":
-            await blackjack_hit(query)
-            return
-        if data == "bj:stand":
-            await blackjack_stand(query)
-            return
-        if data == "bj:double":
-            await blackjack_double(query)
-            return
+async def _cb_lang(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, lang_code = parts
+    db.set_user_language(user_id, lang_code)
+    lang = lang_for_user(user_id)
+    await query.message.reply_text(t(lang, "language_set"))
+    await send_start_message(query, lang, user_id)
+
+
+async def _cb_votergender(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, gender_value = parts
+    lang = lang_for_user(user_id)
+    existing_gender = db.get_user_gender(user_id)
+    if existing_gender and not is_admin(user_id):
+        target_gender = target_gender_for_voter(existing_gender)
+        lock_msg = t(lang, "gender_locked", existing_gender=existing_gender)
+        await query.message.reply_text(lock_msg)
+        if target_gender:
+            await send_next_rating_candidate(query, user_id, target_gender)
+        return
+    db.set_user_gender(user_id, gender_value)
+    target_gender = target_gender_for_voter(gender_value)
+    if not target_gender:
+        await query.message.reply_text(t(lang, "gender_choose_valid"))
+        return
+    await query.message.reply_text(t(lang, "gender_saved"))
+    await send_next_rating_candidate(query, user_id, target_gender)
 
-        # --- shop buy entry ---
-        if data.startswith("shopbuy:"):
-            _, item_id = data.split(":")
-            return await shop_buy_start(query, context, int(item_id))
-        # --- Santa navigation ---
-        if data.startswith("santa:nav:"):
-            parts = data.split(":")
-            if len(parts) != 4:
-                return
-            _, _, num_str, action = parts
-            current = int(num_str)
-            lang = lang_for_user(user_id)
-            if action == "next":
-                nxt = db.get_next_santa_number(current)
-                if nxt:
-                    await send_santa_card(query, nxt, lang)
-                else:
-                    await query.answer(t(lang, "last_candidate_alert"), show_alert=True)
-            elif action == "prev":
-                prv = db.get_prev_santa_number(current)
-                if prv:
-                    await send_santa_card(query, prv, lang)
-                else:
-                    await query.answer(t(lang, "first_candidate_alert"), show_alert=True)
-            elif action == "stop":
-                await query.message.reply_text(t(lang, "submission_cancel"))
-            return
 
-        # --- language change ---
-        if data.startswith("lang:"):
-            _, lang_code = data.split(":", 1)
-            db.set_user_language(user_id, lang_code)
-            lang = lang_for_user(user_id)
-            await query.message.reply_text(t(lang, "language_set"))
-            await send_start_message(query, lang, user_id)
+async def _cb_rate(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, cid_str, rating_str = parts
+    cid = int(cid_str)
+    rating = int(rating_str)
+    voter_gender = db.get_user_gender(user_id)
+    target_gender = target_gender_for_voter(voter_gender)
+    if not target_gender:
+        lang = lang_for_user(user_id)
+        keyboard = _voter_gender_keyboard(lang)
+        await query.message.reply_text(
+            t(lang, "gender_prompt_vote"),
+            reply_markup=keyboard,
+        )
+        return
+    db.add_vote(user_id, cid, rating)
+    await send_next_rating_candidate(query, user_id, target_gender)
+
+
+async def _cb_admin_candidate(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, cid_str, action = parts
+    cid = int(cid_str)
+    if not is_admin(user_id):
+        return
+    lang = lang_for_user(user_id)
+    if action == "approve":
+        db.approve_candidate(cid, 1)
+        row = db.get_candidate_by_id(cid)
+        if row:
+            await send_admin_candidate(query, row)
+    elif action == "reject":
+        db.approve_candidate(cid, -1)
+        row = db.get_candidate_by_id(cid)
+        if row:
+            await send_admin_candidate(query, row)
+    elif action == "next":
+        row = db.get_adjacent_candidate(cid, "next")
+        if not row:
+            await query.answer(t(lang, "last_candidate_alert"), show_alert=True)
             return
-        if data == "support:start":
-            await support_start(query, context)
+        await send_admin_candidate(query, row)
+    elif action == "prev":
+        row = db.get_adjacent_candidate(cid, "prev")
+        if not row:
+            await query.answer(t(lang, "first_candidate_alert"), show_alert=True)
             return
+        await send_admin_candidate(query, row)
 
-        # --- voting start ---
-        if data == "start:vote":
-            if db.get_mode() != "vote":
-                lang = lang_for_user(user_id)
-                await query.message.reply_text(
-                    t(lang, "voting_not_open_yet"), reply_markup=start_voting_keyboard(lang)
-                )
-                return
-            lang = lang_for_user(user_id)
-            voter_gender = db.get_user_gender(user_id)
-            if not voter_gender:
-                profile = db.get_profile(user_id)
-                if profile and profile[2]:
-                    voter_gender = profile[2]
-                    db.set_user_gender(user_id, voter_gender)
-            if not voter_gender:
-                keyboard = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                f"👦 {t(lang, 'gender_button_prompt')}", callback_data="votergender:Male"
-                            ),
-                            InlineKeyboardButton(
-                                f"👧 {t(lang, 'gender_button_prompt_female')}", callback_data="votergender:Female"
-                            ),
-                        ]
-                    ]
-                )
-                await query.message.reply_text(
-                    t(lang, "gender_prompt_vote"),
-                    reply_markup=keyboard,
-                )
-                return
-            target_gender = target_gender_for_voter(voter_gender)
-            if not target_gender:
-                keyboard = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                f"👦 {t(lang, 'gender_button_prompt')}", callback_data="votergender:Male"
-                            ),
-                            InlineKeyboardButton(
-                                f"👧 {t(lang, 'gender_button_prompt_female')}", callback_data="votergender:Female"
-                            ),
-                        ]
-                    ]
-                )
-                await query.message.reply_text(t(lang, "gender_choose_valid"), reply_markup=keyboard)
-                return
-            await send_next_rating_candidate(query, user_id, target_gender)
-            return
 
-        # --- voting gender selection ---
-        if data.startswith("votergender:"):
-            _, gender_value = data.split(":", 1)
-            lang = lang_for_user(user_id)
-            existing_gender = db.get_user_gender(user_id)
-            if existing_gender and not is_admin(user_id):
-                target_gender = target_gender_for_voter(existing_gender)
-                lock_msg = t(lang, "gender_locked", existing_gender=existing_gender)
-                await query.message.reply_text(lock_msg)
-                if target_gender:
-                    await send_next_rating_candidate(query, user_id, target_gender)
-                return
-            db.set_user_gender(user_id, gender_value)
-            target_gender = target_gender_for_voter(gender_value)
-            if not target_gender:
-                await query.message.reply_text(t(lang, "gender_choose_valid"))
-                return
-            lang = lang_for_user(user_id)
-            await query.message.reply_text(t(lang, "gender_saved"))
-            await send_next_rating_candidate(query, user_id, target_gender)
-            return
+async def _cb_usernav(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    query = update.callback_query
+    _, uid_str, action = parts
+    uid = int(uid_str)
+    if not is_admin(user_id):
+        return
+    lang = lang_for_user(user_id)
+    target_uid = None
+    if action == "next":
+        target_uid = db.get_next_user_id(uid)
+    elif action == "prev":
+        target_uid = db.get_prev_user_id(uid)
+    if not target_uid:
+        await query.answer(t(lang, "user_not_found", uid=uid), show_alert=True)
+        return
+    text, kb = render_user_profile(target_uid, lang)
+    await _respond_query(query, text, reply_markup=kb)
 
-        # --- voting rate ---
-        if data.startswith("rate:"):
-            _, cid_str, rating_str = data.split(":")
-            cid = int(cid_str)
-            rating = int(rating_str)
-            voter_gender = db.get_user_gender(user_id)
-            target_gender = target_gender_for_voter(voter_gender)
-            if not target_gender:
-                lang = lang_for_user(user_id)
-                keyboard = InlineKeyboardMarkup(
-                    [
-                        [
-                            InlineKeyboardButton(
-                                f"👦 {t(lang, 'gender_button_prompt')}", callback_data="votergender:Male"
-                            ),
-                            InlineKeyboardButton(
-                                f"👧 {t(lang, 'gender_button_prompt_female')}", callback_data="votergender:Female"
-                            ),
-                        ]
-                    ]
-                )
-                await query.message.reply_text(
-                    t(lang, "gender_prompt_vote"),
-                    reply_markup=keyboard,
-                )
-                return
-            db.add_vote(user_id, cid, rating)
-            await send_next_rating_candidate(query, user_id, target_gender)
-            return
 
-        # --- admin candidate nav ---
-        if data.startswith("admin:"):
-            _, cid_str, action = data.split(":")
-            cid = int(cid_str)
-            if not is_admin(user_id):
-                return
-            lang = lang_for_user(user_id)
-            if action == "approve":
-                db.approve_candidate(cid, 1)
-                row = db.get_candidate_by_id(cid)
-                if row:
-                    await send_admin_candidate(query, row)
-            elif action == "reject":
-                db.approve_candidate(cid, -1)
-                row = db.get_candidate_by_id(cid)
-                if row:
-                    await send_admin_candidate(query, row)
-            elif action == "next":
-                next_id = db.get_next_candidate_id(cid)
-                if not next_id:
-                    await query.answer(t(lang, "last_candidate_alert"), show_alert=True)
-                    return
-                row = db.get_candidate_by_id(next_id)
-                if row:
-                    await send_admin_candidate(query, row)
-            elif action == "prev":
-                prev_id = db.get_prev_candidate_id(cid)
-                if not prev_id:
-                    await query.answer(t(lang, "first_candidate_alert"), show_alert=True)
-                    return
-                row = db.get_candidate_by_id(prev_id)
-                if row:
-                    await send_admin_candidate(query, row)
-            return
+async def _cb_useract(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int, parts: list):
+    if not is_admin(user_id):
+        return
+    query = update.callback_query
+    uid = int(parts[1])
+    action = parts[2]
+    lang = lang_for_user(user_id)
+    if action == "bal":
+        delta = int(parts[3])
+        await query.answer(t(lang, "user_balance_updated", balance=db.adjust_balance(uid, delta)))
+    elif action == "gender":
+        gender_value = parts[3]
+        db.set_user_gender(uid, gender_value)
+        await query.answer(t(lang, "user_gender_updated", gender=gender_value))
+    elif action == "resetvotes":
+        db.reset_votes_for_user(uid)
+        await query.answer(t(lang, "user_votes_cleared"))
+    text, kb = render_user_profile(uid, lang)
+    await _respond_query(query, text, reply_markup=kb)
+
+
+# Exact callback_data values that map straight onto a handler; checked with one
+# dict lookup before falling back to the prefix table in button().
+_BUTTON_ROUTES = {
+    "game:menu": lambda update, context, user_id: send_game_menu(update.callback_query),
+    "game:checkin": lambda update, context, user_id: handle_checkin(update.callback_query),
+    "game:balance": lambda update, context, user_id: show_balance(update.callback_query),
+    "game:earn": lambda update, context, user_id: send_earn_points(update.callback_query, context),
+    "game:blackjack": lambda update, context, user_id: start_blackjack(update.callback_query, context),
+    "game:shop": lambda update, context, user_id: show_shop(update.callback_query),
+    "game:home": _cb_home,
+    "earn:ref": _cb_earn_ref,
+    "earn:boost": _cb_earn_boost,
+    "santa:start": lambda update, context, user_id: santa_start(update.callback_query, context),
+    "santa:edit": lambda update, context, user_id: santa_edit_start(update.callback_query, context),
+    "bj:hit": lambda update, context, user_id: blackjack_hit(update.callback_query),
+    "bj:stand": lambda update, context, user_id: blackjack_stand(update.callback_query),
+    "bj:double": lambda update, context, user_id: blackjack_double(update.callback_query),
+    "submit:useprofile": _cb_submit_useprofile,
+    "submit:editprofile": _cb_submit_editprofile,
+    "submit:saveprofile": _cb_submit_saveprofile,
+    "submit:withdraw": _cb_submit_withdraw,
+    "submit:menu": _cb_home,
+    "support:start": lambda update, context, user_id: support_start(update.callback_query, context),
+    "start:vote": _cb_start_vote,
+}
+
+# Parameterised callback_data, keyed by the text before the first ":"; handlers
+# get the already-split parts.
+_BUTTON_PREFIX_ROUTES = {
+    "tinder": _cb_tinder,
+    "swipe": _cb_swipe,
+    "bjbet": _cb_bjbet,
+    "tadmineditmenu": _cb_tadmin_edit_menu,
+    "tadmin": _cb_tadmin,
+    "tadminedit": _cb_tadmin_edit,
+    "shopbuy": _cb_shopbuy,
+    "santa": _cb_santa_nav,
+    "lang": _cb_lang,
+    "votergender": _cb_votergender,
+    "rate": _cb_rate,
+    "admin": _cb_admin_candidate,
+    "pdone": lambda update, context, user_id, parts: admin_purchase_done(update, context),
+    "usernav": _cb_usernav,
+    "useract": _cb_useract,
+}
+
+
+async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    # Stop the client's spinner without making the handler wait for the round-trip.
+    _spawn(_answer_quietly(query))
+    data = query.data
+    user_id = ensure_user_context(query)
 
+    route = _BUTTON_ROUTES.get(data)
+    args = ()
+    if route is None:
+        parts = data.split(":")
+        route = _BUTTON_PREFIX_ROUTES.get(parts[0])
+        args = (parts,)
+    if route is None:
+        return
+    try:
+        return await route(update, context, user_id, *args)
+    except TelegramError as e:
+        # Stale buttons, edits of unchanged messages, repeat answers: the user
+        # already sees the right thing, so just note it.
+        logger.warning("Callback %s: %s", data, e)
     except Exception:
         logger.exception("Unhandled callback %s", data)
         try:
@@ -4194,49 +4602,54 @@ async def button(update: Update, context: ContextTypes.DEFAULT_TYPE):
         except Exception:
             pass
 
-    if data.startswith("pdone:"):
-        await admin_purchase_done(update, context)
-        return
 
-    if data.startswith("usernav:"):
-        _, uid_str, action = data.split(":")
-        uid = int(uid_str)
-        if not is_admin(user_id):
-            return
-        lang = lang_for_user(user_id)
-        target_uid = None
-        if action == "next":
-            target_uid = db.get_next_user_id(uid)
-        elif action == "prev":
-            target_uid = db.get_prev_user_id(uid)
-        if not target_uid:
-            await query.answer(t(lang, "user_not_found", uid=uid), show_alert=True)
-            return
-        text, kb = render_user_profile(target_uid, lang)
-        await _respond(query, text, reply_markup=kb)
-        return
-
-    if data.startswith("useract:"):
-        if not is_admin(user_id):
-            return
-        parts = data.split(":")
-        uid = int(parts[1])
-        action = parts[2]
-        lang = lang_for_user(user_id)
-        if action == "bal":
-            delta = int(parts[3])
-            db.adjust_balance(uid, delta)
-            await query.answer(t(lang, "user_balance_updated", balance=db.get_balance(uid)))
-        elif action == "gender":
-            gender_value = parts[3]
-            db.set_user_gender(uid, gender_value)
-            await query.answer(t(lang, "user_gender_updated", gender=gender_value))
-        elif action == "resetvotes":
-            db.reset_votes_for_user(uid)
-            await query.answer(t(lang, "user_votes_cleared"))
-        text, kb = render_user_profile(uid, lang)
-        await _respond(query, text, reply_markup=kb)
-        return
+# Plain slash commands. None of these names is a conversation entry point, so they
+# are registered in one batch ahead of the conversations.
+_COMMANDS = (
+    ("start", start),
+    ("help", help_command),
+    ("language", language_command),
+    ("menu", menu_command),
+    ("fun", fun_command),
+    ("mode_collect", mode_collect),
+    ("mode_vote", mode_vote),
+    ("mode_pause", mode_pause),
+    ("mode_disable", mode_disable),
+    ("list_candidates", list_candidates),
+    ("review", review),
+    ("show", show_candidate_cmd),
+    ("approve", approve_cmd),
+    ("reject", reject_cmd),
+    ("reset_votes", reset_votes_cmd),
+    ("reset_vote_admin", reset_votes_admin_cmd),
+    ("guest", guest_mode_cmd),
+    ("wipe_phantom", wipe_phantom_cmd),
+    ("say", broadcast_cmd),
+    ("edit", edit_candidate_cmd),
+    ("wipe_profile", wipe_profile_cmd),
+    ("blackjack", blackjack_command),
+    ("grant_boost", grant_boost_points_cmd),
+    ("bjboost", blackjack_boost_cmd),
+    ("feature", feature_toggle_cmd),
+    ("op", op_command),
+    ("lookup", santa_lookup_cmd),
+    ("shop", shop_command),
+    ("balance", balance_command),
+    ("review_profiles", tinder_admin_review),
+    ("purchases", admin_purchases),
+    ("givepoints", give_points_cmd),
+    ("sync_boosts", sync_boosts_cmd),
+    ("reset_shows", reset_shows_cmd),
+    ("reset_shows_all", reset_shows_all_cmd),
+    ("wipe_profiles", wipe_profiles_cmd),
+    ("bjstats", blackjack_stats_cmd),
+    ("profile", myprofile_command),
+    ("list_users", list_users_cmd),
+    ("user", user_info_cmd),
+    ("results", results),
+    ("likes", likes_command),
+    ("vote", vote_command),
+)
 
 
 def register_handlers(application: Application) -> None:
@@ -4265,34 +4678,9 @@ def register_handlers(application: Application) -> None:
         fallbacks=[CommandHandler("cancel", submit_cancel)],
     )
 
-    application.add_handler(CommandHandler("start", start))
+    application.add_handler(MessageHandler(filters.ALL, _forget_reply_keyboard), group=-1)
+    application.add_handlers([CommandHandler(name, callback) for name, callback in _COMMANDS])
     application.add_handler(conv_handler)
-    application.add_handler(CommandHandler("help", help_command))
-    application.add_handler(CommandHandler("language", language_command))
-    application.add_handler(CommandHandler("menu", menu_command))
-    application.add_handler(CommandHandler("fun", fun_command))
-
-    application.add_handler(CommandHandler("mode_collect", mode_collect))
-    application.add_handler(CommandHandler("mode_vote", mode_vote))
-    application.add_handler(CommandHandler("mode_pause", mode_pause))
-    application.add_handler(CommandHandler("mode_disable", mode_disable))
-    application.add_handler(CommandHandler("list_candidates", list_candidates))
-    application.add_handler(CommandHandler("review", review))
-    application.add_handler(CommandHandler("show", show_candidate_cmd))
-    application.add_handler(CommandHandler("approve", approve_cmd))
-    application.add_handler(CommandHandler("reject", reject_cmd))
-    application.add_handler(CommandHandler("reset_votes", reset_votes_cmd))
-    application.add_handler(CommandHandler("reset_vote_admin", reset_votes_admin_cmd))
-    application.add_handler(CommandHandler("guest", guest_mode_cmd))
-    application.add_handler(CommandHandler("wipe_phantom", wipe_phantom_cmd))
-    application.add_handler(CommandHandler("say", broadcast_cmd))
-    application.add_handler(CommandHandler("edit", edit_candidate_cmd))
-    application.add_handler(CommandHandler("wipe_profile", wipe_profile_cmd))
-    application.add_handler(CommandHandler("blackjack", blackjack_command))
-    application.add_handler(CommandHandler("grant_boost", grant_boost_points_cmd))
-    application.add_handler(CommandHandler("bjboost", blackjack_boost_cmd))
-    application.add_handler(CommandHandler("feature", feature_toggle_cmd))
-    application.add_handler(CommandHandler("op", op_command))
     santa_conv = ConversationHandler(
         entry_points=[
             CommandHandler("santa", santa_start),
@@ -4307,22 +4695,6 @@ def register_handlers(application: Application) -> None:
         fallbacks=[CommandHandler("cancel", santa_cancel)],
     )
     application.add_handler(santa_conv)
-    application.add_handler(CommandHandler("lookup", santa_lookup_cmd))
-    application.add_handler(CommandHandler("shop", shop_command))
-    application.add_handler(CommandHandler("balance", balance_command))
-    application.add_handler(CommandHandler("review_profiles", tinder_admin_review))
-    application.add_handler(CommandHandler("purchases", admin_purchases))
-    application.add_handler(CommandHandler("givepoints", give_points_cmd))
-    application.add_handler(CommandHandler("sync_boosts", sync_boosts_cmd))
-    application.add_handler(CommandHandler("reset_shows", reset_shows_cmd))
-    application.add_handler(CommandHandler("reset_shows_all", reset_shows_all_cmd))
-    application.add_handler(CommandHandler("wipe_profiles", wipe_profiles_cmd))
-    application.add_handler(CommandHandler("lookup", santa_lookup_cmd))
-    application.add_handler(CommandHandler("bjstats", blackjack_stats_cmd))
-    application.add_handler(CommandHandler("profile", myprofile_command))
-    application.add_handler(CommandHandler("list_users", list_users_cmd))
-    application.add_handler(CommandHandler("user", user_info_cmd))
-    application.add_handler(CommandHandler("results", results))
     shop_conv = ConversationHandler(
         entry_points=[
             CallbackQueryHandler(shop_buy_entry, pattern=r"^shopbuy:"),
@@ -4387,7 +4759,9 @@ def register_handlers(application: Application) -> None:
                 CallbackQueryHandler(tinder_edit_menu, pattern=r"^tinder:edit$"),
             ],
         },
-        fallbacks=[CommandHandler("cancel", submit_cancel)],
+        # /find mid-flow restarts from find_command, whose returned state the
+        # conversation then tracks.
+        fallbacks=[CommandHandler("cancel", submit_cancel), CommandHandler("find", find_command)],
     )
     application.add_handler(tinder_conv)
     # Admin edit (finder profiles)
@@ -4402,11 +4776,12 @@ def register_handlers(application: Application) -> None:
         fallbacks=[],
     )
     application.add_handler(admin_edit_conv)
-    application.add_handler(MessageHandler(filters.Regex("^(❤️|💔|😴|🔍|📥)$"), tinder_swipe_text))
-    application.add_handler(CommandHandler("find", find_command))
-    application.add_handler(CommandHandler("likes", likes_command))
+    application.add_handler(MessageHandler(_SwipeButtonFilter(), tinder_swipe_text))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, quick_reply_handler))
 
-    application.add_handler(CommandHandler("vote", vote_command))
-
     application.add_handler(CallbackQueryHandler(button))
+
+    # Build the per-language voting keyboards up front so the first voter in
+    # each language doesn't pay for it.
+    for lang in LANGUAGE_OPTIONS:
+        _voter_gender_keyboard(lang)
@@ -1,8 +1,10 @@
 import config
 import db
-from translations import LANGUAGE_OPTIONS
+import re
 import requests
 import sqlite3
+import threading
+import time
 from functools import lru_cache
 
 
@@ -33,13 +35,9 @@ def split_name(full_name: str) -> tuple[str, str]:
     return parts[0], ""
 
 
-def normalize_city(text: str) -> str:
-    """Basic city normalization: lower, strip, remove extra spaces, simple Cyrillic->Latin."""
-    if not text:
-        return ""
-    txt = text.strip().lower()
-    # Replace common Cyrillic letters with Latin lookalikes for coarse matching
-    translit_map = {
+# Replace common Cyrillic letters with Latin lookalikes for coarse matching
+_CITY_TRANSLIT = str.maketrans(
+    {
         "а": "a",
         "б": "b",
         "в": "v",
@@ -76,23 +74,23 @@ def normalize_city(text: str) -> str:
         "ю": "u",
         "я": "ya",
     }
-    normalized = []
-    for ch in txt:
-        normalized.append(translit_map.get(ch, ch))
-    txt = "".join(normalized)
+)
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_city(text: str) -> str:
+    """Basic city normalization: lower, strip, remove extra spaces, simple Cyrillic->Latin."""
+    if not text:
+        return ""
+    txt = text.strip().lower()
+    if not txt.isascii():
+        txt = txt.translate(_CITY_TRANSLIT)
     # Collapse multiple spaces and punctuation to single spaces
-    out = []
-    prev_space = False
-    for ch in txt:
-        if ch.isalnum():
-            out.append(ch)
-            prev_space = False
-        else:
-            if not prev_space:
-                out.append(" ")
-            prev_space = True
-    collapsed = " ".join("".join(out).split())
-    return collapsed
+    return _NON_ALNUM_RE.sub(" ", txt).strip()
+
+
+_DROP_DIGITS = str.maketrans("", "", "0123456789")
 
 
 def looks_like_coord(value: str) -> bool:
@@ -101,15 +99,50 @@ def looks_like_coord(value: str) -> bool:
     v = value.strip().lower()
     if v.startswith("geo:"):
         return True
-    digit_ratio = sum(ch.isdigit() for ch in v) / max(len(v), 1)
-    return digit_ratio > 0.3 or any(ch in v for ch in [",", ".", ":"])
+    # More than 30% digits (counted by what translate() strips), or any separator.
+    digits = len(v) - len(v.translate(_DROP_DIGITS))
+    return digits * 10 > 3 * len(v) or "," in v or "." in v or ":" in v
 
 
 _GEOCODE_CACHE: dict[tuple[float, float], tuple[str, str]] = {}
+# Nominatim's usage policy allows one request per second; concurrent callers
+# (worker threads, the startup repair pass) queue on this lock.
+_NOMINATIM_INTERVAL = 1.0
+_NOMINATIM_LOCK = threading.Lock()
+_nominatim_last_call = 0.0
+# One keep-alive session so consecutive lookups reuse the TLS connection.
+_NOMINATIM_SESSION = requests.Session()
+_NOMINATIM_SESSION.headers["User-Agent"] = "winter-ballet-bot/1.0"
+_NOMINATIM_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+
+def _wait_for_nominatim(block: bool = True) -> bool:
+    """Claim the next Nominatim slot; with block=False, return False instead of waiting."""
+    global _nominatim_last_call
+    if not _NOMINATIM_LOCK.acquire(blocking=block):
+        return False
+    try:
+        wait = _nominatim_last_call + _NOMINATIM_INTERVAL - time.monotonic()
+        if wait > 0:
+            if not block:
+                return False
+            time.sleep(wait)
+        _nominatim_last_call = time.monotonic()
+        return True
+    finally:
+        _NOMINATIM_LOCK.release()
+
+
+def _coords_label(lat_f: float, lon_f: float) -> tuple[str, str]:
+    return f"{lat_f:.4f},{lon_f:.4f}", f"geo:{round(lat_f,1)}:{round(lon_f,1)}"
+
 
+def reverse_geocode_city(lat: float, lon: float, block: bool = True) -> tuple[str, str]:
+    """Best-effort reverse geocode; returns (city_label, normalized_city).
 
-def reverse_geocode_city(lat: float, lon: float) -> tuple[str, str]:
-    """Best-effort reverse geocode; returns (city_label, normalized_city)."""
+    With block=False (callers on the event loop) an uncached lookup that would
+    have to wait for the rate limit returns the coordinates label uncached.
+    """
     try:
         lat_f = float(lat)
         lon_f = float(lon)
@@ -118,11 +151,16 @@ def reverse_geocode_city(lat: float, lon: float) -> tuple[str, str]:
     key = (round(lat_f, 4), round(lon_f, 4))
     if key in _GEOCODE_CACHE:
         return _GEOCODE_CACHE[key]
+    stored = db.get_cached_geocode(*key)
+    if stored:
+        _GEOCODE_CACHE[key] = stored
+        return stored
+    if not _wait_for_nominatim(block):
+        return _coords_label(lat_f, lon_f)
     try:
-        resp = requests.get(
+        resp = _NOMINATIM_SESSION.get(
             "https://nominatim.openstreetmap.org/reverse",
             params={"format": "json", "lat": lat_f, "lon": lon_f, "zoom": 10, "addressdetails": 1},
-            headers={"User-Agent": "winter-ballet-bot/1.0"},
             timeout=5,
         )
         if resp.ok:
@@ -135,16 +173,39 @@ def reverse_geocode_city(lat: float, lon: float) -> tuple[str, str]:
             if label:
                 result = (label, normalize_city(city or label))
                 _GEOCODE_CACHE[key] = result
+                db.put_cached_geocode(key[0], key[1], *result)
                 return result
     except Exception:
         pass
-    # Fallback to coords text
-    label = f"{lat_f:.4f},{lon_f:.4f}"
-    result = (label, f"geo:{round(lat_f,1)}:{round(lon_f,1)}")
+    # Fallback to coords text (kept in memory only, so a later run retries)
+    result = _coords_label(lat_f, lon_f)
     _GEOCODE_CACHE[key] = result
     return result
 
 
+@lru_cache(maxsize=8192)
+def _reverse_geocode_rounded(lat_r: float, lon_r: float) -> tuple[str, str]:
+    return reverse_geocode_city(lat_r, lon_r)
+
+
+def cached_reverse_geocode(lat, lon, block: bool = True) -> tuple[str, str]:
+    """reverse_geocode_city memoized at ~100m granularity (coords rounded to 3 decimals)."""
+    try:
+        lat_r, lon_r = round(float(lat), 3), round(float(lon), 3)
+    except (TypeError, ValueError):
+        return reverse_geocode_city(lat, lon)
+    if not block:
+        # Bypasses the lru layer so a rate-limited fallback isn't memoized;
+        # reverse_geocode_city's own cache still serves earlier lookups.
+        return reverse_geocode_city(lat_r, lon_r, block=False)
+    return _reverse_geocode_rounded(lat_r, lon_r)
+
+
+# Plain decimal numbers; checked before float() so non-numeric text doesn't
+# cost an exception.
+_NUMBER_RE = re.compile(r"\s*[-+]?(?:\d+\.?\d*|\.\d+)\s*")
+
+
 def parse_lat_lon(text: str):
     """Extract lat/lon from common string patterns; returns (lat, lon) or (None, None)."""
     if not text:
@@ -153,13 +214,8 @@ def parse_lat_lon(text: str):
     for sep in [",", ":", " "]:
         if sep in txt:
             parts = txt.split(sep)
-            if len(parts) >= 2:
-                try:
-                    lat = float(parts[0])
-                    lon = float(parts[1])
-                    return lat, lon
-                except Exception:
-                    continue
+            if len(parts) >= 2 and _NUMBER_RE.fullmatch(parts[0]) and _NUMBER_RE.fullmatch(parts[1]):
+                return float(parts[0]), float(parts[1])
     return None, None
 
 
@@ -173,24 +229,35 @@ def record_user(user) -> None:
         first_name=user.first_name,
         last_name=user.last_name,
         language_code=user.language_code,
+        seed_language=True,
     )
-    # Seed language preference if not set and Telegram language_code is supported.
-    existing_lang = db.get_user_language(user.id)
-    if not existing_lang and user.language_code in LANGUAGE_OPTIONS:
-        db.set_user_language(user.id, user.language_code)
+
+
+_REPAIR_CHUNK = 500
 
 
 def repair_tinder_profiles():
     """Fix legacy Tinder profiles that were saved with mis-ordered fields."""
     try:
         conn = sqlite3.connect(config.DB_PATH)
-        cur = conn.cursor()
-        rows = cur.execute(
+        # Telegram names for the name fallback below, read once for every profile owner.
+        basic_by_uid = {
+            uid: (username, first_name, last_name)
+            for uid, username, first_name, last_name in conn.execute(
+                """
+                SELECT user_id, username, first_name, last_name
+                FROM users WHERE user_id IN (SELECT user_id FROM tinder_profiles)
+                """
+            )
+        }
+        # Streamed rather than fetched whole; repaired rows are flushed in chunks
+        # below (the database runs in WAL, so the open read doesn't block them).
+        rows = conn.execute(
             """
             SELECT user_id, age, gender, interest, city, lat, lon, name, bio, normalized_city
             FROM tinder_profiles
             """
-        ).fetchall()
+        )
     except sqlite3.OperationalError:
         return
 
@@ -208,19 +275,20 @@ def repair_tinder_profiles():
         for v in values:
             if v is None:
                 continue
-            try:
-                val = float(str(v))
-                if val not in nums:
-                    nums.append(val)
-            except Exception:
+            text = str(v)
+            if not _NUMBER_RE.fullmatch(text):
                 continue
-        if len(nums) >= 2:
-            return nums[0], nums[1]
+            val = float(text)
+            if val not in nums:
+                nums.append(val)
+                if len(nums) == 2:
+                    return nums[0], nums[1]
         if len(nums) == 1:
             return nums[0], None
         return None, None
 
-    repaired = 0
+    repaired = []
+    total = skipped = 0
     for row in rows:
         user_id, age, gender, interest, city_raw, lat_raw, lon_raw, name_raw, bio_raw, norm_raw = row
 
@@ -258,24 +326,37 @@ def repair_tinder_profiles():
                 name_val = str(candidate)
                 break
         if not name_val:
-            basic = db.get_user_basic(user_id)
+            basic = basic_by_uid.get(user_id)
             if basic:
                 username, first_name, last_name = basic
                 name_val = " ".join([p for p in [first_name, last_name] if p]) or (f"@{username}" if username else "")
         name_val = name_val or "—"
 
         # Restore bio: prioritize original bio column, then legacy normalized_city when it wasn't a city
-        normalized_of_city = normalize_city(city_raw or "")
+        normalized_of_city = norm_city if city_val == city_raw else normalize_city(city_raw or "")
+        bio_text = str(bio_raw) if bio_raw else ""
+        norm_text = str(norm_raw) if norm_raw else ""
         bio_val = None
-        if bio_raw and not looks_like_coord(str(bio_raw)) and normalize_city(str(bio_raw)) != normalized_of_city:
-            bio_val = str(bio_raw)
-        if not bio_val and norm_raw and not looks_like_coord(str(norm_raw)) and normalize_city(str(norm_raw)) != normalized_of_city:
-            bio_val = str(norm_raw)
+        if bio_text and not looks_like_coord(bio_text) and normalize_city(bio_text) != normalized_of_city:
+            bio_val = bio_text
+        if not bio_val and norm_text and not looks_like_coord(norm_text) and normalize_city(norm_text) != normalized_of_city:
+            bio_val = norm_text
         bio_val = bio_val or "—"
 
-        db.upsert_profile(user_id, age, gender, interest, city_val or "—", lat_val, lon_val, name_val, bio_val, norm_city)
-        repaired += 1
+        fixed = (user_id, age, gender, interest, city_val or "—", lat_val, lon_val, name_val, bio_val, norm_city)
+        if fixed == row:
+            # Already consistent (the usual case after the first repair): nothing to write.
+            skipped += 1
+            continue
+        repaired.append(fixed)
+        if len(repaired) >= _REPAIR_CHUNK:
+            db.upsert_profiles_many(repaired)
+            total += len(repaired)
+            repaired.clear()
 
     conn.close()
     if repaired:
-        print(f"[repair] Tinder profiles repaired: {repaired}")
+        db.upsert_profiles_many(repaired)
+        total += len(repaired)
+    if total:
+        print(f"[repair] Tinder profiles repaired: {total} (already consistent: {skipped})")
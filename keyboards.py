@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
 import config
@@ -5,6 +7,7 @@ import db
 from translations import t
 
 
+@lru_cache(maxsize=None)
 def language_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [
@@ -21,9 +24,20 @@ def language_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+# Flags the menu keyboards depend on; read in one go (served from the settings
+# cache) and the markup memoized per (lang, flags) combination.
+_MENU_FEATURES = ("voting", "santa", "finder", "fun")
+
+
 def start_voting_keyboard(lang: str) -> InlineKeyboardMarkup:
+    flags = db.get_feature_flags(_MENU_FEATURES)
+    return _start_voting_keyboard(lang, flags["voting"], flags["santa"], flags["finder"], flags["fun"])
+
+
+@lru_cache(maxsize=None)
+def _start_voting_keyboard(lang: str, voting: bool, santa: bool, finder: bool, fun: bool) -> InlineKeyboardMarkup:
     rows = []
-    if db.is_feature_enabled("voting"):
+    if voting:
         rows.append(
             [
                 InlineKeyboardButton(
@@ -32,11 +46,11 @@ def start_voting_keyboard(lang: str) -> InlineKeyboardMarkup:
                 )
             ]
         )
-    if db.is_feature_enabled("santa"):
+    if santa:
         rows.append([InlineKeyboardButton(t(lang, "santa_menu_button"), callback_data="santa:start")])
-    if db.is_feature_enabled("finder"):
+    if finder:
         rows.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:start")])
-    if db.is_feature_enabled("fun"):
+    if fun:
         rows.append([InlineKeyboardButton(t(lang, "play_game_button"), callback_data="game:menu")])
     if config.TELEGRAM_PROMO_URL:
         rows.append(
@@ -46,12 +60,18 @@ def start_voting_keyboard(lang: str) -> InlineKeyboardMarkup:
 
 
 def paused_keyboard(lang: str) -> InlineKeyboardMarkup:
+    flags = db.get_feature_flags(_MENU_FEATURES)
+    return _paused_keyboard(lang, flags["santa"], flags["finder"], flags["fun"])
+
+
+@lru_cache(maxsize=None)
+def _paused_keyboard(lang: str, santa: bool, finder: bool, fun: bool) -> InlineKeyboardMarkup:
     buttons = []
-    if db.is_feature_enabled("santa"):
+    if santa:
         buttons.append([InlineKeyboardButton(t(lang, "santa_menu_button"), callback_data="santa:start")])
-    if db.is_feature_enabled("fun"):
+    if fun:
         buttons.append([InlineKeyboardButton(t(lang, "play_game_button"), callback_data="game:menu")])
-    if db.is_feature_enabled("finder"):
+    if finder:
         buttons.append([InlineKeyboardButton(t(lang, "tinder_find_button"), callback_data="tinder:start")])
     if config.TELEGRAM_PROMO_URL:
         buttons.append(
@@ -60,6 +80,7 @@ def paused_keyboard(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(buttons)
 
 
+@lru_cache(maxsize=None)
 def game_promo_keyboard(lang: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
         [[InlineKeyboardButton(t(lang, "play_game_button"), callback_data="game:menu")]]
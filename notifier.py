@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class OutboundQueue:
+    """Fire-and-forget sender for messages to other users, paced under Telegram's limits.
+
+    Handlers enqueue and return immediately; a single worker sends at most
+    `global_rps` messages per second overall and one message per
+    `per_user_interval` seconds to the same chat, honouring RetryAfter.
+    """
+
+    def __init__(self, global_rps: int = 30, per_user_interval: float = 1.0, max_attempts: int = 3):
+        self.global_rps = global_rps
+        self.per_user_interval = per_user_interval
+        self.max_attempts = max_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._bot = None
+        self._sent_at: deque = deque(maxlen=global_rps)
+        self._last_by_chat: dict = {}
+        self._delayed = 0  # items waiting in _requeue_later, not yet back in the queue
+
+    def start(self, bot) -> None:
+        self._bot = bot
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Send what is still queued (up to `timeout` seconds), then stop the worker."""
+        if self._task:
+            try:
+                await asyncio.wait_for(self._drain(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Stopping with %s outbound messages unsent", self._queue.qsize() + self._delayed)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def enqueue(self, chat_id: int, text: str, **kwargs) -> bool:
+        """Queue a message; returns False when the worker isn't running."""
+        if self._task is None:
+            return False
+        self._queue.put_nowait((chat_id, text, kwargs, 1))
+        return True
+
+    def _requeue_later(self, delay: float, item) -> None:
+        self._delayed += 1
+        asyncio.get_running_loop().call_later(delay, self._put_delayed, item)
+
+    def _put_delayed(self, item) -> None:
+        self._delayed -= 1
+        self._queue.put_nowait(item)
+
+    async def _drain(self) -> None:
+        while True:
+            await self._queue.join()
+            if not self._delayed:
+                return
+            await asyncio.sleep(0.1)
+
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._send(item)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, item) -> None:
+        chat_id, text, kwargs, attempt = item
+        now = time.monotonic()
+        wait_user = self._last_by_chat.get(chat_id, 0.0) + self.per_user_interval - now
+        if wait_user > 0:
+            self._requeue_later(wait_user, item)
+            return
+        if len(self._sent_at) == self.global_rps:
+            wait_global = self._sent_at[0] + 1.0 - now
+            if wait_global > 0:
+                await asyncio.sleep(wait_global)
+        self._sent_at.append(time.monotonic())
+        self._last_by_chat[chat_id] = time.monotonic()
+        if len(self._last_by_chat) > 10_000:
+            self._last_by_chat.clear()
+        try:
+            await self._bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        except RetryAfter as e:
+            if attempt < self.max_attempts:
+                self._requeue_later(float(e.retry_after), (chat_id, text, kwargs, attempt + 1))
+            else:
+                logger.warning("Failed to notify %s: still rate limited after %s attempts", chat_id, attempt)
+        except Exception as e:
+            logger.warning("Failed to notify %s: %s", chat_id, e)
+
+
+notifier = OutboundQueue()
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Tuple
 
 LANGUAGE_OPTIONS = ["en", "uk", "ru"]
 
@@ -1153,7 +1153,45 @@ TRANSLATIONS: Dict[str, Dict[str, str]] = {
 }
 
 
+def _flatten_translations() -> Dict[Tuple[str, str], str]:
+    """(lang, key) -> template, with English filled in for missing or empty entries."""
+    en = TRANSLATIONS["en"]
+    flat: Dict[Tuple[str, str], str] = {}
+    for lang, mapping in TRANSLATIONS.items():
+        for key in en.keys() | mapping.keys():
+            flat[(lang, key)] = mapping.get(key) or en.get(key, key)
+    return flat
+
+
+_FLAT_TRANSLATIONS = _flatten_translations()
+# Fully formatted strings for templates that take no arguments.
+_PLAIN_TRANSLATIONS: Dict[Tuple[str, str], str] = {}
+for _k, _template in _FLAT_TRANSLATIONS.items():
+    try:
+        _PLAIN_TRANSLATIONS[_k] = _template.format()
+    except (KeyError, IndexError, ValueError):
+        pass
+
+
+def template(lang: str, key: str) -> str:
+    """The unformatted template for `key`, falling back to English."""
+    tpl = _FLAT_TRANSLATIONS.get((lang, key))
+    if tpl is None:
+        tpl = _FLAT_TRANSLATIONS.get(("en", key), key)
+    return tpl
+
+
+def formatter(lang: str, key: str):
+    """Bound ``str.format`` of the resolved template, for hoisting out of per-item loops."""
+    return template(lang, key).format
+
+
 def t(lang: str, key: str, **kwargs) -> str:
-    lang_map = TRANSLATIONS.get(lang) or TRANSLATIONS["en"]
-    template = lang_map.get(key) or TRANSLATIONS["en"].get(key, key)
-    return template.format(**kwargs)
+    if not kwargs:
+        plain = _PLAIN_TRANSLATIONS.get((lang, key))
+        if plain is None and (lang, key) not in _FLAT_TRANSLATIONS:
+            # Users who never picked a language arrive with lang=None.
+            plain = _PLAIN_TRANSLATIONS.get(("en", key))
+        if plain is not None:
+            return plain
+    return template(lang, key).format_map(kwargs)